@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Benchmarks the cantilever growth problem over mesh sizes, interpolation orders and numbers of MPI processes, timing each phase and appending the results to a JSON history.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, glob, itertools, json, os, platform, resource, shlex, shutil, subprocess, sys, tempfile, time
+
+# The phases reported for every case. meshFields is the mesh and field setup, cellml the CellML import and
+# compilation, boundaryConditions the node selection and boundary condition setup, solve the time loop of
+# problem.Solve() calls and export the exnode/exelem export.
+phaseNames = ['meshFields','cellml','problem','boundaryConditions','solve','export']
+
+# The linear solver names accepted by --linear-solvers and their cantilever_growth linearSolverType values
+linearSolverTypes = {'automatic':0,'direct':1,'gmres':2,'bicgstab':3}
+preconditionerTypes = {'none':0,'jacobi':1,'blockjacobi':2,'asm':3,'ilu':4}
+
+# The MPI rank of this process as set by the common MPI launchers, which is known before MPI is initialised
+def LauncherRank():
+    for name in ['OMPI_COMM_WORLD_RANK','PMI_RANK','PMIX_RANK']:
+        if name in os.environ:
+            return int(os.environ[name])
+    return 0
+
+# Solve one case in this process and write the timings, Newton counts and peak memory of this rank as JSON. Every
+# rank of an MPI run writes its own file. The rank is found before the model is built so that a rank that fails during
+# the build still writes its own file.
+def WorkerMain(caseFileName,resultFileName):
+    with open(caseFileName) as caseFile:
+        case = json.load(caseFile)
+    result = {}
+    rank = LauncherRank()
+    try:
+        # Importing iron initialises MPI, after which mpi4py gives the rank
+        import cantilever_growth, parallel
+        rank = parallel.Rank(rank)
+        model = cantilever_growth.CantileverGrowthModel(case['parameters'])
+        model.Build()
+        outputs = model.Solve(echoMonitor=False)
+        model.Export(os.path.join(os.path.dirname(resultFileName),'output','CantileverGrowth'))
+        timings = dict(model.timings)
+        timings['meshFields'] = timings['mesh']+timings['fields']
+        result['timings'] = dict((phaseName,timings[phaseName]) for phaseName in phaseNames)
+        result['timings']['build'] = timings['build']
+        result['numberOfNodes'] = model.numberOfNodes
+        result['numberOfElements'] = model.numberOfElements
+        result['numberOfDofs'] = model.numberOfDofs
+        result['linearSolver'] = [name for name,value in linearSolverTypes.items()
+                                  if value == model.linearSolverType][0]
+        for name in ['newtonSolves','newtonIterations','maximumNewtonIterations','finalResidualNorm','converged',
+                     'tipDeflection']:
+            result[name] = outputs[name]
+        result['status'] = 'converged' if outputs['converged'] else 'diverged'
+    except Exception as exception:
+        result['status'] = 'failed'
+        result['message'] = '%s: %s' % (type(exception).__name__,exception)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    maximumRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['peakRSS'] = maximumRSS if (sys.platform == 'darwin') else maximumRSS*1024
+    with open('%s.%d' % (resultFileName,rank),'w') as resultFile:
+        json.dump(result,resultFile)
+
+# Combine the results of the ranks of one case. Phase times are the slowest rank, peak RSS is reported both as the
+# largest rank and summed over the ranks.
+def MergeRankResults(rankResults):
+    if (len(rankResults) == 0):
+        return {'status':'crashed'}
+    result = dict(rankResults[0])
+    for rankResult in rankResults[1:]:
+        if (rankResult['status'] != 'converged'):
+            result['status'] = rankResult['status']
+            result['message'] = rankResult.get('message','')
+    if ('timings' in result):
+        result['timings'] = dict((phaseName,max(rankResult['timings'][phaseName] for rankResult in rankResults
+                                                if 'timings' in rankResult))
+                                 for phaseName in result['timings'])
+    result['peakRSS'] = max(rankResult['peakRSS'] for rankResult in rankResults)
+    result['totalPeakRSS'] = sum(rankResult['peakRSS'] for rankResult in rankResults)
+    return result
+
+# Run one case in fresh processes, under MPI if it uses more than one process, so that every case has its own iron
+# environment and its own peak memory
+def RunCase(case,mpiexec='mpiexec -n %d',timeout=None,logFileName=None):
+    workDirectory = tempfile.mkdtemp(prefix='cantilever_benchmark_')
+    caseFileName = os.path.join(workDirectory,'case.json')
+    resultFileName = os.path.join(workDirectory,'result.json')
+    with open(caseFileName,'w') as caseFile:
+        json.dump(case,caseFile)
+    command = [sys.executable,os.path.abspath(__file__),'--worker',caseFileName,resultFileName]
+    if (case['numberOfProcesses'] > 1):
+        command = shlex.split(mpiexec % case['numberOfProcesses'])+command
+    logFile = open(logFileName,'w') if logFileName else open(os.devnull,'w')
+    startTime = time.time()
+    try:
+        returnCode = subprocess.call(command,cwd=os.path.dirname(os.path.abspath(__file__)),stdout=logFile,
+                                     stderr=subprocess.STDOUT,timeout=timeout)
+        rankResults = []
+        for rankFileName in sorted(glob.glob(resultFileName+'.*')):
+            with open(rankFileName) as rankFile:
+                rankResults.append(json.load(rankFile))
+        result = MergeRankResults(rankResults)
+        if (result['status'] == 'crashed'):
+            result['message'] = 'Worker exited with code %d' % returnCode
+        elif (len(rankResults) < case['numberOfProcesses']):
+            result['status'] = 'crashed'
+            result['message'] = 'Only %d of %d ranks finished' % (len(rankResults),case['numberOfProcesses'])
+    except subprocess.TimeoutExpired:
+        result = {'status':'timeout','message':'Case exceeded %g s' % timeout}
+    finally:
+        logFile.close()
+        shutil.rmtree(workDirectory,ignore_errors=True)
+    result['wallTime'] = time.time()-startTime
+    return result
+
+# The cases are the cartesian product of the element counts, the (u,p) interpolation pairs, the linear solvers and the
+# numbers of processes. For a weak scaling study the number of elements along the cantilever is multiplied by the number
+# of processes so that the work per process stays the same.
+def BenchmarkCases(elementCounts,interpolations,processCounts,linearSolvers=['automatic'],preconditioner='asm',
+                   scaling=None):
+    cases = []
+    for (numberOfX,numberOfY,numberOfZ),(uInterpolation,pInterpolation),linearSolver,numberOfProcesses in \
+            itertools.product(elementCounts,interpolations,linearSolvers,processCounts):
+        cases.append({'parameters':{'numberOfGlobalXElements':numberOfX,'numberOfGlobalYElements':numberOfY,
+                                    'numberOfGlobalZElements':numberOfZ*numberOfProcesses if (scaling == 'weak') else
+                                    numberOfZ,
+                                    'uInterpolation':uInterpolation,'pInterpolation':pInterpolation,
+                                    'linearSolverType':linearSolverTypes[linearSolver],
+                                    'preconditionerType':preconditionerTypes[preconditioner]},
+                      'numberOfProcesses':numberOfProcesses})
+        if scaling:
+            cases[-1]['scaling'] = scaling
+            cases[-1]['baseKey'] = '%dx%dx%d u%d p%d %s' % (numberOfX,numberOfY,numberOfZ,uInterpolation,
+                                                            pInterpolation,linearSolver)
+    return cases
+
+# A short label identifying a case across runs. Cases with an explicit linear solver are labelled with it.
+def CaseKey(case):
+    parameters = case['parameters']
+    key = '%dx%dx%d u%d p%d np%d' % (parameters['numberOfGlobalXElements'],parameters['numberOfGlobalYElements'],
+                                     parameters['numberOfGlobalZElements'],parameters['uInterpolation'],
+                                     parameters['pInterpolation'],case['numberOfProcesses'])
+    linearSolverType = parameters.get('linearSolverType',linearSolverTypes['automatic'])
+    if (linearSolverType != linearSolverTypes['automatic']):
+        key += ' '+[name for name,value in linearSolverTypes.items() if value == linearSolverType][0]
+        if (linearSolverType != linearSolverTypes['direct']):
+            key += '/'+[name for name,value in preconditionerTypes.items()
+                        if value == parameters['preconditionerType']][0]
+    return key
+
+# The revision of the checkout being benchmarked, if it is a git checkout
+def Revision():
+    try:
+        revision = subprocess.check_output(['git','rev-parse','--short','HEAD'],stderr=subprocess.DEVNULL,
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+        modified = subprocess.check_output(['git','status','--porcelain','--untracked-files=no'],
+                                           stderr=subprocess.DEVNULL,
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+        return revision+('-modified' if modified else '')
+    except (OSError,subprocess.CalledProcessError):
+        return 'unknown'
+
+# Read the history of earlier benchmark runs
+def ReadHistory(fileName):
+    if not os.path.exists(fileName):
+        return []
+    with open(fileName) as historyFile:
+        return json.load(historyFile)
+
+# Append one benchmark run to the history, replacing the file atomically so an interrupted write cannot lose the
+# earlier runs
+def AppendHistory(fileName,run):
+    history = ReadHistory(fileName)
+    history.append(run)
+    temporaryFileName = fileName+'.tmp'
+    with open(temporaryFileName,'w') as historyFile:
+        json.dump(history,historyFile,indent=1)
+    os.replace(temporaryFileName,fileName)
+
+# Find the most recent earlier result for each case key
+def PreviousResults(history):
+    previous = {}
+    for run in history:
+        for caseResult in run['cases']:
+            if (caseResult.get('status') == 'converged'):
+                previous[caseResult['key']] = dict(caseResult,revision=run['revision'])
+    return previous
+
+# Print one line per case with the phase times, Newton iterations and peak memory. Solve times more than
+# regressionThreshold times the previous result for the same case are flagged.
+def PrintReport(caseResults,previous={},regressionThreshold=1.2):
+    print('%-34s %8s %10s %8s %8s %8s %8s %8s %8s %7s %9s' % ('Case','DOFs','Status','Mesh/fld','CellML','BCs','Solve',
+                                                              'Export','Newton','RSS MB','vs prev'))
+    for caseResult in caseResults:
+        timings = caseResult.get('timings',{})
+        comparison = ''
+        if (caseResult['key'] in previous and 'solve' in timings):
+            ratio = timings['solve']/max(previous[caseResult['key']]['timings']['solve'],1e-12)
+            comparison = '%.2fx%s' % (ratio,' !' if (ratio > regressionThreshold) else '')
+        print('%-34s %8s %10s %8.3f %8.3f %8.3f %8.3f %8.3f %8s %7.1f %9s' % (
+            caseResult['key'],caseResult.get('numberOfDofs',''),caseResult['status'],timings.get('meshFields',0.0),
+            timings.get('cellml',0.0),timings.get('boundaryConditions',0.0),timings.get('solve',0.0),
+            timings.get('export',0.0),caseResult.get('newtonIterations',''),caseResult.get('peakRSS',0)/2.0**20,
+            comparison))
+
+# Print the parallel efficiency of the setup, solve and export phases of a scaling study relative to the one process
+# case, T1/(p*Tp) for strong scaling and T1/Tp for weak scaling
+def PrintScalingReport(caseResults):
+    print('%-34s %4s %9s %9s %9s %7s %7s %7s' % ('Case','np','Setup','Solve','Export','E setup','E solve','E export'))
+    references = dict((caseResult['baseKey'],caseResult) for caseResult in caseResults
+                      if caseResult['numberOfProcesses'] == 1 and 'timings' in caseResult)
+    for caseResult in caseResults:
+        if ('timings' not in caseResult):
+            print('%-34s %4d %s' % (caseResult['baseKey'],caseResult['numberOfProcesses'],caseResult['status']))
+            continue
+        times = [caseResult['timings'][phaseName] for phaseName in ['build','solve','export']]
+        efficiencies = []
+        for phaseName,phaseTime in zip(['build','solve','export'],times):
+            if (caseResult['baseKey'] in references):
+                referenceTime = references[caseResult['baseKey']]['timings'][phaseName]
+                processes = caseResult['numberOfProcesses'] if (caseResult['scaling'] == 'strong') else 1
+                efficiencies.append('%7.2f' % (referenceTime/max(processes*phaseTime,1e-12)))
+            else:
+                efficiencies.append('%7s' % '-')
+        print('%-34s %4d %9.3f %9.3f %9.3f %s' % (caseResult['baseKey'],caseResult['numberOfProcesses'],times[0],
+                                                  times[1],times[2],' '.join(efficiencies)))
+
+# Parse a list of comma separated integer tuples, e.g. "1,1,3 2,2,6"
+def IntegerTuples(text,length):
+    tuples = [tuple(int(value) for value in item.split(',')) for item in text.split()]
+    for item in tuples:
+        if (len(item) != length):
+            raise ValueError('Expected %d comma separated integers, got %s' % (length,item))
+    return tuples
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        WorkerMain(sys.argv[2],sys.argv[3])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Benchmark the cantilever growth problem.')
+    parser.add_argument('--elements',default='1,1,3 2,2,6 4,4,12',
+                        help='space separated X,Y,Z numbers of elements (default "%(default)s")')
+    parser.add_argument('--interpolations',default='2,1',
+                        help='space separated u,p interpolations, 1 linear, 2 quadratic, 3 cubic '
+                        '(default "%(default)s")')
+    parser.add_argument('--processes',default=None,
+                        help='space separated numbers of MPI processes (default 1, or powers of two up to the number '
+                        'of cores for a scaling study)')
+    parser.add_argument('--scaling',default=None,choices=['strong','weak'],
+                        help='run a strong (fixed mesh) or weak (elements along the cantilever grow with the number '
+                        'of processes) scaling study and report the parallel efficiency')
+    parser.add_argument('--linear-solvers',default='automatic',
+                        help='space separated linear solvers out of %s (default "%%(default)s")' %
+                        ', '.join(sorted(linearSolverTypes)))
+    parser.add_argument('--preconditioner',default='asm',choices=sorted(preconditionerTypes),
+                        help='preconditioner of the iterative linear solvers (default "%(default)s")')
+    parser.add_argument('--mpiexec',default='mpiexec -n %d',help='MPI launch command (default "%(default)s")')
+    parser.add_argument('--history',default='benchmark_history.json',help='JSON history to append the results to')
+    parser.add_argument('--label',default='',help='label stored with this run in the history')
+    parser.add_argument('--timeout',type=float,default=None,help='maximum time in seconds for one case')
+    parser.add_argument('--log-directory',default=None,help='directory to write the solver output of each case')
+    arguments = parser.parse_args()
+
+    if arguments.processes is not None:
+        processCounts = [int(value) for value in arguments.processes.split()]
+    elif arguments.scaling:
+        processCounts = [2**power for power in range((os.cpu_count() or 1).bit_length())]
+    else:
+        processCounts = [1]
+    cases = BenchmarkCases(IntegerTuples(arguments.elements,3),IntegerTuples(arguments.interpolations,2),processCounts,
+                           arguments.linear_solvers.split(),arguments.preconditioner,arguments.scaling)
+    if arguments.log_directory and not os.path.exists(arguments.log_directory):
+        os.makedirs(arguments.log_directory)
+    previous = PreviousResults(ReadHistory(arguments.history))
+
+    caseResults = []
+    for caseIdx,case in enumerate(cases):
+        logFileName = os.path.join(arguments.log_directory,'case%d.log' % caseIdx) if arguments.log_directory else None
+        caseResult = RunCase(case,arguments.mpiexec,arguments.timeout,logFileName)
+        caseResult.update(case)
+        caseResult['key'] = CaseKey(case)
+        print('Case %d/%d %s: %s (%.1f s)' % (caseIdx+1,len(cases),caseResult['key'],caseResult['status'],
+                                              caseResult['wallTime']))
+        sys.stdout.flush()
+        caseResults.append(caseResult)
+
+    run = {'time':time.strftime('%Y-%m-%dT%H:%M:%S'),'revision':Revision(),'label':arguments.label,
+           'host':platform.node(),'python':platform.python_version(),'cases':caseResults}
+    AppendHistory(arguments.history,run)
+    PrintReport(caseResults,previous)
+    if arguments.scaling:
+        PrintScalingReport(caseResults)
+    print('Results appended to %s' % arguments.history)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Selects boundary nodes from the geometric field with NumPy and applies fixed and Neumann point boundary conditions to them.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import numpy
+
+from opencmiss.iron import iron
+
+X_AXIS = 0
+Y_AXIS = 1
+Z_AXIS = 2
+
+# The consistent nodal weights of a uniform load over one element for each number of nodes in the element direction
+elementLoadWeights = {
+    2:numpy.array([1.0,1.0])/2.0,
+    3:numpy.array([1.0,4.0,1.0])/6.0,
+    4:numpy.array([1.0,3.0,3.0,1.0])/8.0,
+    }
+
+# Get the node user numbers and reference coordinates (numberOfNodes x 3) of the nodes in nodeNumbers from the
+# geometric field
+def NodeCoordinates(geometricField,nodeNumbers,numberOfDimensions=3):
+    nodeNumbers = numpy.asarray(nodeNumbers,dtype=int)
+    coordinates = numpy.empty((len(nodeNumbers),numberOfDimensions))
+    for nodeIdx,nodeNumber in enumerate(nodeNumbers):
+        for componentIdx in range(numberOfDimensions):
+            coordinates[nodeIdx,componentIdx] = geometricField.ParameterSetGetNodeDP(
+                iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,1,1,int(nodeNumber),componentIdx+1)
+    return nodeNumbers,coordinates
+
+# Calculate the reference coordinates (elements x Gauss points x 3) of the Gauss points of the given elements of a
+# regular generated mesh. Elements are numbered with x varying fastest, like the nodes, and the Gauss points of an
+# element with xi1 varying fastest, as iron orders them.
+def RegularMeshGaussPointCoordinates(extent,numberOfElements,numberOfGaussXi,elementNumbers):
+    gaussXi = 0.5*(numpy.polynomial.legendre.leggauss(numberOfGaussXi)[0]+1.0)
+    grids = numpy.meshgrid(*[gaussXi]*len(extent),indexing='ij')
+    gaussPointXi = numpy.stack([grid.ravel() for grid in grids[::-1]],axis=1)
+    elementIndices = numpy.asarray(elementNumbers,dtype=int)-1
+    coordinates = numpy.empty((len(elementIndices),len(gaussPointXi),len(extent)))
+    for axis in range(len(extent)):
+        elementSize = extent[axis]/numberOfElements[axis]
+        elementIndex = elementIndices//int(numpy.prod(numberOfElements[:axis]))%numberOfElements[axis]
+        coordinates[:,:,axis] = (elementIndex[:,numpy.newaxis]+gaussPointXi[numpy.newaxis,:,axis])*elementSize
+    return coordinates
+
+# Select the nodes that the decomposition assigns to the domain of computationalNodeNumber. Boundary conditions are only
+# added for these nodes.
+def DomainNodes(decomposition,nodeNumbers,computationalNodeNumber,meshComponentNumber=1):
+    return numpy.array([nodeNumber for nodeNumber in numpy.asarray(nodeNumbers,dtype=int)
+                        if decomposition.NodeDomainGet(int(nodeNumber),meshComponentNumber) == computationalNodeNumber],
+                       dtype=int)
+
+# Select the elements that the decomposition assigns to the domain of computationalNodeNumber
+def DomainElements(decomposition,elementNumbers,computationalNodeNumber):
+    return numpy.array([elementNumber for elementNumber in numpy.asarray(elementNumbers,dtype=int)
+                        if decomposition.ElementDomainGet(int(elementNumber)) == computationalNodeNumber],dtype=int)
+
+# A tolerance for comparing coordinates that scales with the size of the mesh
+def CoordinateTolerance(coordinates,relativeTolerance=1.0e-8):
+    return relativeTolerance*max(1.0,numpy.max(numpy.ptp(coordinates,axis=0)))
+
+# Select the nodes whose coordinates satisfy predicate. The predicate is given the coordinates array and returns a
+# boolean mask.
+def SelectNodes(nodeNumbers,coordinates,predicate):
+    return numpy.asarray(nodeNumbers)[numpy.asarray(predicate(coordinates),dtype=bool)]
+
+# Select the nodes that lie on the plane coordinate[axis] = value
+def FaceNodes(nodeNumbers,coordinates,axis,value,tolerance=None):
+    if tolerance is None:
+        tolerance = CoordinateTolerance(coordinates)
+    return SelectNodes(nodeNumbers,coordinates,lambda x: numpy.abs(x[:,axis]-value) <= tolerance)
+
+# Select the nodes that lie on the line where the planes coordinate[axis] = value meet for each (axis,value) in planes
+def EdgeNodes(nodeNumbers,coordinates,planes,tolerance=None):
+    if tolerance is None:
+        tolerance = CoordinateTolerance(coordinates)
+    mask = numpy.ones(len(nodeNumbers),dtype=bool)
+    for axis,value in planes:
+        mask &= numpy.abs(coordinates[:,axis]-value) <= tolerance
+    return numpy.asarray(nodeNumbers)[mask]
+
+# Return the coordinates of the given nodes
+def CoordinatesOf(nodeNumbers,coordinates,selectedNodes):
+    rows = numpy.searchsorted(nodeNumbers,selectedNodes)
+    return coordinates[rows]
+
+# Calculate the fraction of a total uniform load carried by each of the selected nodes. The nodes must form a regular
+# line or face of elements with numberOfNodesXi nodes in each direction, as on the edges and faces of a generated
+# mesh. The weights are the consistent nodal loads of a uniform load so the total and its distribution do not change
+# as the mesh is refined.
+def LoadWeights(selectedCoordinates,numberOfNodesXi,tolerance=None):
+    if tolerance is None:
+        tolerance = CoordinateTolerance(selectedCoordinates)
+    weights = numpy.ones(len(selectedCoordinates))
+    for axis in range(selectedCoordinates.shape[1]):
+        positions = selectedCoordinates[:,axis]
+        if numpy.ptp(positions) <= tolerance:
+            continue
+        # Find the distinct node positions along this axis and the element each run of numberOfNodesXi nodes forms
+        sortedPositions = numpy.sort(positions)
+        distinctPositions = sortedPositions[numpy.concatenate(([True],numpy.diff(sortedPositions) > tolerance))]
+        numberOfElements,remainder = divmod(len(distinctPositions)-1,numberOfNodesXi-1)
+        if remainder != 0:
+            raise ValueError('The selected nodes do not form whole elements along axis %d' % axis)
+        axisWeights = numpy.zeros(len(distinctPositions))
+        for elementIdx in range(numberOfElements):
+            elementNodes = slice(elementIdx*(numberOfNodesXi-1),(elementIdx+1)*(numberOfNodesXi-1)+1)
+            elementLength = distinctPositions[elementNodes][-1]-distinctPositions[elementNodes][0]
+            axisWeights[elementNodes] += elementLength*elementLoadWeights[numberOfNodesXi]
+        positionIndices = numpy.clip(numpy.searchsorted(distinctPositions,positions-tolerance),0,len(distinctPositions)-1)
+        weights *= axisWeights[positionIndices]
+    return weights/numpy.sum(weights)
+
+# Add the same boundary condition to each of the given components of every node in nodeNumbers. iron adds point
+# boundary conditions one node and component at a time, so this is a loop over the nodes.
+def AddNodes(boundaryConditions,field,variableType,nodeNumbers,components,conditionType,values):
+    values = numpy.broadcast_to(numpy.asarray(values,dtype=float),(len(nodeNumbers),))
+    for nodeNumber,value in zip(numpy.asarray(nodeNumbers,dtype=int),values):
+        for component in components:
+            boundaryConditions.AddNode(field,variableType,1,1,int(nodeNumber),component,conditionType,float(value))
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Calibrates the growth rates so that the cantilever reproduces a measured tip deflection and curvature, solving batches of candidate rates concurrently on a pool of warm workers.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, csv, json, math, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+import cantilever_parameters
+import postprocess
+import solver_service
+
+# The growth rates calibrated by default
+defaultParameterNames = ['fibreRate','sheetRate','normalRate']
+
+# The parameters that can be calibrated. They are fitted as logarithms so they must be continuous and positive.
+calibratableParameters = ['fibreRate','sheetRate','normalRate','c1','c2']
+
+# The columns of the convergence log before the parameter columns
+logNames = ['iteration','solves','memoised','cost','damping','stepNorm','tipDeflection','curvature','wallTime']
+
+# The key in the memo of evaluations of a point evaluated with a curvature metric
+def PointKey(point,curvatureMetric):
+    return json.dumps([curvatureMetric,dict((name,'%.12g' % value) for name,value in point.items())],sort_keys=True)
+
+# The Levenberg-Marquardt steps of the residuals with the given Jacobian for each of the dampings. Every parameter is
+# damped alike, by the damping times the mean diagonal of the normal matrix, so that parameters the residuals hardly
+# depend on are not moved far. A step is scaled down so that it changes no parameter by more than maximumStep.
+def DampedSteps(jacobian,residuals,dampings,maximumStep):
+    gradient = jacobian.T.dot(residuals)
+    normal = jacobian.T.dot(jacobian)
+    scaling = numpy.eye(len(gradient))*max(numpy.trace(normal)/len(gradient),1e-12)
+    steps = [numpy.linalg.solve(normal+damping*scaling,-gradient) for damping in dampings]
+    return [step*min(1.0,maximumStep/max(numpy.abs(step).max(),1e-300)) for step in steps]
+
+# Fits parameters, by default the growth rates, to target values of the tip deflection and of a curvature metric of
+# postprocess.py, curvatureMean by default. The rates are fitted as their logarithms so that they stay positive and the
+# finite difference steps are relative. The residuals are the differences from the targets relative to the targets.
+# Every converged evaluation is memoised and, given evaluationLogFileName, appended to it as a line of JSON. Evaluations
+# already in that file with the same curvature metric, e.g. from an interrupted fit, are read back into the memo. Failed
+# solves are not kept so that they are tried again, e.g. after a timeout.
+class Calibration(object):
+
+    def __init__(self,targets,parameterNames=defaultParameterNames,baseParameters={},curvatureMetric='curvatureMean',
+                 numberOfWorkers=None,timeout=None,evaluationLogFileName=None):
+        if not targets:
+            raise ValueError('Give a target tip deflection, curvature or both')
+        unknownParameters = set(parameterNames)-set(calibratableParameters)
+        if unknownParameters:
+            raise ValueError('Only %s can be calibrated, not %s' % (', '.join(calibratableParameters),
+                                                                     ', '.join(sorted(unknownParameters))))
+        self.targets = targets
+        self.targetNames = sorted(targets)
+        self.parameterNames = list(parameterNames)
+        self.baseParameters = cantilever_parameters.CantileverParameters(baseParameters)
+        self.curvatureMetric = curvatureMetric
+        self.numberOfWorkers = numberOfWorkers or os.cpu_count() or 1
+        self.pool = solver_service.SolverPool(self.numberOfWorkers,timeout)
+        self.memo = {}
+        self.numberOfSolves = 0
+        self.numberOfMemoised = 0
+        self.evaluationLogFileName = evaluationLogFileName
+        if (evaluationLogFileName and os.path.exists(evaluationLogFileName)):
+            with open(evaluationLogFileName) as evaluationLogFile:
+                for line in evaluationLogFile:
+                    if line.strip():
+                        evaluation = json.loads(line)
+                        if (evaluation.get('status') == 'converged' and
+                            evaluation.get('curvatureMetric') == curvatureMetric):
+                            self.memo[PointKey(evaluation['point'],curvatureMetric)] = evaluation
+
+    # The point solved for the parameter values x
+    def Point(self,x):
+        point = dict(self.baseParameters)
+        point.update((name,float(value)) for name,value in zip(self.parameterNames,numpy.exp(x)))
+        return point
+
+    # Solve one point and measure its tip deflection and curvature
+    def Solve(self,point):
+        result = self.pool.Submit({'parameters':point,'outputs':['tipDeflection'],
+                                   'arrays':['displacement','referenceCoordinates']})
+        evaluation = {'point':point,'curvatureMetric':self.curvatureMetric,'status':result['status']}
+        if (result['status'] == 'converged'):
+            referenceCoordinates = numpy.array(result['arrays']['referenceCoordinates'])
+            numberOfNodesXi = point['uInterpolation']+1
+            state = {
+                'referenceCoordinates':referenceCoordinates,
+                'coordinates':referenceCoordinates+numpy.array(result['arrays']['displacement']),
+                'elementNodes':postprocess.RegularElementNodes(referenceCoordinates,numberOfNodesXi),
+                }
+            metrics = dict(postprocess.StateMetrics(state,numberOfNodesXi))
+            evaluation['tipDeflection'] = result['outputs']['tipDeflection']
+            evaluation['curvature'] = metrics[self.curvatureMetric]
+        else:
+            evaluation['message'] = result.get('message','')
+        return evaluation
+
+    # Evaluate the points of a batch, solving those not in the memo concurrently. Returns the evaluations in order.
+    def Evaluate(self,points):
+        keys = [PointKey(point,self.curvatureMetric) for point in points]
+        unsolved = {}
+        for key,point in zip(keys,points):
+            if (key not in self.memo and key not in unsolved):
+                unsolved[key] = point
+        self.numberOfMemoised += len(points)-len(unsolved)
+        solved = {}
+        if unsolved:
+            with ThreadPoolExecutor(max_workers=self.numberOfWorkers) as executor:
+                solved = dict(zip(unsolved,executor.map(self.Solve,unsolved.values())))
+            self.numberOfSolves += len(unsolved)
+            converged = [(key,evaluation) for key,evaluation in solved.items() if (evaluation['status'] == 'converged')]
+            self.memo.update(converged)
+            if (self.evaluationLogFileName and converged):
+                with open(self.evaluationLogFileName,'a') as evaluationLogFile:
+                    for key,evaluation in converged:
+                        evaluationLogFile.write(json.dumps(evaluation)+'\n')
+        return [self.memo[key] if (key in self.memo) else solved[key] for key in keys]
+
+    # The residuals of an evaluation, or None if its solve failed
+    def Residuals(self,evaluation):
+        if (evaluation['status'] != 'converged'):
+            return None
+        return numpy.array([(evaluation[name]-self.targets[name])/(abs(self.targets[name]) or 1.0)
+                            for name in self.targetNames])
+
+    # Fit the parameters from the initial values with Levenberg-Marquardt iterations. Each iteration evaluates the
+    # forward difference Jacobian as one batch and then the steps for a range of dampings as another, keeping the best
+    # step that reduces the cost, so an iteration takes two rounds of concurrent solves whatever the number of
+    # parameters. A step changes no parameter by more than a factor of exp(maximumLogStep). Stops once the cost is below
+    # costTolerance or the relative cost reduction or the step is below stepTolerance. A line per iteration is written
+    # to the convergence log. Returns the final parameters, evaluation and cost.
+    def Fit(self,initial={},maximumIterations=50,costTolerance=1e-10,stepTolerance=1e-8,differenceStep=1e-4,
+            maximumLogStep=1.0,logFileName=None):
+        startTime = time.time()
+        values = [initial.get(name,self.baseParameters[name]) for name in self.parameterNames]
+        for name,value in zip(self.parameterNames,values):
+            if (value <= 0.0):
+                raise ValueError('The initial %s must be positive, not %g' % (name,value))
+        x = numpy.log(values)
+        evaluation = self.Evaluate([self.Point(x)])[0]
+        residuals = self.Residuals(evaluation)
+        if residuals is None:
+            raise RuntimeError('The solve at the initial parameters %s' % evaluation['status'])
+        cost = 0.5*float(residuals.dot(residuals))
+        damping = 1e-2
+        dampingFactors = [0.1,1.0,10.0]
+        logFile = open(logFileName,'w') if logFileName else None
+        writer = csv.writer(logFile) if logFile else None
+        if writer:
+            writer.writerow(logNames+self.parameterNames)
+
+        def Log(iteration,stepNorm):
+            row = [iteration,self.numberOfSolves,self.numberOfMemoised,cost,damping,stepNorm,
+                   evaluation['tipDeflection'],evaluation['curvature'],time.time()-startTime]
+            print('Iteration %d: cost %g, %s' % (iteration,cost,', '.join('%s %g' % (name,value) for name,value in
+                                                                          zip(self.parameterNames,numpy.exp(x)))))
+            sys.stdout.flush()
+            if writer:
+                writer.writerow(row+list(numpy.exp(x)))
+                logFile.flush()
+
+        Log(0,0.0)
+        try:
+            for iteration in range(1,maximumIterations+1):
+                if (cost <= costTolerance):
+                    break
+                # Forward difference Jacobian of the residuals
+                differencePoints = [self.Point(x+differenceStep*direction) for direction in numpy.eye(len(x))]
+                differenceResiduals = [self.Residuals(differenceEvaluation)
+                                       for differenceEvaluation in self.Evaluate(differencePoints)]
+                if any(differenceResidual is None for differenceResidual in differenceResiduals):
+                    raise RuntimeError('A finite difference solve failed at iteration %d' % iteration)
+                jacobian = numpy.column_stack([(differenceResidual-residuals)/differenceStep
+                                               for differenceResidual in differenceResiduals])
+                # Try the steps of several dampings at once, increasing the damping until one of them reduces the cost
+                accepted = False
+                while not accepted:
+                    dampings = [damping*factor for factor in dampingFactors]
+                    steps = DampedSteps(jacobian,residuals,dampings,maximumLogStep)
+                    trialEvaluations = self.Evaluate([self.Point(x+step) for step in steps])
+                    trialCosts = []
+                    for trialEvaluation in trialEvaluations:
+                        trialResiduals = self.Residuals(trialEvaluation)
+                        trialCosts.append(0.5*float(trialResiduals.dot(trialResiduals)) if trialResiduals is not None
+                                          else math.inf)
+                    bestIdx = int(numpy.argmin(trialCosts))
+                    if (trialCosts[bestIdx] < cost):
+                        accepted = True
+                    else:
+                        damping *= dampingFactors[-1]**2
+                        if (damping > 1e12):
+                            break
+                if not accepted:
+                    Log(iteration,0.0)
+                    break
+                step = steps[bestIdx]
+                costReduction = (cost-trialCosts[bestIdx])/max(cost,1e-300)
+                x = x+step
+                evaluation = trialEvaluations[bestIdx]
+                residuals = self.Residuals(evaluation)
+                cost = trialCosts[bestIdx]
+                damping = dampings[bestIdx]
+                stepNorm = float(numpy.linalg.norm(step))
+                Log(iteration,stepNorm)
+                if (stepNorm <= stepTolerance or costReduction <= stepTolerance):
+                    break
+        finally:
+            if logFile:
+                logFile.close()
+        return {'parameters':dict((name,float(value)) for name,value in zip(self.parameterNames,numpy.exp(x))),
+                'evaluation':evaluation,'cost':cost,'solves':self.numberOfSolves,'memoised':self.numberOfMemoised}
+
+    def Close(self):
+        self.pool.Close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calibrate the cantilever growth rates to a measured deformation.')
+    parser.add_argument('--tip-deflection',type=float,default=None,help='target tip deflection')
+    parser.add_argument('--curvature',type=float,default=None,help='target curvature')
+    parser.add_argument('--curvature-metric',default='curvatureMean',
+                        choices=['curvatureMean','curvatureMax','curvatureRoot'],help='the curvature that is targeted')
+    parser.add_argument('--parameters',nargs='+',default=defaultParameterNames,
+                        help='parameters to calibrate, of '+', '.join(calibratableParameters))
+    parser.add_argument('--initial',nargs='+',type=float,default=None,
+                        help='initial values of the parameters (default the default parameters)')
+    parser.add_argument('-n','--workers',type=int,default=None,help='number of worker processes')
+    parser.add_argument('--timeout',type=float,default=None,help='maximum time in seconds for one solve')
+    parser.add_argument('--iterations',type=int,default=50,help='maximum number of iterations')
+    parser.add_argument('--tolerance',type=float,default=1e-10,help='cost to stop at')
+    parser.add_argument('--log',default='calibration_log.csv',help='convergence log CSV file')
+    parser.add_argument('--evaluations',default='calibration_evaluations.jsonl',
+                        help='memo of evaluations, read back to resume a fit')
+    arguments = parser.parse_args()
+
+    targets = {}
+    if arguments.tip_deflection is not None:
+        targets['tipDeflection'] = arguments.tip_deflection
+    if arguments.curvature is not None:
+        targets['curvature'] = arguments.curvature
+    initial = dict(zip(arguments.parameters,arguments.initial)) if arguments.initial else {}
+    calibration = Calibration(targets,arguments.parameters,curvatureMetric=arguments.curvature_metric,
+                              numberOfWorkers=arguments.workers,timeout=arguments.timeout,
+                              evaluationLogFileName=arguments.evaluations)
+    try:
+        fit = calibration.Fit(initial,arguments.iterations,arguments.tolerance,logFileName=arguments.log)
+    finally:
+        calibration.Close()
+    print('Calibrated %s' % ', '.join('%s = %.8g' % (name,value) for name,value in fit['parameters'].items()))
+    print('Tip deflection %g, curvature %g, cost %g after %d solves (%d memoised)' %
+          (fit['evaluation']['tipDeflection'],fit['evaluation']['curvature'],fit['cost'],fit['solves'],
+           fit['memoised']))
@@ -43,48 +43,24 @@
 
 #> Main script
 # Add Python bindings directory to PATH
-import sys, os
+import argparse, sys, os, time
 
-# Intialise OpenCMISS
-from opencmiss.iron import iron
-
-CONSTANT_LAGRANGE = 0
-LINEAR_LAGRANGE = 1
-QUADRATIC_LAGRANGE = 2
-CUBIC_LAGRANGE = 3
-
-# Set the physical size of the cantilever
-width = 10.0
-length = 30.0
-height = 10.0
-
-# Set the number of elements in the cantilever
-numberOfGlobalXElements = 1
-numberOfGlobalYElements = 1
-numberOfGlobalZElements = 3
-
-# Set the interpolation
-uInterpolation = QUADRATIC_LAGRANGE
-pInterpolation = LINEAR_LAGRANGE
-
-# Set the growth rates
-fibreRate = 0.001 #Or x direction growth
-sheetRate = 0.1 #Or y direction growth
-normalRate = 0.05 #Or z direction growth
-
-# Set the similation times.
-startTime = 0.0
-stopTime = 3.0
-timeIncrement = 1.0
+import numpy
 
-# materials parameters
-c1 = 2.0
-c2 = 6.0
+import newton_monitor
 
-force = -0.3
+# Intialise OpenCMISS
+from opencmiss.iron import iron
 
-pInit = -6.0
-pRef = 0.0
+import boundary_conditions
+# The parameter constants, defaults and CantileverParameters are part of this module's interface
+from cantilever_parameters import *
+import checkpoint
+import exfile
+import field_values
+import instrumentation
+import parallel
+import results_store
 
 # Set the user numbers
 coordinateSystemUserNumber = 1
@@ -109,420 +85,1211 @@ constituativeCellMLParametersFieldUserNumber = 10
 constituativeCellMLIntermediateFieldUserNumber = 11
 problemUserNumber = 1
 
-numberOfDimensions = 3
-
-if (uInterpolation == LINEAR_LAGRANGE):
-    numberOfNodesXi = 2
-    numberOfGaussXi = 2
-elif (uInterpolation == QUADRATIC_LAGRANGE):
-    numberOfNodesXi = 3
-    numberOfGaussXi = 3
-elif (uInterpolation == CUBIC_LAGRANGE):
-    numberOfNodesXi = 4
-    numberOfGaussXi = 3
-else:
-    print('Invalid u interpolation')
-    exit()
-
-numberOfXNodes = numberOfGlobalXElements*(numberOfNodesXi-1)+1
-numberOfYNodes = numberOfGlobalYElements*(numberOfNodesXi-1)+1
-numberOfZNodes = numberOfGlobalZElements*(numberOfNodesXi-1)+1
-numberOfNodes = numberOfXNodes*numberOfYNodes*numberOfZNodes
-
-#iron.DiagnosticsSetOn(iron.DiagnosticTypes.FROM,[1,2,3,4,5],"diagnostics",["FiniteElasticity_FiniteElementResidualEvaluate"])
-
-# Get the number of computational nodes and this computational node number
-computationEnvironment = iron.ComputationEnvironment()
-numberOfComputationalNodes = computationEnvironment.NumberOfWorldNodesGet()
-computationalNodeNumber = computationEnvironment.WorldNodeNumberGet()
-
-# Create a 3D rectangular cartesian coordinate system
-coordinateSystem = iron.CoordinateSystem()
-coordinateSystem.CreateStart(coordinateSystemUserNumber)
-coordinateSystem.DimensionSet(numberOfDimensions)
-coordinateSystem.CreateFinish()
-
-# Create a region and assign the coordinate system to the region
-region = iron.Region()
-region.CreateStart(regionUserNumber,iron.WorldRegion)
-region.LabelSet("Region")
-region.CoordinateSystemSet(coordinateSystem)
-region.CreateFinish()
-
-# Define basis functions
-
-uBasis = iron.Basis()
-uBasis.CreateStart(uBasisUserNumber)
-uBasis.NumberOfXiSet(numberOfDimensions)
-uBasis.TypeSet(iron.BasisTypes.LAGRANGE_HERMITE_TP)
-if (uInterpolation == LINEAR_LAGRANGE):
-    uBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.LINEAR_LAGRANGE]*numberOfDimensions)
-elif (uInterpolation == QUADRATIC_LAGRANGE):
-    uBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.QUADRATIC_LAGRANGE]*numberOfDimensions)
-elif (uInterpolation == CUBIC_LAGRANGE):
-    uBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.CUBIC_LAGRANGE]*numberOfDimensions)
-else:
-    print('Invalid u interpolation')
-    exit()
-uBasis.QuadratureNumberOfGaussXiSet([numberOfGaussXi]*numberOfDimensions)
-uBasis.CreateFinish()
-
-if (pInterpolation > CONSTANT_LAGRANGE):
-    pBasis = iron.Basis()
-    pBasis.CreateStart(pBasisUserNumber)
-    pBasis.NumberOfXiSet(numberOfDimensions)
-    pBasis.TypeSet(iron.BasisTypes.LAGRANGE_HERMITE_TP)
-    if (pInterpolation == LINEAR_LAGRANGE):
-        pBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.LINEAR_LAGRANGE]*numberOfDimensions)
-    elif (pInterpolation == QUADRATIC_LAGRANGE):
-        pBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.QUADRATIC_LAGRANGE]*numberOfDimensions)
-    else:
-        print('Invalid p interpolation')
-        exit()
-    pBasis.QuadratureNumberOfGaussXiSet([numberOfGaussXi]*numberOfDimensions)
-    pBasis.CreateFinish()
-
-# Start the creation of a generated mesh in the region
-generatedMesh = iron.GeneratedMesh()
-generatedMesh.CreateStart(generatedMeshUserNumber,region)
-generatedMesh.TypeSet(iron.GeneratedMeshTypes.REGULAR)
-if (pInterpolation == CONSTANT_LAGRANGE):
-    generatedMesh.BasisSet([uBasis])
-else:
-    generatedMesh.BasisSet([uBasis,pBasis])
-generatedMesh.ExtentSet([width,height,length])
-generatedMesh.NumberOfElementsSet([numberOfGlobalXElements,numberOfGlobalYElements,numberOfGlobalZElements])
-# Finish the creation of a generated mesh in the region
-mesh = iron.Mesh()
-generatedMesh.CreateFinish(meshUserNumber,mesh)
-
-# Create a decomposition for the mesh
-decomposition = iron.Decomposition()
-decomposition.CreateStart(decompositionUserNumber,mesh)
-decomposition.TypeSet(iron.DecompositionTypes.CALCULATED)
-decomposition.NumberOfDomainsSet(numberOfComputationalNodes)
-decomposition.CreateFinish()
-
-# Create a field for the geometry
-geometricField = iron.Field()
-geometricField.CreateStart(geometricFieldUserNumber,region)
-geometricField.MeshDecompositionSet(decomposition)
-geometricField.TypeSet(iron.FieldTypes.GEOMETRIC)
-geometricField.VariableLabelSet(iron.FieldVariableTypes.U,"Geometry")
-geometricField.ComponentMeshComponentSet(iron.FieldVariableTypes.U,1,1)
-geometricField.ComponentMeshComponentSet(iron.FieldVariableTypes.U,2,1)
-geometricField.ComponentMeshComponentSet(iron.FieldVariableTypes.U,3,1)
-geometricField.ScalingTypeSet(iron.FieldScalingTypes.ARITHMETIC_MEAN)
-geometricField.CreateFinish()
-
-# Update the geometric field parameters from generated mesh
-generatedMesh.GeometricParametersCalculate(geometricField)
-
-# Create a fibre field and attach it to the geometric field
-fibreField = iron.Field()
-fibreField.CreateStart(fibreFieldUserNumber,region)
-fibreField.TypeSet(iron.FieldTypes.FIBRE)
-fibreField.MeshDecompositionSet(decomposition)
-fibreField.GeometricFieldSet(geometricField)
-fibreField.VariableLabelSet(iron.FieldVariableTypes.U,"Fibre")
-fibreField.ScalingTypeSet(iron.FieldScalingTypes.ARITHMETIC_MEAN)
-fibreField.CreateFinish()
-
-# Create the dependent field
-dependentField = iron.Field()
-dependentField.CreateStart(dependentFieldUserNumber,region)
-dependentField.TypeSet(iron.FieldTypes.GEOMETRIC_GENERAL)  
-dependentField.MeshDecompositionSet(decomposition)
-dependentField.GeometricFieldSet(geometricField) 
-dependentField.DependentTypeSet(iron.FieldDependentTypes.DEPENDENT) 
-# Set the field to have 5 variables: U - dependent; del U/del n - tractions; U1 - strain; U2 - stress; U3 - growth
-dependentField.NumberOfVariablesSet(5)
-dependentField.VariableTypesSet([iron.FieldVariableTypes.U,iron.FieldVariableTypes.DELUDELN,iron.FieldVariableTypes.U1,iron.FieldVariableTypes.U2,iron.FieldVariableTypes.U3])
-dependentField.VariableLabelSet(iron.FieldVariableTypes.U,"Displacement")
-dependentField.VariableLabelSet(iron.FieldVariableTypes.DELUDELN,"Traction")
-dependentField.VariableLabelSet(iron.FieldVariableTypes.U1,"Strain")
-dependentField.VariableLabelSet(iron.FieldVariableTypes.U2,"Stress")
-dependentField.VariableLabelSet(iron.FieldVariableTypes.U3,"Growth")
-dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U,4)
-dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.DELUDELN,4)
-dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U1,6)
-dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U2,6)
-dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U3,3)
-if (pInterpolation == CONSTANT_LAGRANGE):
-    dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U,4,iron.FieldInterpolationTypes.ELEMENT_BASED)
-    dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.DELUDELN,4,iron.FieldInterpolationTypes.ELEMENT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,1,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,2,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,3,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,4,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,5,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,6,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,1,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,2,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,3,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,4,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,5,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,6,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U3,1,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U3,2,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U3,3,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
-dependentField.ScalingTypeSet(iron.FieldScalingTypes.ARITHMETIC_MEAN)
-dependentField.CreateFinish()
-
-# Initialise dependent field from undeformed geometry
-iron.Field.ParametersToFieldParametersComponentCopy(
-    geometricField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,1,
-    dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,1)
-iron.Field.ParametersToFieldParametersComponentCopy(
-    geometricField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,2,
-    dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,2)
-iron.Field.ParametersToFieldParametersComponentCopy(
-    geometricField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,3,
-    dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,3)
-# Initialise the hydrostatic pressure
-iron.Field.ComponentValuesInitialiseDP(
-    dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,4,pInit)
-
-# Update the dependent field
-dependentField.ParameterSetUpdateStart(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
-dependentField.ParameterSetUpdateFinish(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
-
-# Create the equations_set
-equationsSetField = iron.Field()
-equationsSet = iron.EquationsSet()
-equationsSetSpecification = [iron.EquationsSetClasses.ELASTICITY,
-    iron.EquationsSetTypes.FINITE_ELASTICITY,
-    iron.EquationsSetSubtypes.CONSTIT_AND_GROWTH_LAW_IN_CELLML]
-equationsSet.CreateStart(equationsSetUserNumber,region,fibreField,
-                         equationsSetSpecification,equationsSetFieldUserNumber,equationsSetField)
-equationsSet.CreateFinish()
-
-equationsSet.DependentCreateStart(dependentFieldUserNumber,dependentField)
-equationsSet.DependentCreateFinish()
-
-# Create the CellML environment for the growth law. Set the rates as known so that we can spatially vary them.
-growthCellML = iron.CellML()
-growthCellML.CreateStart(growthCellMLUserNumber,region)
-growthCellMLIdx = growthCellML.ModelImport("stressgrowth.cellml")
-growthCellML.VariableSetAsKnown(growthCellMLIdx,"Main/bff")
-growthCellML.VariableSetAsKnown(growthCellMLIdx,"Main/bss")
-growthCellML.VariableSetAsKnown(growthCellMLIdx,"Main/bnn")
-growthCellML.VariableSetAsKnown(growthCellMLIdx,"Main/S11")
-growthCellML.VariableSetAsKnown(growthCellMLIdx,"Main/S22")
-growthCellML.VariableSetAsKnown(growthCellMLIdx,"Main/S33")
-growthCellML.CreateFinish()
-
-# Create CellML <--> OpenCMISS field maps. Map the lambda's to the U3/growth dependent field variable
-growthCellML.FieldMapsCreateStart()
-growthCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U2,1,iron.FieldParameterSetTypes.VALUES,
-	                            growthCellMLIdx,"Main/S11",iron.FieldParameterSetTypes.VALUES)
-growthCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U2,2,iron.FieldParameterSetTypes.VALUES,
-	                            growthCellMLIdx,"Main/S22",iron.FieldParameterSetTypes.VALUES)
-growthCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U2,3,iron.FieldParameterSetTypes.VALUES,
-	                            growthCellMLIdx,"Main/S33",iron.FieldParameterSetTypes.VALUES)
-growthCellML.CreateCellMLToFieldMap(growthCellMLIdx,"Main/lambda1",iron.FieldParameterSetTypes.VALUES,
-                                    dependentField,iron.FieldVariableTypes.U3,1,iron.FieldParameterSetTypes.VALUES)
-growthCellML.CreateCellMLToFieldMap(growthCellMLIdx,"Main/lambda2",iron.FieldParameterSetTypes.VALUES,
-                                    dependentField,iron.FieldVariableTypes.U3,2,iron.FieldParameterSetTypes.VALUES)
-growthCellML.CreateCellMLToFieldMap(growthCellMLIdx,"Main/lambda3",iron.FieldParameterSetTypes.VALUES,
-                                    dependentField,iron.FieldVariableTypes.U3,3,iron.FieldParameterSetTypes.VALUES)
-growthCellML.FieldMapsCreateFinish()
-
-# Create the CELL models field
-growthCellMLModelsField = iron.Field()
-growthCellML.ModelsFieldCreateStart(growthCellMLModelsFieldUserNumber,growthCellMLModelsField)
-growthCellMLModelsField.VariableLabelSet(iron.FieldVariableTypes.U,"GrowthModelMap")
-growthCellML.ModelsFieldCreateFinish()
-
-# Create the CELL parameters field
-growthCellMLParametersField = iron.Field()
-growthCellML.ParametersFieldCreateStart(growthCellMLParametersFieldUserNumber,growthCellMLParametersField)
-growthCellMLParametersField.VariableLabelSet(iron.FieldVariableTypes.U,"GrowthParameters")
-growthCellML.ParametersFieldCreateFinish()
-
-# Set the growth rates
-fibreRateComponentNumber = growthCellML.FieldComponentGet(growthCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"Main/bff")
-sheetRateComponentNumber = growthCellML.FieldComponentGet(growthCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"Main/bss")
-normalRateComponentNumber = growthCellML.FieldComponentGet(growthCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"Main/bnn")
-growthCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
-                                                        fibreRateComponentNumber,fibreRate)
-growthCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
-                                                        sheetRateComponentNumber,sheetRate)
-growthCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
-                                                        normalRateComponentNumber,normalRate)
-
-# Create the CELL state field
-growthCellMLStateField = iron.Field()
-growthCellML.StateFieldCreateStart(growthCellMLStateFieldUserNumber,growthCellMLStateField)
-growthCellMLStateField.VariableLabelSet(iron.FieldVariableTypes.U,"GrowthState")
-growthCellML.StateFieldCreateFinish()
-
-# Create the CellML environment for the consitutative law
-constituativeCellML = iron.CellML()
-constituativeCellML.CreateStart(constituativeCellMLUserNumber,region)
-constituativeCellMLIdx = constituativeCellML.ModelImport("mooneyrivlin.cellml")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/C11")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/C12")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/C13")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/C22")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/C23")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/C33")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/c1")
-constituativeCellML.VariableSetAsKnown(constituativeCellMLIdx,"equations/c2")
-constituativeCellML.VariableSetAsWanted(constituativeCellMLIdx,"equations/Tdev11")
-constituativeCellML.VariableSetAsWanted(constituativeCellMLIdx,"equations/Tdev12")
-constituativeCellML.VariableSetAsWanted(constituativeCellMLIdx,"equations/Tdev13")
-constituativeCellML.VariableSetAsWanted(constituativeCellMLIdx,"equations/Tdev22")
-constituativeCellML.VariableSetAsWanted(constituativeCellMLIdx,"equations/Tdev23")
-constituativeCellML.VariableSetAsWanted(constituativeCellMLIdx,"equations/Tdev33")
-constituativeCellML.CreateFinish()
-
-# Create CellML <--> OpenCMISS field maps. Map the stress and strain fields.
-constituativeCellML.FieldMapsCreateStart()
-constituativeCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U1,1,iron.FieldParameterSetTypes.VALUES,
-    constituativeCellMLIdx,"equations/C11",iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U1,2,iron.FieldParameterSetTypes.VALUES,
-    constituativeCellMLIdx,"equations/C12",iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U1,3,iron.FieldParameterSetTypes.VALUES,
-    constituativeCellMLIdx,"equations/C13",iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U1,4,iron.FieldParameterSetTypes.VALUES,
-    constituativeCellMLIdx,"equations/C22",iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U1,5,iron.FieldParameterSetTypes.VALUES,
-    constituativeCellMLIdx,"equations/C23",iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateFieldToCellMLMap(dependentField,iron.FieldVariableTypes.U1,6,iron.FieldParameterSetTypes.VALUES,
-    constituativeCellMLIdx,"equations/C33",iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateCellMLToFieldMap(constituativeCellMLIdx,"equations/Tdev11",iron.FieldParameterSetTypes.VALUES,
-    dependentField,iron.FieldVariableTypes.U2,1,iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateCellMLToFieldMap(constituativeCellMLIdx,"equations/Tdev12",iron.FieldParameterSetTypes.VALUES,
-    dependentField,iron.FieldVariableTypes.U2,2,iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateCellMLToFieldMap(constituativeCellMLIdx,"equations/Tdev13",iron.FieldParameterSetTypes.VALUES,
-    dependentField,iron.FieldVariableTypes.U2,3,iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateCellMLToFieldMap(constituativeCellMLIdx,"equations/Tdev22",iron.FieldParameterSetTypes.VALUES,
-    dependentField,iron.FieldVariableTypes.U2,4,iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateCellMLToFieldMap(constituativeCellMLIdx,"equations/Tdev23",iron.FieldParameterSetTypes.VALUES,
-    dependentField,iron.FieldVariableTypes.U2,5,iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.CreateCellMLToFieldMap(constituativeCellMLIdx,"equations/Tdev33",iron.FieldParameterSetTypes.VALUES,
-    dependentField,iron.FieldVariableTypes.U2,6,iron.FieldParameterSetTypes.VALUES)
-constituativeCellML.FieldMapsCreateFinish()
-
-# Create the CELL models field
-constituativeCellMLModelsField = iron.Field()
-constituativeCellML.ModelsFieldCreateStart(constituativeCellMLModelsFieldUserNumber,constituativeCellMLModelsField)
-constituativeCellMLModelsField.VariableLabelSet(iron.FieldVariableTypes.U,"ConstituativeModelMap")
-constituativeCellML.ModelsFieldCreateFinish()
-
-# Create the CELL parameters field
-constituativeCellMLParametersField = iron.Field()
-constituativeCellML.ParametersFieldCreateStart(constituativeCellMLParametersFieldUserNumber,constituativeCellMLParametersField)
-constituativeCellMLParametersField.VariableLabelSet(iron.FieldVariableTypes.U,"ConstituativeParameters")
-constituativeCellML.ParametersFieldCreateFinish()
-
-# Set up the materials constants
-c1ComponentNumber = constituativeCellML.FieldComponentGet(constituativeCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"equations/c1")
-c2ComponentNumber = constituativeCellML.FieldComponentGet(constituativeCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"equations/c2")
-constituativeCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
-                                                               c1ComponentNumber,c1)
-constituativeCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
-                                                               c2ComponentNumber,c2)
-
-# Create the CELL intermediate field
-constituativeCellMLIntermediateField = iron.Field()
-constituativeCellML.IntermediateFieldCreateStart(constituativeCellMLIntermediateFieldUserNumber,constituativeCellMLIntermediateField)
-constituativeCellMLIntermediateField.VariableLabelSet(iron.FieldVariableTypes.U,"ConstituativeIntermediate")
-constituativeCellML.IntermediateFieldCreateFinish()
-
-# Create equations
-equations = iron.Equations()
-equationsSet.EquationsCreateStart(equations)
-equations.sparsityType = iron.EquationsSparsityTypes.SPARSE
-equations.outputType = iron.EquationsOutputTypes.NONE
-equationsSet.EquationsCreateFinish()
-
-# Define the problem
-problem = iron.Problem()
-problemSpecification = [iron.ProblemClasses.ELASTICITY,
-        iron.ProblemTypes.FINITE_ELASTICITY,
-        iron.ProblemSubtypes.FINITE_ELASTICITY_WITH_GROWTH_CELLML]
-problem.CreateStart(problemUserNumber,problemSpecification)
-problem.CreateFinish()
-
-# Create control loops
-timeLoop = iron.ControlLoop()
-problem.ControlLoopCreateStart()
-problem.ControlLoopGet([iron.ControlLoopIdentifiers.NODE],timeLoop)
-timeLoop.TimesSet(startTime,stopTime,timeIncrement)
-problem.ControlLoopCreateFinish()
-
-# Create problem solvers
-odeIntegrationSolver = iron.Solver()
-nonlinearSolver = iron.Solver()
-linearSolver = iron.Solver()
-cellMLEvaluationSolver = iron.Solver()
-problem.SolversCreateStart()
-problem.SolverGet([iron.ControlLoopIdentifiers.NODE],1,odeIntegrationSolver)
-problem.SolverGet([iron.ControlLoopIdentifiers.NODE],2,nonlinearSolver)
-nonlinearSolver.outputType = iron.SolverOutputTypes.MONITOR
-nonlinearSolver.NewtonJacobianCalculationTypeSet(iron.JacobianCalculationTypes.FD)
-nonlinearSolver.NewtonAbsoluteToleranceSet(1e-11)
-nonlinearSolver.NewtonSolutionToleranceSet(1e-11)
-nonlinearSolver.NewtonRelativeToleranceSet(1e-11)
-nonlinearSolver.NewtonCellMLSolverGet(cellMLEvaluationSolver)
-nonlinearSolver.NewtonLinearSolverGet(linearSolver)
-linearSolver.linearType = iron.LinearSolverTypes.DIRECT
-problem.SolversCreateFinish()
-
-# Create nonlinear equations and add equations set to solver equations
-nonlinearEquations = iron.SolverEquations()
-problem.SolverEquationsCreateStart()
-nonlinearSolver.SolverEquationsGet(nonlinearEquations)
-nonlinearEquations.sparsityType = iron.SolverEquationsSparsityTypes.SPARSE
-nonlinearEquationsSetIndex = nonlinearEquations.EquationsSetAdd(equationsSet)
-problem.SolverEquationsCreateFinish()
-
-# Create CellML equations and add growth and constituative equations to the solvers
-growthEquations = iron.CellMLEquations()
-constituativeEquations = iron.CellMLEquations()
-problem.CellMLEquationsCreateStart()
-odeIntegrationSolver.CellMLEquationsGet(growthEquations)
-growthEquationsIndex = growthEquations.CellMLAdd(growthCellML)
-cellMLEvaluationSolver.CellMLEquationsGet(constituativeEquations)
-constituativeEquationsIndex = constituativeEquations.CellMLAdd(constituativeCellML)
-problem.CellMLEquationsCreateFinish()
-
-# Prescribe boundary conditions (absolute nodal parameters)
-boundaryConditions = iron.BoundaryConditions()
-nonlinearEquations.BoundaryConditionsCreateStart(boundaryConditions)
-
-for widthNodeIdx in range(1,numberOfXNodes+1):
-    for heightNodeIdx in range(1,numberOfYNodes+1):
-        # Set left hand build in nodes ot no displacement
-        nodeIdx=widthNodeIdx+(heightNodeIdx-1)*numberOfXNodes
-        boundaryConditions.AddNode(dependentField,iron.FieldVariableTypes.U,1,1,nodeIdx,1,
-                                   iron.BoundaryConditionsTypes.FIXED,0.0)
-        boundaryConditions.AddNode(dependentField,iron.FieldVariableTypes.U,1,1,nodeIdx,2,
-                                   iron.BoundaryConditionsTypes.FIXED,0.0)
-        boundaryConditions.AddNode(dependentField,iron.FieldVariableTypes.U,1,1,nodeIdx,3,
-                                   iron.BoundaryConditionsTypes.FIXED,0.0)
-    # Set downward force on right-hand edge
-    nodeIdx=numberOfNodes-widthNodeIdx+1
-    boundaryConditions.AddNode(dependentField,iron.FieldVariableTypes.DELUDELN,1,1,nodeIdx,2,
-                               iron.BoundaryConditionsTypes.NEUMANN_POINT,force)
-# Set reference pressure
-boundaryConditions.AddNode(dependentField,iron.FieldVariableTypes.U,1,1,numberOfNodes,4,
-                           iron.BoundaryConditionsTypes.FIXED,pRef)
- 
-nonlinearEquations.BoundaryConditionsCreateFinish()
-
-# Solve the problem
-problem.Solve()
-
-if not os.path.exists("./results"):
-    os.makedirs("./results")
-
-# Export results
-fields = iron.Fields()
-fields.CreateRegion(region)
-fields.NodesExport("./results/CantileverGrowth","FORTRAN")
-fields.ElementsExport("./results/CantileverGrowth","FORTRAN")
-fields.Finalise()
+# The parameter sets looked for when measuring the memory of the fields
+memoryParameterSetNames = ['VALUES','INITIAL_VALUES','INCREMENTAL_VALUES','PREVIOUS_VALUES','RESIDUAL',
+                           'PREVIOUS_RESIDUAL']
+
+# A cantilever growth model. Build creates the mesh, fields, CellML environments, problem and boundary conditions once.
+# Update then changes the growth rates, materials, load, initial pressure or time range in the existing objects so that
+# Solve can be called again without paying for the setup. As the iron user numbers are fixed only one model can be built
+# in a process at a time, call Destroy before building another. If an instrumentation.Trace is given every build phase,
+# update, time step and export is recorded in it together with the Newton residual history, linear solve times and
+# CellML evaluation counts of each step.
+class CantileverGrowthModel(object):
+
+    # The parameters that can be changed on a built model, from cantilever_parameters
+    updatableParameters = updatableParameters
+
+    def __init__(self,parameters={},trace=None):
+        self.parameters = CantileverParameters(parameters)
+        self.timings = {}
+        self.built = False
+        self.instrumented = trace is not None
+        self.trace = trace if self.instrumented else instrumentation.NullTrace()
+        self.stepStatistics = []
+        self.stepNumber = 0
+        self.growthRateDistribution = None
+        self.materialDistribution = None
+        self.initialGuess = None
+
+    # Run a build phase and record how long it took
+    def TimePhase(self,phaseName,phaseMethod):
+        with self.trace.Phase(phaseName) as phase:
+            phaseMethod()
+        self.timings[phaseName] = phase.duration
+
+    # Set up everything needed to solve the model
+    def Build(self):
+        with self.trace.Phase('build') as phase:
+            self.TimePhase('mesh',self.BuildMesh)
+            self.TimePhase('fields',self.BuildFields)
+            self.TimePhase('cellml',self.BuildCellML)
+            self.TimePhase('problem',self.BuildProblem)
+            self.TimePhase('boundaryConditions',self.BuildBoundaryConditions)
+            if (self.parameters['memoryMode'] == LEAN_MEMORY):
+                self.ReleaseMeshArrays()
+            phase.Arguments(numberOfElements=self.numberOfElements,numberOfNodes=self.numberOfNodes,
+                            numberOfDofs=self.numberOfDofs)
+        self.timings['build'] = phase.duration
+        self.trace.Flush()
+        self.built = True
+        return self
+
+    # Create the coordinate system, region, bases, generated mesh and decomposition
+    def BuildMesh(self):
+        width = self.parameters['width']
+        length = self.parameters['length']
+        height = self.parameters['height']
+        numberOfGlobalXElements = self.parameters['numberOfGlobalXElements']
+        numberOfGlobalYElements = self.parameters['numberOfGlobalYElements']
+        numberOfGlobalZElements = self.parameters['numberOfGlobalZElements']
+        uInterpolation = self.parameters['uInterpolation']
+        pInterpolation = self.parameters['pInterpolation']
+
+        self.numberOfDimensions = 3
+
+        if (uInterpolation == LINEAR_LAGRANGE):
+            self.numberOfNodesXi = 2
+            self.numberOfGaussXi = 2
+        elif (uInterpolation == QUADRATIC_LAGRANGE):
+            self.numberOfNodesXi = 3
+            self.numberOfGaussXi = 3
+        elif (uInterpolation == CUBIC_LAGRANGE):
+            self.numberOfNodesXi = 4
+            self.numberOfGaussXi = 3
+        else:
+            raise ValueError('Invalid u interpolation')
+
+        self.numberOfXNodes = numberOfGlobalXElements*(self.numberOfNodesXi-1)+1
+        self.numberOfYNodes = numberOfGlobalYElements*(self.numberOfNodesXi-1)+1
+        self.numberOfZNodes = numberOfGlobalZElements*(self.numberOfNodesXi-1)+1
+        self.numberOfNodes = self.numberOfXNodes*self.numberOfYNodes*self.numberOfZNodes
+        self.numberOfElements = numberOfGlobalXElements*numberOfGlobalYElements*numberOfGlobalZElements
+        self.numberOfGaussPoints = self.numberOfGaussXi**self.numberOfDimensions
+        self.elementNumbers = numpy.arange(1,self.numberOfElements+1)
+
+        self.numberOfDofs = self.NumberOfDofs()
+
+        #iron.DiagnosticsSetOn(iron.DiagnosticTypes.FROM,[1,2,3,4,5],"diagnostics",["FiniteElasticity_FiniteElementResidualEvaluate"])
+
+        # Get the number of computational nodes and this computational node number
+        self.computationEnvironment = iron.ComputationEnvironment()
+        self.numberOfComputationalNodes = self.computationEnvironment.NumberOfWorldNodesGet()
+        self.computationalNodeNumber = self.computationEnvironment.WorldNodeNumberGet()
+        self.trace.processNumber = self.computationalNodeNumber
+
+        # Create a 3D rectangular cartesian coordinate system
+        self.coordinateSystem = iron.CoordinateSystem()
+        self.coordinateSystem.CreateStart(coordinateSystemUserNumber)
+        self.coordinateSystem.DimensionSet(self.numberOfDimensions)
+        self.coordinateSystem.CreateFinish()
+
+        # Create a region and assign the coordinate system to the region
+        self.region = iron.Region()
+        self.region.CreateStart(regionUserNumber,iron.WorldRegion)
+        self.region.LabelSet("Region")
+        self.region.CoordinateSystemSet(self.coordinateSystem)
+        self.region.CreateFinish()
+
+        # Define basis functions
+
+        self.uBasis = iron.Basis()
+        self.uBasis.CreateStart(uBasisUserNumber)
+        self.uBasis.NumberOfXiSet(self.numberOfDimensions)
+        self.uBasis.TypeSet(iron.BasisTypes.LAGRANGE_HERMITE_TP)
+        if (uInterpolation == LINEAR_LAGRANGE):
+            self.uBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.LINEAR_LAGRANGE]*self.numberOfDimensions)
+        elif (uInterpolation == QUADRATIC_LAGRANGE):
+            self.uBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.QUADRATIC_LAGRANGE]*self.numberOfDimensions)
+        elif (uInterpolation == CUBIC_LAGRANGE):
+            self.uBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.CUBIC_LAGRANGE]*self.numberOfDimensions)
+        else:
+            raise ValueError('Invalid u interpolation')
+        self.uBasis.QuadratureNumberOfGaussXiSet([self.numberOfGaussXi]*self.numberOfDimensions)
+        self.uBasis.CreateFinish()
+
+        if (pInterpolation > CONSTANT_LAGRANGE):
+            self.pBasis = iron.Basis()
+            self.pBasis.CreateStart(pBasisUserNumber)
+            self.pBasis.NumberOfXiSet(self.numberOfDimensions)
+            self.pBasis.TypeSet(iron.BasisTypes.LAGRANGE_HERMITE_TP)
+            if (pInterpolation == LINEAR_LAGRANGE):
+                self.pBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.LINEAR_LAGRANGE]*self.numberOfDimensions)
+            elif (pInterpolation == QUADRATIC_LAGRANGE):
+                self.pBasis.InterpolationXiSet([iron.BasisInterpolationSpecifications.QUADRATIC_LAGRANGE]*self.numberOfDimensions)
+            else:
+                raise ValueError('Invalid p interpolation')
+            self.pBasis.QuadratureNumberOfGaussXiSet([self.numberOfGaussXi]*self.numberOfDimensions)
+            self.pBasis.CreateFinish()
+
+        # Start the creation of a generated mesh in the region
+        self.generatedMesh = iron.GeneratedMesh()
+        self.generatedMesh.CreateStart(generatedMeshUserNumber,self.region)
+        self.generatedMesh.TypeSet(iron.GeneratedMeshTypes.REGULAR)
+        if (pInterpolation == CONSTANT_LAGRANGE):
+            self.generatedMesh.BasisSet([self.uBasis])
+        else:
+            self.generatedMesh.BasisSet([self.uBasis,self.pBasis])
+        self.generatedMesh.ExtentSet([width,height,length])
+        self.generatedMesh.NumberOfElementsSet([numberOfGlobalXElements,numberOfGlobalYElements,numberOfGlobalZElements])
+        # Finish the creation of a generated mesh in the region
+        self.mesh = iron.Mesh()
+        self.generatedMesh.CreateFinish(meshUserNumber,self.mesh)
+
+        # Create a decomposition for the mesh
+        self.decomposition = iron.Decomposition()
+        self.decomposition.CreateStart(decompositionUserNumber,self.mesh)
+        self.decomposition.TypeSet(iron.DecompositionTypes.CALCULATED)
+        self.decomposition.NumberOfDomainsSet(self.numberOfComputationalNodes)
+        self.decomposition.CreateFinish()
+
+        # Find the nodes and elements in the domain of this computational node. Field values are only read and set, and
+        # boundary conditions only added, for these.
+        self.nodeNumbers = numpy.arange(1,self.numberOfNodes+1)
+        if (self.numberOfComputationalNodes == 1):
+            self.localNodes = self.nodeNumbers
+            self.localElements = self.elementNumbers
+        else:
+            self.localNodes = boundary_conditions.DomainNodes(self.decomposition,self.nodeNumbers,
+                                                              self.computationalNodeNumber)
+            self.localElements = boundary_conditions.DomainElements(self.decomposition,self.elementNumbers,
+                                                                    self.computationalNodeNumber)
+
+    # Create the geometric, fibre and dependent fields and the equations set
+    def BuildFields(self):
+        pInterpolation = self.parameters['pInterpolation']
+
+        # Create a field for the geometry
+        self.geometricField = iron.Field()
+        self.geometricField.CreateStart(geometricFieldUserNumber,self.region)
+        self.geometricField.MeshDecompositionSet(self.decomposition)
+        self.geometricField.TypeSet(iron.FieldTypes.GEOMETRIC)
+        self.geometricField.VariableLabelSet(iron.FieldVariableTypes.U,"Geometry")
+        self.geometricField.ComponentMeshComponentSet(iron.FieldVariableTypes.U,1,1)
+        self.geometricField.ComponentMeshComponentSet(iron.FieldVariableTypes.U,2,1)
+        self.geometricField.ComponentMeshComponentSet(iron.FieldVariableTypes.U,3,1)
+        self.geometricField.ScalingTypeSet(iron.FieldScalingTypes.ARITHMETIC_MEAN)
+        self.geometricField.CreateFinish()
+
+        # Update the geometric field parameters from generated mesh
+        self.generatedMesh.GeometricParametersCalculate(self.geometricField)
+
+        # Create a fibre field and attach it to the geometric field
+        self.fibreField = iron.Field()
+        self.fibreField.CreateStart(fibreFieldUserNumber,self.region)
+        self.fibreField.TypeSet(iron.FieldTypes.FIBRE)
+        self.fibreField.MeshDecompositionSet(self.decomposition)
+        self.fibreField.GeometricFieldSet(self.geometricField)
+        self.fibreField.VariableLabelSet(iron.FieldVariableTypes.U,"Fibre")
+        self.fibreField.ScalingTypeSet(iron.FieldScalingTypes.ARITHMETIC_MEAN)
+        self.fibreField.CreateFinish()
+
+        # Create the dependent field
+        self.dependentField = iron.Field()
+        self.dependentField.CreateStart(dependentFieldUserNumber,self.region)
+        self.dependentField.TypeSet(iron.FieldTypes.GEOMETRIC_GENERAL)  
+        self.dependentField.MeshDecompositionSet(self.decomposition)
+        self.dependentField.GeometricFieldSet(self.geometricField) 
+        self.dependentField.DependentTypeSet(iron.FieldDependentTypes.DEPENDENT) 
+        # Set the field to have 5 variables: U - dependent; del U/del n - tractions; U1 - strain; U2 - stress; U3 - growth
+        self.dependentField.NumberOfVariablesSet(5)
+        self.dependentField.VariableTypesSet([iron.FieldVariableTypes.U,iron.FieldVariableTypes.DELUDELN,iron.FieldVariableTypes.U1,iron.FieldVariableTypes.U2,iron.FieldVariableTypes.U3])
+        self.dependentField.VariableLabelSet(iron.FieldVariableTypes.U,"Displacement")
+        self.dependentField.VariableLabelSet(iron.FieldVariableTypes.DELUDELN,"Traction")
+        self.dependentField.VariableLabelSet(iron.FieldVariableTypes.U1,"Strain")
+        self.dependentField.VariableLabelSet(iron.FieldVariableTypes.U2,"Stress")
+        self.dependentField.VariableLabelSet(iron.FieldVariableTypes.U3,"Growth")
+        self.dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U,4)
+        self.dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.DELUDELN,4)
+        self.dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U1,6)
+        self.dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U2,6)
+        self.dependentField.NumberOfComponentsSet(iron.FieldVariableTypes.U3,3)
+        if (pInterpolation == CONSTANT_LAGRANGE):
+            self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U,4,iron.FieldInterpolationTypes.ELEMENT_BASED)
+            self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.DELUDELN,4,iron.FieldInterpolationTypes.ELEMENT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,1,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,2,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,3,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,4,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,5,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U1,6,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,1,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,2,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,3,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,4,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,5,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U2,6,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U3,1,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U3,2,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ComponentInterpolationSet(iron.FieldVariableTypes.U3,3,iron.FieldInterpolationTypes.GAUSS_POINT_BASED)
+        self.dependentField.ScalingTypeSet(iron.FieldScalingTypes.ARITHMETIC_MEAN)
+        self.dependentField.CreateFinish()
+
+        self.InitialiseDependentField()
+
+        # Create the equations_set
+        self.equationsSetField = iron.Field()
+        self.equationsSet = iron.EquationsSet()
+        equationsSetSpecification = [iron.EquationsSetClasses.ELASTICITY,
+            iron.EquationsSetTypes.FINITE_ELASTICITY,
+            iron.EquationsSetSubtypes.CONSTIT_AND_GROWTH_LAW_IN_CELLML]
+        self.equationsSet.CreateStart(equationsSetUserNumber,self.region,self.fibreField,
+                                      equationsSetSpecification,equationsSetFieldUserNumber,self.equationsSetField)
+        self.equationsSet.CreateFinish()
+
+        self.equationsSet.DependentCreateStart(dependentFieldUserNumber,self.dependentField)
+        self.equationsSet.DependentCreateFinish()
+
+    # Initialise the dependent field to the undeformed geometry and the initial hydrostatic pressure
+    def InitialiseDependentField(self):
+        pInit = self.parameters['pInit']
+
+        # Initialise dependent field from undeformed geometry
+        iron.Field.ParametersToFieldParametersComponentCopy(
+            self.geometricField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,1,
+            self.dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,1)
+        iron.Field.ParametersToFieldParametersComponentCopy(
+            self.geometricField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,2,
+            self.dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,2)
+        iron.Field.ParametersToFieldParametersComponentCopy(
+            self.geometricField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,3,
+            self.dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,3)
+        # Initialise the hydrostatic pressure
+        iron.Field.ComponentValuesInitialiseDP(
+            self.dependentField,iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,4,pInit)
+
+        # Update the dependent field
+        self.dependentField.ParameterSetUpdateStart(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
+        self.dependentField.ParameterSetUpdateFinish(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
+
+    # Create the CellML environments for the growth and constituative laws and their fields
+    def BuildCellML(self):
+        # Create the CellML environment for the growth law. Set the rates as known so that we can spatially vary them.
+        self.growthCellML = iron.CellML()
+        self.growthCellML.CreateStart(growthCellMLUserNumber,self.region)
+        self.growthCellMLIdx = self.growthCellML.ModelImport(os.path.join(cellMLDirectory,growthCellMLFileName))
+        self.growthCellML.VariableSetAsKnown(self.growthCellMLIdx,"Main/bff")
+        self.growthCellML.VariableSetAsKnown(self.growthCellMLIdx,"Main/bss")
+        self.growthCellML.VariableSetAsKnown(self.growthCellMLIdx,"Main/bnn")
+        self.growthCellML.VariableSetAsKnown(self.growthCellMLIdx,"Main/S11")
+        self.growthCellML.VariableSetAsKnown(self.growthCellMLIdx,"Main/S22")
+        self.growthCellML.VariableSetAsKnown(self.growthCellMLIdx,"Main/S33")
+        self.growthCellML.CreateFinish()
+
+        # Create CellML <--> OpenCMISS field maps. Map the lambda's to the U3/growth dependent field variable
+        self.growthCellML.FieldMapsCreateStart()
+        self.growthCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U2,1,iron.FieldParameterSetTypes.VALUES,
+        	                            self.growthCellMLIdx,"Main/S11",iron.FieldParameterSetTypes.VALUES)
+        self.growthCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U2,2,iron.FieldParameterSetTypes.VALUES,
+        	                            self.growthCellMLIdx,"Main/S22",iron.FieldParameterSetTypes.VALUES)
+        self.growthCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U2,3,iron.FieldParameterSetTypes.VALUES,
+        	                            self.growthCellMLIdx,"Main/S33",iron.FieldParameterSetTypes.VALUES)
+        self.growthCellML.CreateCellMLToFieldMap(self.growthCellMLIdx,"Main/lambda1",iron.FieldParameterSetTypes.VALUES,
+                                                 self.dependentField,iron.FieldVariableTypes.U3,1,iron.FieldParameterSetTypes.VALUES)
+        self.growthCellML.CreateCellMLToFieldMap(self.growthCellMLIdx,"Main/lambda2",iron.FieldParameterSetTypes.VALUES,
+                                                 self.dependentField,iron.FieldVariableTypes.U3,2,iron.FieldParameterSetTypes.VALUES)
+        self.growthCellML.CreateCellMLToFieldMap(self.growthCellMLIdx,"Main/lambda3",iron.FieldParameterSetTypes.VALUES,
+                                                 self.dependentField,iron.FieldVariableTypes.U3,3,iron.FieldParameterSetTypes.VALUES)
+        self.growthCellML.FieldMapsCreateFinish()
+
+        # Create the CELL models field
+        self.growthCellMLModelsField = iron.Field()
+        self.growthCellML.ModelsFieldCreateStart(growthCellMLModelsFieldUserNumber,self.growthCellMLModelsField)
+        self.growthCellMLModelsField.VariableLabelSet(iron.FieldVariableTypes.U,"GrowthModelMap")
+        self.growthCellML.ModelsFieldCreateFinish()
+
+        # Create the CELL parameters field
+        self.growthCellMLParametersField = iron.Field()
+        self.growthCellML.ParametersFieldCreateStart(growthCellMLParametersFieldUserNumber,self.growthCellMLParametersField)
+        self.growthCellMLParametersField.VariableLabelSet(iron.FieldVariableTypes.U,"GrowthParameters")
+        self.growthCellML.ParametersFieldCreateFinish()
+
+        # Set the growth rates
+        self.fibreRateComponentNumber = self.growthCellML.FieldComponentGet(self.growthCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"Main/bff")
+        self.sheetRateComponentNumber = self.growthCellML.FieldComponentGet(self.growthCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"Main/bss")
+        self.normalRateComponentNumber = self.growthCellML.FieldComponentGet(self.growthCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"Main/bnn")
+        self.SetGrowthRates()
+
+        # Create the CELL state field
+        self.growthCellMLStateField = iron.Field()
+        self.growthCellML.StateFieldCreateStart(growthCellMLStateFieldUserNumber,self.growthCellMLStateField)
+        self.growthCellMLStateField.VariableLabelSet(iron.FieldVariableTypes.U,"GrowthState")
+        self.growthCellML.StateFieldCreateFinish()
+        self.lambdaComponentNumbers = [self.growthCellML.FieldComponentGet(self.growthCellMLIdx,iron.CellMLFieldTypes.STATE,
+                                                                           "Main/lambda%d" % lambdaIdx)
+                                       for lambdaIdx in range(1,4)]
+
+        # Create the CellML environment for the consitutative law
+        self.constituativeCellML = iron.CellML()
+        self.constituativeCellML.CreateStart(constituativeCellMLUserNumber,self.region)
+        self.constituativeCellMLIdx = self.constituativeCellML.ModelImport(os.path.join(cellMLDirectory,constituativeCellMLFileName))
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/C11")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/C12")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/C13")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/C22")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/C23")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/C33")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/c1")
+        self.constituativeCellML.VariableSetAsKnown(self.constituativeCellMLIdx,"equations/c2")
+        self.constituativeCellML.VariableSetAsWanted(self.constituativeCellMLIdx,"equations/Tdev11")
+        self.constituativeCellML.VariableSetAsWanted(self.constituativeCellMLIdx,"equations/Tdev12")
+        self.constituativeCellML.VariableSetAsWanted(self.constituativeCellMLIdx,"equations/Tdev13")
+        self.constituativeCellML.VariableSetAsWanted(self.constituativeCellMLIdx,"equations/Tdev22")
+        self.constituativeCellML.VariableSetAsWanted(self.constituativeCellMLIdx,"equations/Tdev23")
+        self.constituativeCellML.VariableSetAsWanted(self.constituativeCellMLIdx,"equations/Tdev33")
+        self.constituativeCellML.CreateFinish()
+
+        # Create CellML <--> OpenCMISS field maps. Map the stress and strain fields.
+        self.constituativeCellML.FieldMapsCreateStart()
+        self.constituativeCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U1,1,iron.FieldParameterSetTypes.VALUES,
+            self.constituativeCellMLIdx,"equations/C11",iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U1,2,iron.FieldParameterSetTypes.VALUES,
+            self.constituativeCellMLIdx,"equations/C12",iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U1,3,iron.FieldParameterSetTypes.VALUES,
+            self.constituativeCellMLIdx,"equations/C13",iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U1,4,iron.FieldParameterSetTypes.VALUES,
+            self.constituativeCellMLIdx,"equations/C22",iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U1,5,iron.FieldParameterSetTypes.VALUES,
+            self.constituativeCellMLIdx,"equations/C23",iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateFieldToCellMLMap(self.dependentField,iron.FieldVariableTypes.U1,6,iron.FieldParameterSetTypes.VALUES,
+            self.constituativeCellMLIdx,"equations/C33",iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateCellMLToFieldMap(self.constituativeCellMLIdx,"equations/Tdev11",iron.FieldParameterSetTypes.VALUES,
+            self.dependentField,iron.FieldVariableTypes.U2,1,iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateCellMLToFieldMap(self.constituativeCellMLIdx,"equations/Tdev12",iron.FieldParameterSetTypes.VALUES,
+            self.dependentField,iron.FieldVariableTypes.U2,2,iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateCellMLToFieldMap(self.constituativeCellMLIdx,"equations/Tdev13",iron.FieldParameterSetTypes.VALUES,
+            self.dependentField,iron.FieldVariableTypes.U2,3,iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateCellMLToFieldMap(self.constituativeCellMLIdx,"equations/Tdev22",iron.FieldParameterSetTypes.VALUES,
+            self.dependentField,iron.FieldVariableTypes.U2,4,iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateCellMLToFieldMap(self.constituativeCellMLIdx,"equations/Tdev23",iron.FieldParameterSetTypes.VALUES,
+            self.dependentField,iron.FieldVariableTypes.U2,5,iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.CreateCellMLToFieldMap(self.constituativeCellMLIdx,"equations/Tdev33",iron.FieldParameterSetTypes.VALUES,
+            self.dependentField,iron.FieldVariableTypes.U2,6,iron.FieldParameterSetTypes.VALUES)
+        self.constituativeCellML.FieldMapsCreateFinish()
+
+        # Create the CELL models field
+        self.constituativeCellMLModelsField = iron.Field()
+        self.constituativeCellML.ModelsFieldCreateStart(constituativeCellMLModelsFieldUserNumber,self.constituativeCellMLModelsField)
+        self.constituativeCellMLModelsField.VariableLabelSet(iron.FieldVariableTypes.U,"ConstituativeModelMap")
+        self.constituativeCellML.ModelsFieldCreateFinish()
+
+        # Create the CELL parameters field
+        self.constituativeCellMLParametersField = iron.Field()
+        self.constituativeCellML.ParametersFieldCreateStart(constituativeCellMLParametersFieldUserNumber,self.constituativeCellMLParametersField)
+        self.constituativeCellMLParametersField.VariableLabelSet(iron.FieldVariableTypes.U,"ConstituativeParameters")
+        self.constituativeCellML.ParametersFieldCreateFinish()
+
+        # Set up the materials constants
+        self.c1ComponentNumber = self.constituativeCellML.FieldComponentGet(self.constituativeCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"equations/c1")
+        self.c2ComponentNumber = self.constituativeCellML.FieldComponentGet(self.constituativeCellMLIdx,iron.CellMLFieldTypes.PARAMETERS,"equations/c2")
+        self.SetMaterials()
+
+        # Create the CELL intermediate field
+        self.constituativeCellMLIntermediateField = iron.Field()
+        self.constituativeCellML.IntermediateFieldCreateStart(constituativeCellMLIntermediateFieldUserNumber,self.constituativeCellMLIntermediateField)
+        self.constituativeCellMLIntermediateField.VariableLabelSet(iron.FieldVariableTypes.U,"ConstituativeIntermediate")
+        self.constituativeCellML.IntermediateFieldCreateFinish()
+
+    # Create the equations, problem, control loop, solvers and solver equations
+    def BuildProblem(self):
+        startTime = self.parameters['startTime']
+        stopTime = self.parameters['stopTime']
+        timeIncrement = self.parameters['timeIncrement']
+        jacobianCalculationType = self.parameters['jacobianCalculationType']
+
+        # Create equations
+        self.equations = iron.Equations()
+        self.equationsSet.EquationsCreateStart(self.equations)
+        self.equations.sparsityType = iron.EquationsSparsityTypes.SPARSE
+        self.equations.outputType = iron.EquationsOutputTypes.NONE
+        self.equationsSet.EquationsCreateFinish()
+
+        # Define the problem
+        self.problem = iron.Problem()
+        problemSpecification = [iron.ProblemClasses.ELASTICITY,
+                iron.ProblemTypes.FINITE_ELASTICITY,
+                iron.ProblemSubtypes.FINITE_ELASTICITY_WITH_GROWTH_CELLML]
+        self.problem.CreateStart(problemUserNumber,problemSpecification)
+        self.problem.CreateFinish()
+
+        # Create control loops
+        self.timeLoop = iron.ControlLoop()
+        self.problem.ControlLoopCreateStart()
+        self.problem.ControlLoopGet([iron.ControlLoopIdentifiers.NODE],self.timeLoop)
+        self.timeLoop.TimesSet(startTime,stopTime,timeIncrement)
+        self.problem.ControlLoopCreateFinish()
+
+        # Create problem solvers
+        self.odeIntegrationSolver = iron.Solver()
+        self.nonlinearSolver = iron.Solver()
+        self.linearSolver = iron.Solver()
+        self.cellMLEvaluationSolver = iron.Solver()
+        self.problem.SolversCreateStart()
+        self.problem.SolverGet([iron.ControlLoopIdentifiers.NODE],1,self.odeIntegrationSolver)
+        self.problem.SolverGet([iron.ControlLoopIdentifiers.NODE],2,self.nonlinearSolver)
+        self.nonlinearSolver.outputType = iron.SolverOutputTypes.MONITOR
+        if (jacobianCalculationType == FD_JACOBIAN):
+            self.nonlinearSolver.NewtonJacobianCalculationTypeSet(iron.JacobianCalculationTypes.FD)
+        elif (jacobianCalculationType == EQUATIONS_JACOBIAN):
+            self.nonlinearSolver.NewtonJacobianCalculationTypeSet(iron.JacobianCalculationTypes.EQUATIONS)
+        else:
+            raise ValueError('Invalid Jacobian calculation type')
+        self.nonlinearSolver.NewtonAbsoluteToleranceSet(self.parameters['newtonAbsoluteTolerance'])
+        self.nonlinearSolver.NewtonSolutionToleranceSet(self.parameters['newtonSolutionTolerance'])
+        self.nonlinearSolver.NewtonRelativeToleranceSet(self.parameters['newtonRelativeTolerance'])
+        self.nonlinearSolver.NewtonCellMLSolverGet(self.cellMLEvaluationSolver)
+        self.nonlinearSolver.NewtonLinearSolverGet(self.linearSolver)
+        self.SetLinearSolver()
+        if self.instrumented:
+            # Have the linear solver write its solve times so that they can be traced
+            self.linearSolver.outputType = iron.SolverOutputTypes.TIMING
+        self.problem.SolversCreateFinish()
+
+        # Create nonlinear equations and add equations set to solver equations
+        self.nonlinearEquations = iron.SolverEquations()
+        self.problem.SolverEquationsCreateStart()
+        self.nonlinearSolver.SolverEquationsGet(self.nonlinearEquations)
+        self.nonlinearEquations.sparsityType = iron.SolverEquationsSparsityTypes.SPARSE
+        nonlinearEquationsSetIndex = self.nonlinearEquations.EquationsSetAdd(self.equationsSet)
+        self.problem.SolverEquationsCreateFinish()
+
+        # Create CellML equations and add growth and constituative equations to the solvers
+        self.growthEquations = iron.CellMLEquations()
+        self.constituativeEquations = iron.CellMLEquations()
+        self.problem.CellMLEquationsCreateStart()
+        self.odeIntegrationSolver.CellMLEquationsGet(self.growthEquations)
+        growthEquationsIndex = self.growthEquations.CellMLAdd(self.growthCellML)
+        self.cellMLEvaluationSolver.CellMLEquationsGet(self.constituativeEquations)
+        constituativeEquationsIndex = self.constituativeEquations.CellMLAdd(self.constituativeCellML)
+        self.problem.CellMLEquationsCreateFinish()
+
+    # Count the DOFs of the dependent field U variable: three displacements per node plus the pressure, which is element
+    # based for constant interpolation and otherwise uses the displacement mesh component, so has a DOF at every node
+    def NumberOfDofs(self):
+        if (self.parameters['pInterpolation'] == CONSTANT_LAGRANGE):
+            return self.numberOfDimensions*self.numberOfNodes+self.numberOfElements
+        return (self.numberOfDimensions+1)*self.numberOfNodes
+
+    # The linear solver used for the problem. AUTOMATIC_LINEAR_SOLVER is resolved on the number of DOFs and of
+    # computational nodes. A serial run always uses the direct solver as the incomplete factorisations the iterative
+    # solvers are preconditioned with can break down on the zero pressure block of a single domain.
+    def LinearSolverType(self):
+        linearSolverType = self.parameters['linearSolverType']
+        if (linearSolverType == AUTOMATIC_LINEAR_SOLVER):
+            if (self.numberOfComputationalNodes == 1 or self.numberOfDofs <= self.parameters['directSolverMaximumDofs']):
+                return DIRECT_LINEAR_SOLVER
+            return GMRES_LINEAR_SOLVER
+        return linearSolverType
+
+    # Set up the linear solver of the Newton solver as a direct solver or a preconditioned Krylov solver with
+    # tolerances tied to the Newton tolerances
+    def SetLinearSolver(self):
+        self.linearSolverType = self.LinearSolverType()
+        if (self.linearSolverType == DIRECT_LINEAR_SOLVER):
+            self.linearSolver.linearType = iron.LinearSolverTypes.DIRECT
+            return
+        self.linearSolver.linearType = iron.LinearSolverTypes.ITERATIVE
+        if (self.linearSolverType == GMRES_LINEAR_SOLVER):
+            self.linearSolver.LinearIterativeTypeSet(iron.IterativeLinearSolverTypes.GMRES)
+            self.linearSolver.LinearIterativeGMRESRestartSet(self.parameters['gmresRestart'])
+        elif (self.linearSolverType == BICGSTAB_LINEAR_SOLVER):
+            self.linearSolver.LinearIterativeTypeSet(iron.IterativeLinearSolverTypes.BiCGSTAB)
+        else:
+            raise ValueError('Invalid linear solver type')
+        preconditionerType = self.parameters['preconditionerType']
+        if (preconditionerType == NO_PRECONDITIONER):
+            self.linearSolver.LinearIterativePreconditionerTypeSet(iron.IterativePreconditionerTypes.NONE)
+        elif (preconditionerType == JACOBI_PRECONDITIONER):
+            self.linearSolver.LinearIterativePreconditionerTypeSet(iron.IterativePreconditionerTypes.JACOBI)
+        elif (preconditionerType == BLOCK_JACOBI_PRECONDITIONER):
+            self.linearSolver.LinearIterativePreconditionerTypeSet(iron.IterativePreconditionerTypes.BLOCK_JACOBI)
+        elif (preconditionerType == ADDITIVE_SCHWARZ_PRECONDITIONER):
+            self.linearSolver.LinearIterativePreconditionerTypeSet(iron.IterativePreconditionerTypes.ADDITIVE_SCHWARZ)
+        elif (preconditionerType == INCOMPLETE_LU_PRECONDITIONER):
+            self.linearSolver.LinearIterativePreconditionerTypeSet(iron.IterativePreconditionerTypes.INCOMPLETE_LU)
+        else:
+            raise ValueError('Invalid preconditioner type')
+        self.linearSolver.LinearIterativeRelativeToleranceSet(self.parameters['linearForcingTerm'])
+        self.linearSolver.LinearIterativeAbsoluteToleranceSet(0.1*self.parameters['newtonAbsoluteTolerance'])
+        self.linearSolver.LinearIterativeMaximumIterationsSet(self.parameters['linearMaximumIterations'])
+
+    # Select the clamped face, the loaded tip edge and the reference pressure node from the geometry and prescribe the
+    # boundary conditions on them. Each computational node selects from the reference coordinates of the nodes in its
+    # own domain, read from the geometric field, and only adds the conditions for those nodes.
+    def BuildBoundaryConditions(self):
+        width = self.parameters['width']
+        length = self.parameters['length']
+        height = self.parameters['height']
+        pRef = self.parameters['pRef']
+
+        nodeNumbers,coordinates = boundary_conditions.NodeCoordinates(self.geometricField,self.localNodes)
+        self.localReferenceCoordinates = coordinates
+        self.pressureNodes = self.PressureNodes()
+        # Use a tolerance from the extent of the whole mesh so that every computational node makes the same selection
+        tolerance = boundary_conditions.CoordinateTolerance(numpy.array([[0.0,0.0,0.0],[width,height,length]]))
+        self.fixedNodes = boundary_conditions.FaceNodes(nodeNumbers,coordinates,boundary_conditions.Z_AXIS,0.0,tolerance)
+        self.tipNodes = boundary_conditions.FaceNodes(nodeNumbers,coordinates,boundary_conditions.Z_AXIS,length,
+                                                      tolerance)
+        self.loadedNodes = boundary_conditions.EdgeNodes(nodeNumbers,coordinates,[(boundary_conditions.Y_AXIS,height),
+                                                                                  (boundary_conditions.Z_AXIS,length)],
+                                                         tolerance)
+        self.fixedCoordinates = boundary_conditions.CoordinatesOf(nodeNumbers,coordinates,self.fixedNodes)
+        self.loadedCoordinates = boundary_conditions.CoordinatesOf(nodeNumbers,coordinates,self.loadedNodes)
+        self.loadedNodeWeights = None
+        referencePressureNodes = boundary_conditions.EdgeNodes(nodeNumbers,coordinates,
+                                                               [(boundary_conditions.X_AXIS,width),
+                                                                (boundary_conditions.Y_AXIS,height),
+                                                                (boundary_conditions.Z_AXIS,length)],tolerance)
+        # Only the computational node whose domain holds the reference pressure node knows it
+        self.referencePressureNode = int(referencePressureNodes[0]) if (len(referencePressureNodes) > 0) else None
+
+        # Prescribe boundary conditions (absolute nodal parameters)
+        self.boundaryConditions = iron.BoundaryConditions()
+        self.nonlinearEquations.BoundaryConditionsCreateStart(self.boundaryConditions)
+
+        # Set the built in nodes at z = 0 to no displacement
+        boundary_conditions.AddNodes(self.boundaryConditions,self.dependentField,iron.FieldVariableTypes.U,
+                                     self.fixedNodes,[1,2,3],iron.BoundaryConditionsTypes.FIXED,0.0)
+        # Set downward force on the top edge of the tip
+        boundary_conditions.AddNodes(self.boundaryConditions,self.dependentField,iron.FieldVariableTypes.DELUDELN,
+                                     self.loadedNodes,[2],iron.BoundaryConditionsTypes.NEUMANN_POINT,
+                                     self.LoadedNodeForces())
+        # Set reference pressure
+        if self.referencePressureNode is not None:
+            self.boundaryConditions.AddNode(self.dependentField,iron.FieldVariableTypes.U,1,1,self.referencePressureNode,
+                                            4,iron.BoundaryConditionsTypes.FIXED,pRef)
+
+        self.nonlinearEquations.BoundaryConditionsCreateFinish()
+
+    # Drop the node numbers of the whole mesh, which are only needed to find the nodes of this computational node's
+    # domain, and the reference coordinates of the local nodes, which ReferenceCoordinates then reads from the geometric
+    # field when they are needed. The coordinates of the clamped and loaded nodes are kept.
+    def ReleaseMeshArrays(self):
+        self.nodeNumbers = None
+        self.localReferenceCoordinates = None
+
+    # The reference coordinates (nodes x 3) of the local nodes
+    def ReferenceCoordinates(self):
+        if self.localReferenceCoordinates is not None:
+            return self.localReferenceCoordinates
+        return boundary_conditions.NodeCoordinates(self.geometricField,self.localNodes)[1]
+
+    # Whether each local node holds a pressure DOF. The pressure component of the dependent field uses the first mesh
+    # component, that of the displacement basis, so every node holds one unless the pressure is element based.
+    def PressureNodes(self):
+        return numpy.full(len(self.localNodes),self.parameters['pInterpolation'] != CONSTANT_LAGRANGE)
+
+    # The reference coordinates (elements x Gauss points x 3) of the Gauss points of the local elements
+    def GaussPointCoordinates(self):
+        return boundary_conditions.RegularMeshGaussPointCoordinates(
+            [self.parameters['width'],self.parameters['height'],self.parameters['length']],
+            [self.parameters['numberOfGlobalXElements'],self.parameters['numberOfGlobalYElements'],
+             self.parameters['numberOfGlobalZElements']],self.numberOfGaussXi,self.localElements)
+
+    # Evaluate a distribution at the Gauss points of the local elements. A distribution is either a function of the
+    # reference coordinates (..., 3) returning (..., numberOfComponents) values, or an array that broadcasts against
+    # (numberOfElements x numberOfGaussPoints x numberOfComponents) for all the elements in element number order.
+    def GaussPointDistribution(self,distribution,numberOfComponents):
+        localShape = (len(self.localElements),self.numberOfGaussPoints,numberOfComponents)
+        if callable(distribution):
+            return numpy.broadcast_to(numpy.asarray(distribution(self.GaussPointCoordinates()),dtype=float),localShape)
+        values = numpy.broadcast_to(numpy.asarray(distribution,dtype=float),
+                                    (self.numberOfElements,self.numberOfGaussPoints,numberOfComponents))
+        return values[numpy.asarray(self.localElements,dtype=int)-1]
+
+    # Vary the fibre, sheet and normal growth rates over the cantilever. rates is a distribution of the three rates, see
+    # GaussPointDistribution, or None to go back to the uniform fibreRate, sheetRate and normalRate parameters, which
+    # are not used while a distribution is set. Can be called before or after Build.
+    def SetGrowthRateDistribution(self,rates=None):
+        self.growthRateDistribution = rates
+        if self.built:
+            self.SetGrowthRates()
+        return self
+
+    # Vary the materials constants c1 and c2 over the cantilever, like SetGrowthRateDistribution
+    def SetMaterialDistribution(self,materials=None):
+        self.materialDistribution = materials
+        if self.built:
+            self.SetMaterials()
+        return self
+
+    # Set the growth rates in the growth CellML parameters field
+    def SetGrowthRates(self):
+        componentNumbers = [self.fibreRateComponentNumber,self.sheetRateComponentNumber,self.normalRateComponentNumber]
+        if self.growthRateDistribution is not None:
+            field_values.SetGaussPointComponentValues(self.growthCellMLParametersField,iron.FieldVariableTypes.U,
+                                                      self.localElements,componentNumbers,
+                                                      self.GaussPointDistribution(self.growthRateDistribution,3))
+            return
+        for componentNumber,rate in zip(componentNumbers,[self.parameters['fibreRate'],self.parameters['sheetRate'],
+                                                          self.parameters['normalRate']]):
+            self.growthCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,
+                                                                         iron.FieldParameterSetTypes.VALUES,
+                                                                         componentNumber,rate)
+
+    # Set the materials constants in the constituative CellML parameters field
+    def SetMaterials(self):
+        if self.materialDistribution is not None:
+            field_values.SetGaussPointComponentValues(self.constituativeCellMLParametersField,iron.FieldVariableTypes.U,
+                                                      self.localElements,[self.c1ComponentNumber,self.c2ComponentNumber],
+                                                      self.GaussPointDistribution(self.materialDistribution,2))
+            return
+        self.constituativeCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,
+                                                                            iron.FieldParameterSetTypes.VALUES,
+                                                                            self.c1ComponentNumber,self.parameters['c1'])
+        self.constituativeCellMLParametersField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,
+                                                                            iron.FieldParameterSetTypes.VALUES,
+                                                                            self.c2ComponentNumber,self.parameters['c2'])
+
+    # Calculate the fraction of a total force carried by each of the local loaded nodes. The weights depend on the whole
+    # loaded edge, so in a parallel run the loaded node coordinates of every computational node are gathered, which
+    # needs mpi4py.
+    def LoadedNodeWeights(self):
+        if self.loadedNodeWeights is None:
+            parts = parallel.Gather(self.loadedCoordinates,self.numberOfComputationalNodes)
+            otherParts = [part for partIdx,part in enumerate(parts) if (partIdx != self.computationalNodeNumber)]
+            edgeCoordinates = numpy.concatenate([self.loadedCoordinates]+otherParts)
+            self.loadedNodeWeights = boundary_conditions.LoadWeights(edgeCoordinates,self.numberOfNodesXi)[
+                :len(self.loadedNodes)]
+        return self.loadedNodeWeights
+
+    # Calculate the point force on each of the local loaded nodes
+    def LoadedNodeForces(self):
+        if (self.parameters['forceType'] == NODAL_FORCE):
+            return numpy.full(len(self.loadedNodes),self.parameters['force'])
+        elif (self.parameters['forceType'] == TOTAL_FORCE):
+            return self.parameters['force']*self.LoadedNodeWeights()
+        else:
+            raise ValueError('Invalid force type')
+
+    # Set the point force, scaled by loadFactor, on the loaded nodes. The Neumann point values are held in the traction
+    # variable of the dependent field so they can be changed without recreating the boundary conditions.
+    def SetTipForce(self,loadFactor=1.0):
+        nodeForces = loadFactor*self.LoadedNodeForces()
+        for nodeNumber,nodeForce in zip(self.loadedNodes,nodeForces):
+            self.dependentField.ParameterSetUpdateNodeDP(iron.FieldVariableTypes.DELUDELN,iron.FieldParameterSetTypes.VALUES,
+                                                         1,1,int(nodeNumber),2,float(nodeForce))
+        self.dependentField.ParameterSetUpdateStart(iron.FieldVariableTypes.DELUDELN,iron.FieldParameterSetTypes.VALUES)
+        self.dependentField.ParameterSetUpdateFinish(iron.FieldVariableTypes.DELUDELN,iron.FieldParameterSetTypes.VALUES)
+
+    # Return the model to its initial state: undeformed geometry, initial and reference pressures and no growth
+    def ResetState(self):
+        self.InitialiseDependentField()
+        # The reference pressure boundary condition was added on top of the initial pressure
+        if self.referencePressureNode is not None:
+            self.dependentField.ParameterSetUpdateNodeDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
+                                                         1,1,self.referencePressureNode,4,
+                                                         self.parameters['pInit']+self.parameters['pRef'])
+        self.dependentField.ParameterSetUpdateStart(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
+        self.dependentField.ParameterSetUpdateFinish(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
+        for componentNumber in self.lambdaComponentNumbers:
+            self.growthCellMLStateField.ComponentValuesInitialiseDP(iron.FieldVariableTypes.U,
+                                                                    iron.FieldParameterSetTypes.VALUES,
+                                                                    componentNumber,1.0)
+
+    # Set the tip force for a step ending at stepTime while the load is being ramped
+    def RampLoad(self,stepTime):
+        if (self.parameters['loadRampTime'] > 0.0):
+            self.SetTipForce(min(1.0,(stepTime-self.parameters['startTime'])/self.parameters['loadRampTime']))
+
+    # Get the solution state needed to repeat a time step: the local DOF values of the dependent field and of the growth
+    # CellML state field, together with the growth stretches at the local Gauss points, ordered lambda1..3, to measure
+    # the change over a step. Copying the DOF values keeps the pressure wherever its DOFs are, at the pressure basis
+    # nodes or in the elements.
+    def SaveState(self):
+        growthState = field_values.GaussPointValues(self.growthCellMLStateField,iron.FieldVariableTypes.U,
+                                                    self.localElements,self.numberOfGaussPoints,
+                                                    len(self.lambdaComponentNumbers))
+        return {
+            'dependent':field_values.ParameterSetData(self.dependentField,iron.FieldVariableTypes.U),
+            'growthState':field_values.ParameterSetData(self.growthCellMLStateField,iron.FieldVariableTypes.U),
+            'lambda':growthState[:,:,numpy.array(self.lambdaComponentNumbers)-1],
+            }
+
+    # Return the solution to a state from SaveState
+    def RestoreState(self,state):
+        field_values.SetParameterSetData(self.dependentField,iron.FieldVariableTypes.U,state['dependent'])
+        field_values.SetParameterSetData(self.growthCellMLStateField,iron.FieldVariableTypes.U,state['growthState'])
+
+    # The field variables saved in a checkpoint: the dependent field and the growth CellML state
+    def CheckpointVariables(self):
+        return [('dependentU',self.dependentField,iron.FieldVariableTypes.U),
+                ('dependentDELUDELN',self.dependentField,iron.FieldVariableTypes.DELUDELN),
+                ('dependentU1',self.dependentField,iron.FieldVariableTypes.U1),
+                ('dependentU2',self.dependentField,iron.FieldVariableTypes.U2),
+                ('dependentU3',self.dependentField,iron.FieldVariableTypes.U3),
+                ('growthState',self.growthCellMLStateField,iron.FieldVariableTypes.U)]
+
+    # Get the local DOF values of the checkpoint variables. Restoring these into a model built from the same parameters on
+    # the same number of computational nodes puts back the same DOF values bit for bit.
+    def CheckpointArrays(self):
+        return dict((name,field_values.ParameterSetData(field,variableType))
+                    for name,field,variableType in self.CheckpointVariables())
+
+    # Restore the checkpoint variables from CheckpointArrays
+    def RestoreCheckpointArrays(self,arrays):
+        for name,field,variableType in self.CheckpointVariables():
+            field_values.SetParameterSetData(field,variableType,arrays[name])
+
+    # Change parameters of a built model. Only the updatableParameters can be changed, anything else needs a new model.
+    def Update(self,parameters):
+        parameters = dict((name,value) for name,value in CantileverParameters(parameters).items()
+                          if name in parameters)
+        fixedParameters = [name for name in parameters
+                           if name not in self.updatableParameters and parameters[name] != self.parameters[name]]
+        if fixedParameters:
+            raise ValueError('Changing '+', '.join(sorted(fixedParameters))+' needs a new model')
+        changed = set(name for name in parameters if parameters[name] != self.parameters[name])
+        with self.trace.Phase('update',changed=sorted(changed)) as phase:
+            self.parameters.update(parameters)
+            if changed & set(['fibreRate','sheetRate','normalRate']):
+                self.SetGrowthRates()
+            if changed & set(['c1','c2']):
+                self.SetMaterials()
+            if changed & set(['force','forceType']):
+                self.SetTipForce()
+            if changed & set(['startTime','stopTime','timeIncrement']):
+                self.timeLoop.TimesSet(self.parameters['startTime'],self.parameters['stopTime'],
+                                       self.parameters['timeIncrement'])
+        self.timings['update'] = phase.duration
+        return self
+
+    # The times at the end of each step of the time loop
+    def StepTimes(self):
+        numberOfSteps = int(round((self.parameters['stopTime']-self.parameters['startTime'])/
+                                  self.parameters['timeIncrement']))
+        return [self.parameters['startTime']+stepIdx*self.parameters['timeIncrement']
+                for stepIdx in range(1,numberOfSteps+1)]
+
+    # Count the CellML evaluations of a time step in the domain of this computational node. The growth model is integrated
+    # once per Gauss point per step and the constituative model is evaluated at every Gauss point for each residual
+    # evaluation, one per Newton iteration including the initial residual. With EQUATIONS_JACOBIAN each element Jacobian
+    # also re-evaluates the element's Gauss points once per element DOF. The FD_JACOBIAN evaluations depend on PETSc's
+    # colouring of the global Jacobian and are not counted.
+    def CellMLEvaluations(self,newtonHistories):
+        numberOfGaussPoints = len(self.localElements)*self.numberOfGaussPoints
+        numberOfIterations = sum(history[-1][0] for history in newtonHistories)
+        evaluations = {'growth':numberOfGaussPoints,
+                       'constituativeResidual':numberOfGaussPoints*sum(len(history) for history in newtonHistories)}
+        if (self.parameters['jacobianCalculationType'] == EQUATIONS_JACOBIAN):
+            if (self.parameters['pInterpolation'] == CONSTANT_LAGRANGE):
+                numberOfElementPressureDofs = 1
+            else:
+                numberOfElementPressureDofs = self.numberOfNodesXi**self.numberOfDimensions
+            numberOfElementDofs = self.numberOfDimensions*self.numberOfNodesXi**self.numberOfDimensions+\
+                numberOfElementPressureDofs
+            evaluations['constituativeJacobian'] = numberOfGaussPoints*numberOfElementDofs*numberOfIterations
+        return evaluations
+
+    # Solve one time step of the time loop and record its Newton residual history, linear solve times and CellML
+    # evaluations in stepStatistics and the trace. Returns the captured monitor output.
+    def SolveStep(self,startTime,stopTime,echoMonitor=True):
+        with self.trace.Phase('step',startTime=startTime,stopTime=stopTime) as phase:
+            self.timeLoop.TimesSet(startTime,stopTime,stopTime-startTime)
+            with newton_monitor.OutputCapture(echoMonitor) as capture:
+                self.problem.Solve()
+        histories = newton_monitor.ParseNewtonMonitor(capture.text)
+        statistics = {
+            'step':len(self.stepStatistics)+1,
+            'startTime':startTime,
+            'stopTime':stopTime,
+            'wallTime':phase.duration,
+            'newtonIterations':sum(history[-1][0] for history in histories),
+            'residualHistory':[[norm for iterationNumber,norm in history] for history in histories],
+            'linearSolveTimes':[userTime for label,userTime,systemTime in
+                                newton_monitor.ParseSolverTimings(capture.text)],
+            'cellmlEvaluations':self.CellMLEvaluations(histories),
+            'converged':newton_monitor.NewtonSummary(capture.text)['converged'],
+            }
+        self.stepStatistics.append(statistics)
+        phase.Arguments(**statistics)
+        self.trace.Counter('newton',iterations=statistics['newtonIterations'],
+                           residual=histories[-1][-1][1] if histories else None)
+        self.trace.Counter('cellmlEvaluations',**statistics['cellmlEvaluations'])
+        return capture.text
+
+    # Start the Newton iterations of a step ending at stepTime from the initial guess of the solve, if it has one. The
+    # guess covers every DOF, so the DOFs with fixed boundary conditions are then set back to their prescribed values.
+    def SeedStep(self,stepTime):
+        if self.initialGuess is not None:
+            guess = self.initialGuess(stepTime)
+            if guess is not None:
+                field_values.SetParameterSetData(self.dependentField,iron.FieldVariableTypes.U,guess)
+                self.SetFixedValues()
+
+    # Set the local DOFs with fixed boundary conditions to their prescribed values: the reference coordinates of the
+    # clamped nodes and the initial plus reference pressure at the reference pressure node
+    def SetFixedValues(self):
+        for nodeNumber,coordinates in zip(self.fixedNodes,self.fixedCoordinates):
+            for componentIdx in range(3):
+                self.dependentField.ParameterSetUpdateNodeDP(iron.FieldVariableTypes.U,
+                                                             iron.FieldParameterSetTypes.VALUES,1,1,int(nodeNumber),
+                                                             componentIdx+1,float(coordinates[componentIdx]))
+        if self.referencePressureNode is not None:
+            self.dependentField.ParameterSetUpdateNodeDP(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES,
+                                                         1,1,self.referencePressureNode,4,
+                                                         self.parameters['pInit']+self.parameters['pRef'])
+        self.dependentField.ParameterSetUpdateStart(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
+        self.dependentField.ParameterSetUpdateFinish(iron.FieldVariableTypes.U,iron.FieldParameterSetTypes.VALUES)
+
+    # Solve the time steps of StepTimes after startTime. Yields the time and monitor output of each step once it has been
+    # solved.
+    def FixedSteps(self,startTime,echoMonitor=True):
+        self.nextTimeIncrement = self.parameters['timeIncrement']
+        timeTolerance = 1e-9*max(1.0,abs(self.parameters['stopTime']))
+        currentTime = startTime
+        for stepTime in self.StepTimes():
+            if (stepTime <= startTime+timeTolerance):
+                continue
+            self.RampLoad(stepTime)
+            self.SeedStep(stepTime)
+            stepText = self.SolveStep(currentTime,stepTime,echoMonitor)
+            self.stepStatistics[-1]['accepted'] = True
+            currentTime = stepTime
+            yield stepTime,stepText
+
+    # Solve the time range with steps chosen from the Newton iterations and growth of the previous step. A step that does
+    # not converge, or that iron reports an error for, is rejected: the state before the step is restored and the step
+    # is solved again with half the increment. Yields the time and monitor output, including that of any rejected
+    # attempts, of each accepted step. The increment of the step after each yield is in nextTimeIncrement.
+    def AdaptiveSteps(self,startTime,timeIncrement,echoMonitor=True):
+        stopTime = self.parameters['stopTime']
+        minimumTimeIncrement = self.parameters['minimumTimeIncrement']
+        maximumTimeIncrement = self.parameters['maximumTimeIncrement']
+        maximumIncrementFactor = self.parameters['maximumIncrementFactor']
+        timeTolerance = 1e-9*max(1.0,abs(stopTime))
+        currentTime = startTime
+        timeIncrement = min(max(timeIncrement,minimumTimeIncrement),maximumTimeIncrement)
+        state = self.SaveState()
+        while (currentTime < stopTime-timeTolerance):
+            stepText = ''
+            while True:
+                # Take the rest of the time range rather than leave a last step shorter than the minimum
+                if (stopTime-currentTime-timeIncrement < minimumTimeIncrement):
+                    timeIncrement = stopTime-currentTime
+                    stepTime = stopTime
+                else:
+                    stepTime = currentTime+timeIncrement
+                self.RampLoad(stepTime)
+                self.SeedStep(stepTime)
+                numberOfAttempts = len(self.stepStatistics)
+                try:
+                    stepText += self.SolveStep(currentTime,stepTime,echoMonitor)
+                    converged = self.stepStatistics[-1]['converged']
+                except RuntimeError as error:
+                    converged = False
+                    self.trace.Instant('stepError',startTime=currentTime,stopTime=stepTime,error=str(error))
+                if converged:
+                    break
+                if (len(self.stepStatistics) > numberOfAttempts):
+                    self.stepStatistics[-1]['accepted'] = False
+                if (timeIncrement <= minimumTimeIncrement*(1.0+1e-9)):
+                    raise RuntimeError('The time step from %g failed to converge with the minimum time increment %g' %
+                                       (currentTime,minimumTimeIncrement))
+                self.trace.Instant('stepRejected',startTime=currentTime,stopTime=stepTime)
+                self.RestoreState(state)
+                timeIncrement = max(0.5*timeIncrement,minimumTimeIncrement)
+            statistics = self.stepStatistics[-1]
+            statistics['accepted'] = True
+
+            # Scale the increment towards the target Newton iterations and growth stretch change. The growth change is
+            # the largest over all the computational nodes so that they all take the same steps.
+            previousState = state
+            state = self.SaveState()
+            lambdaChange = numpy.abs(state['lambda']-previousState['lambda']).max() if state['lambda'].size else 0.0
+            if parallel.Available(self.numberOfComputationalNodes):
+                lambdaChange = float(parallel.Maximum([lambdaChange],self.numberOfComputationalNodes)[0])
+            else:
+                lambdaChange = 0.0
+            incrementFactor = min(maximumIncrementFactor,
+                                  float(self.parameters['targetNewtonIterations'])/max(statistics['newtonIterations'],1))
+            if (lambdaChange > 0.0):
+                incrementFactor = min(incrementFactor,self.parameters['targetLambdaChange']/lambdaChange)
+            incrementFactor = max(incrementFactor,1.0/maximumIncrementFactor)
+            statistics['lambdaChange'] = lambdaChange
+            statistics['incrementFactor'] = incrementFactor
+            self.trace.Counter('timeIncrement',timeIncrement=timeIncrement,lambdaChange=lambdaChange)
+
+            currentTime = stepTime
+            self.nextTimeIncrement = min(max(timeIncrement*incrementFactor,minimumTimeIncrement),maximumTimeIncrement)
+            yield currentTime,stepText
+            timeIncrement = self.nextTimeIncrement
+
+    # Solve the model from its initial state with fixed or adaptive time steps, capturing the Newton monitor output.
+    # Each of the exporters is given the solution after every accepted step, counted in stepNumber. If a restart
+    # checkpoint from checkpoint.ReadCheckpoint is given the solve resumes from its state, time and step number instead. initialGuess is an optional
+    # function of the step end time returning dependent field U DOF values (see field_values.ParameterSetData), or None,
+    # to start the Newton iterations of each step from, e.g. a nearby solution from continuation.py. It only changes the
+    # starting point of the iterations, the growth state is still integrated from the start. Returns the scalar outputs.
+    def Solve(self,echoMonitor=True,exporters=[],restart=None,initialGuess=None):
+        if not self.built:
+            self.Build()
+        solveStartTime = time.time()
+        self.stepStatistics = []
+        self.initialGuess = initialGuess
+        if restart is None:
+            self.ResetState()
+            startTime = self.parameters['startTime']
+            timeIncrement = self.parameters['timeIncrement']
+            self.stepNumber = 0
+        else:
+            self.RestoreCheckpointArrays(restart['arrays'])
+            startTime = restart['time']
+            timeIncrement = restart['timeIncrement']
+            self.stepNumber = restart['stepNumber']
+            self.trace.Instant('restart',time=startTime,timeIncrement=timeIncrement)
+        exportTime = 0.0
+        for exporter in exporters:
+            exporter.Start(self)
+        if (self.parameters['timeSteppingType'] == FIXED_TIME_STEPPING):
+            steps = self.FixedSteps(startTime,echoMonitor)
+        elif (self.parameters['timeSteppingType'] == ADAPTIVE_TIME_STEPPING):
+            steps = self.AdaptiveSteps(startTime,timeIncrement,echoMonitor)
+        else:
+            raise ValueError('Invalid time stepping type')
+        monitorText = ''
+        for stepTime,stepText in steps:
+            self.stepNumber += 1
+            monitorText += stepText
+            with self.trace.Phase('stepExport',time=stepTime) as phase:
+                for exporter in exporters:
+                    exporter.Write(self,stepTime)
+            exportTime += phase.duration
+            self.trace.Flush()
+        for exporter in exporters:
+            exporter.Finish(self)
+        # Leave the full force applied if the ramp went past the stop time
+        if (self.parameters['loadRampTime'] > 0.0):
+            self.SetTipForce()
+        self.timings['solve'] = time.time()-solveStartTime-exportTime
+        self.timings['stepExport'] = exportTime
+        self.trace.Complete('solve',solveStartTime,time.time()-solveStartTime)
+        self.trace.Flush()
+        outputs = newton_monitor.NewtonSummary(monitorText)
+        outputs['solveTime'] = self.timings['solve']
+        outputs['timeSteps'] = sum(1 for statistics in self.stepStatistics if statistics['accepted'])
+        # Rejected attempts of adaptive steps do not count against convergence
+        outputs['converged'] = all(statistics['converged'] for statistics in self.stepStatistics
+                                   if statistics['accepted'])
+        outputs['rejectedTimeSteps'] = len(self.stepStatistics)-outputs['timeSteps']
+        outputs.update(self.Outputs())
+        return outputs
+
+    # Whether the strain and stress are output with the solution at time. In LEAN_MEMORY mode they are only output every
+    # derivedOutputInterval accepted steps and at the stop time.
+    def DerivedOutputStep(self,time):
+        if (self.parameters['memoryMode'] != LEAN_MEMORY):
+            return True
+        stopTime = self.parameters['stopTime']
+        if (abs(time-stopTime) <= 1e-9*max(1.0,abs(stopTime))):
+            return True
+        interval = self.parameters['derivedOutputInterval']
+        return (interval > 0 and self.stepNumber % interval == 0)
+
+    # Gather the displacement, pressure, growth and, unless derivedFields is unset, the strain and stress of the current
+    # solution as arrays. The nodal pressure is NaN at the nodes without a pressure DOF. An element based pressure is
+    # given as elementPressure instead.
+    def ResultArrays(self,derivedFields=True):
+        values = field_values.NodalValues(self.dependentField,iron.FieldVariableTypes.U,self.localNodes,
+                                          4 if self.pressureNodes.any() else 3)
+        pressure = numpy.full(len(self.localNodes),numpy.nan)
+        if self.pressureNodes.any():
+            pressure[self.pressureNodes] = values[self.pressureNodes,3]
+        arrays = {
+            'displacement':values[:,:3]-self.ReferenceCoordinates(),
+            'pressure':pressure,
+            'growth':field_values.GaussPointValues(self.dependentField,iron.FieldVariableTypes.U3,self.localElements,
+                                                   self.numberOfGaussPoints,3),
+            }
+        if (self.parameters['pInterpolation'] == CONSTANT_LAGRANGE):
+            arrays['elementPressure'] = field_values.ElementValues(self.dependentField,iron.FieldVariableTypes.U,
+                                                                   self.localElements,4)
+        if derivedFields:
+            arrays['strain'] = field_values.GaussPointValues(self.dependentField,iron.FieldVariableTypes.U1,
+                                                             self.localElements,self.numberOfGaussPoints,6)
+            arrays['stress'] = field_values.GaussPointValues(self.dependentField,iron.FieldVariableTypes.U2,
+                                                             self.localElements,self.numberOfGaussPoints,6)
+        return arrays
+
+    # The field variables of the model in iron: (field name, field, variable name, variable type)
+    def FieldVariables(self):
+        variables = [('geometric',self.geometricField,'U',iron.FieldVariableTypes.U),
+                     ('fibre',self.fibreField,'U',iron.FieldVariableTypes.U),
+                     ('equationsSet',self.equationsSetField,'U',iron.FieldVariableTypes.U)]
+        for variableName in ['U','DELUDELN','U1','U2','U3']:
+            variables.append(('dependent',self.dependentField,variableName,
+                              getattr(iron.FieldVariableTypes,variableName)))
+        for fieldName in ['growthCellMLModelsField','growthCellMLParametersField','growthCellMLStateField',
+                          'constituativeCellMLModelsField','constituativeCellMLParametersField',
+                          'constituativeCellMLIntermediateField']:
+            variables.append((fieldName[:-len('Field')],getattr(self,fieldName),'U',iron.FieldVariableTypes.U))
+        return variables
+
+    # Measure the memory of the local DOF values, ghosts included, of every parameter set of every field variable and
+    # of the NumPy arrays the model holds. Parameter sets that iron has not created, or that are not double precision
+    # such as those of the CellML models fields, are left out. Returns a list of (field, variable, parameter set,
+    # number of values, bytes) entries. The solver matrices are not included.
+    def MemoryUsage(self):
+        usage = []
+        for fieldName,field,variableName,variableType in self.FieldVariables():
+            for parameterSetName in memoryParameterSetNames:
+                parameterSetType = getattr(iron.FieldParameterSetTypes,parameterSetName,None)
+                if parameterSetType is None:
+                    continue
+                try:
+                    data = field.ParameterSetDataGet(variableType,parameterSetType)
+                except RuntimeError:
+                    continue
+                usage.append((fieldName,variableName,parameterSetName,int(numpy.size(data)),
+                              int(numpy.size(data))*numpy.asarray(data).itemsize))
+                field.ParameterSetDataRestore(variableType,parameterSetType,data)
+        # An array that shares its memory with one already counted, such as the node numbers of a serial run which are
+        # the local nodes, is left out
+        arrays = []
+        for name,value in sorted(vars(self).items()):
+            if isinstance(value,numpy.ndarray) and not any(numpy.shares_memory(value,array) for array in arrays):
+                arrays.append(value)
+                usage.append(('python',name,'',int(value.size),int(value.nbytes)))
+        return usage
+
+    # Describe the memory used by each field variable and parameter set, with totals per field
+    def MemoryReport(self):
+        usage = self.MemoryUsage()
+        report = ['%-32s %-26s %-18s %12s %14s' % ('Field','Variable','Parameter set','Values','Bytes')]
+        fieldNames = []
+        for fieldName,variableName,parameterSetName,numberOfValues,numberOfBytes in usage:
+            if fieldName not in fieldNames:
+                fieldNames.append(fieldName)
+            report.append('%-32s %-26s %-18s %12d %14d' % (fieldName,variableName,parameterSetName,numberOfValues,
+                                                            numberOfBytes))
+        report.append('Totals:')
+        for fieldName in fieldNames:
+            report.append('  %-32s %71d' % (fieldName,sum(entry[4] for entry in usage if entry[0] == fieldName)))
+        report.append('  %-32s %71d' % ('all',sum(entry[4] for entry in usage)))
+        return '\n'.join(report)
+
+    # Calculate the tip deflection and the mean growth stretches of the current solution. In a parallel run each
+    # computational node sums over its own domain and the sums are combined, which needs mpi4py.
+    def Outputs(self):
+        outputs = {}
+        if not parallel.Available(self.numberOfComputationalNodes):
+            for name in ['tipDeflection','lambda1','lambda2','lambda3']:
+                outputs[name] = float('nan')
+            return outputs
+        # Calculate the tip deflection as the mean y displacement of the nodes on the z = length face
+        tipDeflection = 0.0
+        for nodeNumber in self.tipNodes:
+            deformedY = self.dependentField.ParameterSetGetNodeDP(iron.FieldVariableTypes.U,
+                                                                  iron.FieldParameterSetTypes.VALUES,1,1,int(nodeNumber),2)
+            undeformedY = self.geometricField.ParameterSetGetNodeDP(iron.FieldVariableTypes.U,
+                                                                    iron.FieldParameterSetTypes.VALUES,1,1,int(nodeNumber),2)
+            tipDeflection += deformedY-undeformedY
+
+        # Calculate the mean growth stretches over all the Gauss points
+        growth = field_values.GaussPointValues(self.dependentField,iron.FieldVariableTypes.U3,self.localElements,
+                                               self.numberOfGaussPoints,3)
+        growthSums = growth.sum(axis=(0,1))/(self.numberOfElements*self.numberOfGaussPoints)
+        sums = parallel.Sum([tipDeflection,len(self.tipNodes)]+list(growthSums),self.numberOfComputationalNodes)
+        outputs['tipDeflection'] = float(sums[0]/sums[1])
+        for componentIdx in range(3):
+            outputs['lambda%d' % (componentIdx+1)] = float(sums[componentIdx+2])
+        return outputs
+
+    # Export the fields of the current solution to exnode/exelem files. In a parallel run iron writes one
+    # outputPrefix.partN file per computational node, these are merged into single files once every computational node
+    # has written its part if mergeParts is set and mpi4py is available (otherwise run exfile.py --merge afterwards).
+    def Export(self,outputPrefix,mergeParts=True):
+        with self.trace.Phase('export',outputPrefix=outputPrefix) as phase:
+            outputDirectory = os.path.dirname(outputPrefix)
+            if outputDirectory:
+                os.makedirs(outputDirectory,exist_ok=True)
+
+            # Export results
+            fields = iron.Fields()
+            fields.CreateRegion(self.region)
+            fields.NodesExport(outputPrefix,"FORTRAN")
+            fields.ElementsExport(outputPrefix,"FORTRAN")
+            fields.Finalise()
+
+            if (mergeParts and self.numberOfComputationalNodes > 1 and
+                    parallel.Available(self.numberOfComputationalNodes)):
+                parallel.Barrier(self.numberOfComputationalNodes)
+                if (self.computationalNodeNumber == 0):
+                    exfile.MergeParts(outputPrefix,'exnode')
+                    exfile.MergeParts(outputPrefix,'exelem')
+        self.timings['export'] = phase.duration
+        self.trace.Flush()
+
+    # Destroy the iron objects of the model so that another model can be built in this process
+    def Destroy(self):
+        if self.built:
+            self.problem.Destroy()
+            self.region.Destroy()
+            self.uBasis.Destroy()
+            if (self.parameters['pInterpolation'] > CONSTANT_LAGRANGE):
+                self.pBasis.Destroy()
+            self.coordinateSystem.Destroy()
+            self.built = False
+
+    # Describe the one off setup cost and the cost of the last update and solve
+    def TimingReport(self):
+        report = ['Setup time  = %10.4f s' % self.timings.get('build',0.0)]
+        for phaseName in ['mesh','fields','cellml','problem','boundaryConditions']:
+            if phaseName in self.timings:
+                report.append('  %-18s = %10.4f s' % (phaseName,self.timings[phaseName]))
+        report.append('Update time = %10.4f s' % self.timings.get('update',0.0))
+        report.append('Solve time  = %10.4f s' % self.timings.get('solve',0.0))
+        if self.timings.get('stepExport'):
+            report.append('Step export time = %10.4f s' % self.timings['stepExport'])
+        if 'export' in self.timings:
+            report.append('Export time = %10.4f s' % self.timings['export'])
+        return '\n'.join(report)
+
+# Set up and solve the cantilever growth problem for the given parameter overrides. The results are exported to
+# outputPrefix if it is given. Returns a dictionary of scalar outputs of the solve.
+def SolveCantilever(parameters={},outputPrefix=None,echoMonitor=True):
+    model = CantileverGrowthModel(parameters).Build()
+    outputs = model.Solve(echoMonitor)
+    if outputPrefix is not None:
+        model.Export(outputPrefix)
+    return outputs
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve the cantilever growth problem.')
+    parser.add_argument('--store',default=None,
+                        help='stream every time step to this results store (.h5 for HDF5, otherwise a directory)')
+    parser.add_argument('--exnode-interval',type=int,default=0,
+                        help='also export exnode/exelem files every this many time steps')
+    parser.add_argument('--trace',default=None,
+                        help='write a trace of the run to this file (.jsonl for JSON lines, otherwise a Chrome trace); '
+                        '%%d is replaced by the MPI rank')
+    parser.add_argument('--checkpoint',default=None,help='write checkpoints of the solution state to this directory')
+    parser.add_argument('--checkpoint-interval',type=int,default=1,help='write a checkpoint every this many time steps')
+    parser.add_argument('--restart',action='store_true',
+                        help='resume from the latest checkpoint in the --checkpoint directory, if there is one')
+    parser.add_argument('--memory-report',action='store_true',
+                        help='print the memory used by each field variable once the model is built')
+    arguments = parser.parse_args()
+
+    exporters = []
+    if arguments.store:
+        exporters.append(results_store.StoreExporter(arguments.store))
+    if arguments.exnode_interval > 0:
+        exporters.append(results_store.ExnodeExporter("./results/CantileverGrowth",arguments.exnode_interval))
+    if arguments.checkpoint:
+        exporters.append(checkpoint.CheckpointExporter(arguments.checkpoint,arguments.checkpoint_interval))
 
+    trace = instrumentation.Trace(arguments.trace) if arguments.trace else None
+    model = CantileverGrowthModel(trace=trace).Build()
+    if arguments.memory_report:
+        print(model.MemoryReport())
+    restart = None
+    if (arguments.restart and arguments.checkpoint):
+        restart = checkpoint.LatestCheckpoint(arguments.checkpoint,model)
+        if restart is not None:
+            print('Restarting from checkpoint %d at time %g' % (restart['checkpointNumber'],restart['time']))
+    model.Solve(exporters=exporters,restart=restart)
+    model.Export("./results/CantileverGrowth")
+    print(model.TimingReport())
+    if trace is not None:
+        trace.Close()
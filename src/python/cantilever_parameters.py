@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief The parameters of a cantilever growth run: the option constants, the defaults and the merging of overrides. Kept apart from cantilever_growth.py so that they can be used without importing iron.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import os
+
+CONSTANT_LAGRANGE = 0
+LINEAR_LAGRANGE = 1
+QUADRATIC_LAGRANGE = 2
+CUBIC_LAGRANGE = 3
+
+FD_JACOBIAN = 1
+EQUATIONS_JACOBIAN = 2
+
+NODAL_FORCE = 1
+TOTAL_FORCE = 2
+
+AUTOMATIC_LINEAR_SOLVER = 0
+DIRECT_LINEAR_SOLVER = 1
+GMRES_LINEAR_SOLVER = 2
+BICGSTAB_LINEAR_SOLVER = 3
+
+NO_PRECONDITIONER = 0
+JACOBI_PRECONDITIONER = 1
+BLOCK_JACOBI_PRECONDITIONER = 2
+ADDITIVE_SCHWARZ_PRECONDITIONER = 3
+INCOMPLETE_LU_PRECONDITIONER = 4
+
+FIXED_TIME_STEPPING = 1
+ADAPTIVE_TIME_STEPPING = 2
+
+STANDARD_MEMORY = 1
+LEAN_MEMORY = 2
+
+# The directory holding the CellML models and the models used for the growth and constituative laws
+cellMLDirectory = os.path.dirname(os.path.abspath(__file__))
+growthCellMLFileName = 'stressgrowth.cellml'
+constituativeCellMLFileName = 'mooneyrivlin.cellml'
+
+# The default parameters of a run. Any of these can be overridden when calling SolveCantilever.
+defaultParameters = {
+    # Set the physical size of the cantilever
+    'width':10.0,
+    'length':30.0,
+    'height':10.0,
+    # Set the number of elements in the cantilever
+    'numberOfGlobalXElements':1,
+    'numberOfGlobalYElements':1,
+    'numberOfGlobalZElements':3,
+    # Set the interpolation
+    'uInterpolation':QUADRATIC_LAGRANGE,
+    'pInterpolation':LINEAR_LAGRANGE,
+    # Set the growth rates
+    'fibreRate':0.001, #Or x direction growth
+    'sheetRate':0.1, #Or y direction growth
+    'normalRate':0.05, #Or z direction growth
+    # Set the similation times.
+    'startTime':0.0,
+    'stopTime':3.0,
+    'timeIncrement':1.0,
+    # Set how the time loop is stepped. FIXED_TIME_STEPPING takes steps of timeIncrement. ADAPTIVE_TIME_STEPPING starts
+    # with timeIncrement and after each step scales the increment so that the next step takes about
+    # targetNewtonIterations Newton iterations and changes no growth stretch by more than targetLambdaChange, by at
+    # most maximumIncrementFactor either way and within minimumTimeIncrement and maximumTimeIncrement. A step that fails
+    # to converge is solved again from the state before it with half the increment.
+    'timeSteppingType':FIXED_TIME_STEPPING,
+    'minimumTimeIncrement':0.01,
+    'maximumTimeIncrement':3.0,
+    'targetNewtonIterations':4,
+    'targetLambdaChange':0.05,
+    'maximumIncrementFactor':2.0,
+    # Ramp the tip force linearly from zero to force over the first loadRampTime of the simulation. Zero applies the
+    # full force from the first step.
+    'loadRampTime':0.0,
+    # materials parameters
+    'c1':2.0,
+    'c2':6.0,
+    'force':-0.3,
+    # Set how the force is applied to the tip edge. NODAL_FORCE applies force at every node on the edge. TOTAL_FORCE
+    # distributes force over the edge nodes as a uniform line load so that the load does not change with refinement.
+    'forceType':NODAL_FORCE,
+    'pInit':-6.0,
+    'pRef':0.0,
+    # Set iron's Newton Jacobian calculation type. FD_JACOBIAN finite differences the global residual, with the
+    # perturbations coloured by PETSc. EQUATIONS_JACOBIAN has the equations set assemble element Jacobians, which iron
+    # also calculates by finite differences for finite elasticity with CellML. There is no analytic Jacobian mode, the
+    # tangent in mooney_rivlin.py is only used for checking. "jacobian_check.py --solve" compares the two types.
+    'jacobianCalculationType':FD_JACOBIAN,
+    # Set the Newton tolerances
+    'newtonAbsoluteTolerance':1e-11,
+    'newtonSolutionTolerance':1e-11,
+    'newtonRelativeTolerance':1e-11,
+    # Set the linear solver used for the Newton updates. AUTOMATIC_LINEAR_SOLVER uses the direct solver on one
+    # computational node and for up to directSolverMaximumDofs DOFs, and GMRES above that in parallel, where the fill-in
+    # of the factorisation of the mixed displacement-pressure system makes the direct solver too slow and too large.
+    # BICGSTAB_LINEAR_SOLVER needs less memory than GMRES but can break down on the indefinite saddle point system.
+    'linearSolverType':AUTOMATIC_LINEAR_SOLVER,
+    'directSolverMaximumDofs':20000,
+    # Set the preconditioner of the iterative solvers. iron only offers point and incomplete factorisation
+    # preconditioners, with no field split or subdomain LU, and every incomplete factorisation of the saddle point
+    # system can meet a zero pivot in the pressure block: INCOMPLETE_LU_PRECONDITIONER on the whole matrix, and
+    # BLOCK_JACOBI_PRECONDITIONER and ADDITIVE_SCHWARZ_PRECONDITIONER on each domain, which on one process is the whole
+    # matrix too. ADDITIVE_SCHWARZ_PRECONDITIONER is the default as its overlapping domains need fewer iterations in
+    # parallel than block Jacobi. An iterative solver set explicitly for a serial run may need DIRECT_LINEAR_SOLVER
+    # instead.
+    'preconditionerType':ADDITIVE_SCHWARZ_PRECONDITIONER,
+    # The iterative solve of each Newton update stops once the linear residual is below linearForcingTerm times the
+    # Newton residual, or below a tenth of the Newton absolute tolerance so the last Newton iterations are still
+    # resolved.
+    'linearForcingTerm':1e-6,
+    'linearMaximumIterations':2000,
+    'gmresRestart':200,
+    # Set how much the model keeps in memory. The equations set reads every dependent field variable and CellML field
+    # and iron evaluates the strain and stress in each residual evaluation, so iron's fields and work are the same in
+    # both modes and only the model's own arrays differ. STANDARD_MEMORY keeps the node numbers of the whole mesh and the
+    # reference coordinates of the local nodes, and reads the strain and stress from iron at every step output.
+    # LEAN_MEMORY drops both once the boundary conditions are set, reading the reference coordinates from the geometric
+    # field again at each output, and only reads the strain and stress every derivedOutputInterval accepted steps and at
+    # the stop time, zero for the stop time only.
+    'memoryMode':STANDARD_MEMORY,
+    'derivedOutputInterval':1,
+    }
+
+# The parameters that can be changed on a built model with CantileverGrowthModel.Update. Changing any other parameter
+# needs a new model.
+updatableParameters = ['fibreRate','sheetRate','normalRate','c1','c2','force','forceType','pInit','pRef',
+                       'startTime','stopTime','timeIncrement','timeSteppingType','minimumTimeIncrement',
+                       'maximumTimeIncrement','targetNewtonIterations','targetLambdaChange','maximumIncrementFactor',
+                       'loadRampTime','derivedOutputInterval']
+
+# Merge parameter overrides with the defaults, checking that every override is a known parameter
+def CantileverParameters(parameters={}):
+    unknownParameters = set(parameters)-set(defaultParameters)
+    if unknownParameters:
+        raise ValueError('Unknown cantilever parameters: '+', '.join(sorted(unknownParameters)))
+    mergedParameters = dict(defaultParameters)
+    for name,value in parameters.items():
+        # Keep integer parameters such as element counts and interpolations integer
+        if isinstance(defaultParameters[name],int):
+            mergedParameters[name] = int(float(value))
+        else:
+            mergedParameters[name] = float(value)
+    return mergedParameters
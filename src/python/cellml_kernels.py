@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Compiles CellML 1.0 models into vectorised NumPy kernels that evaluate every Gauss point of a mesh in one call, caching the generated code on disk by the hash of the CellML file.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, hashlib, importlib.util, keyword, os, sys, time
+import xml.etree.ElementTree as ElementTree
+
+import numpy
+
+cellMLNamespace = 'http://www.cellml.org/cellml/1.0#'
+mathMLNamespace = 'http://www.w3.org/1998/Math/MathML'
+
+# Bump when the generated code changes so that kernels cached by an older generator are not reused
+generatorVersion = 1
+
+# The directory holding the generated kernels, overridden by the CELLML_KERNEL_CACHE environment variable
+defaultCacheDirectory = os.environ.get('CELLML_KERNEL_CACHE',
+                                       os.path.join(os.path.expanduser('~'),'.cache','cantilever_growth','cellml'))
+
+# Names used by the generated code that variables must not shadow
+reservedNames = set(['numpy','time','states','parameters','rates','algebraic','shape'])
+
+# The NumPy translations of the MathML operators. Operators with a format string take a fixed number of arguments,
+# the n-ary ones are joined by their infix operator.
+infixOperators = {'plus':' + ','times':' * ','and':' & ','or':' | '}
+functionOperators = {
+    'divide':'(%s / %s)',
+    'power':'numpy.power(%s,%s)',
+    'exp':'numpy.exp(%s)',
+    'ln':'numpy.log(%s)',
+    'abs':'numpy.abs(%s)',
+    'floor':'numpy.floor(%s)',
+    'ceiling':'numpy.ceil(%s)',
+    'sin':'numpy.sin(%s)',
+    'cos':'numpy.cos(%s)',
+    'tan':'numpy.tan(%s)',
+    'sinh':'numpy.sinh(%s)',
+    'cosh':'numpy.cosh(%s)',
+    'tanh':'numpy.tanh(%s)',
+    'arcsin':'numpy.arcsin(%s)',
+    'arccos':'numpy.arccos(%s)',
+    'arctan':'numpy.arctan(%s)',
+    'not':'numpy.logical_not(%s)',
+    'eq':'(%s == %s)',
+    'neq':'(%s != %s)',
+    'lt':'(%s < %s)',
+    'gt':'(%s > %s)',
+    'leq':'(%s <= %s)',
+    'geq':'(%s >= %s)',
+    }
+constantElements = {'pi':'numpy.pi','exponentiale':'numpy.e','notanumber':'numpy.nan','infinity':'numpy.inf',
+                    'true':'True','false':'False'}
+
+def LocalName(element):
+    return element.tag.rsplit('}',1)[-1]
+
+# The variables of a CellML model and its equations, with connected variables merged. Each set of connected variables
+# is named after its source, the variable that is not an input of its component, as "component/variable" like iron
+# names them. Equations are (kind, variable, MathML expression) tuples where kind is 'rate' for an ODE and 'algebraic'
+# for an assignment.
+class CellMLModel(object):
+
+    def __init__(self,fileName):
+        self.fileName = fileName
+        root = ElementTree.parse(fileName).getroot()
+        if (root.tag != '{%s}model' % cellMLNamespace):
+            raise ValueError('%s is not a CellML 1.0 model' % fileName)
+        self.name = root.get('name')
+
+        # Read the variables of every component and merge connected variables
+        variables = {}
+        parents = {}
+        for component in root.findall('{%s}component' % cellMLNamespace):
+            for variable in component.findall('{%s}variable' % cellMLNamespace):
+                key = (component.get('name'),variable.get('name'))
+                variables[key] = variable
+                parents[key] = key
+        def Root(key):
+            while parents[key] != key:
+                parents[key] = parents[parents[key]]
+                key = parents[key]
+            return key
+        for connection in root.findall('{%s}connection' % cellMLNamespace):
+            components = connection.find('{%s}map_components' % cellMLNamespace)
+            for mapping in connection.findall('{%s}map_variables' % cellMLNamespace):
+                first = Root((components.get('component_1'),mapping.get('variable_1')))
+                second = Root((components.get('component_2'),mapping.get('variable_2')))
+                parents[first] = second
+
+        # Name each set of connected variables after its source and take the initial value from it
+        self.names = {}
+        self.initialValues = {}
+        self.order = []
+        sources = {}
+        for key,variable in variables.items():
+            if (variable.get('public_interface') != 'in' and variable.get('private_interface') != 'in'):
+                sources[Root(key)] = key
+        for key in variables:
+            group = Root(key)
+            source = sources.get(group,group)
+            name = '%s/%s' % source
+            self.names[key] = name
+            if name not in self.initialValues:
+                self.order.append(name)
+                initialValue = variables[source].get('initial_value')
+                self.initialValues[name] = float(initialValue) if initialValue is not None else float('nan')
+        self.aliases = dict(('%s/%s' % key,name) for key,name in self.names.items())
+
+        # Read the equations of every component
+        self.equations = []
+        self.boundVariable = None
+        for component in root.findall('{%s}component' % cellMLNamespace):
+            componentName = component.get('name')
+            for math in component.findall('{%s}math' % mathMLNamespace):
+                for equation in math:
+                    self.ReadEquation(componentName,equation)
+
+    # Read one <apply><eq/> lhs rhs</apply> equation
+    def ReadEquation(self,componentName,equation):
+        children = list(equation)
+        if (LocalName(equation) != 'apply' or len(children) != 3 or LocalName(children[0]) != 'eq'):
+            raise ValueError('Unsupported equation in component %s of %s' % (componentName,self.fileName))
+        leftHandSide = children[1]
+        if (LocalName(leftHandSide) == 'ci'):
+            self.equations.append(('algebraic',self.names[(componentName,leftHandSide.text.strip())],
+                                   componentName,children[2]))
+        elif (LocalName(leftHandSide) == 'apply' and LocalName(leftHandSide[0]) == 'diff'):
+            boundVariable = self.names[(componentName,leftHandSide.find('{%s}bvar/{%s}ci' % (mathMLNamespace,
+                                                                                               mathMLNamespace)).text.strip())]
+            if (self.boundVariable is not None and boundVariable != self.boundVariable):
+                raise ValueError('%s has more than one bound variable' % self.fileName)
+            self.boundVariable = boundVariable
+            self.equations.append(('rate',self.names[(componentName,leftHandSide[-1].text.strip())],
+                                   componentName,children[2]))
+        else:
+            raise ValueError('Unsupported left hand side in component %s of %s' % (componentName,self.fileName))
+
+# Translate a MathML expression into a NumPy expression, naming variables with identifiers
+def Expression(element,componentName,model,identifiers):
+    tag = LocalName(element)
+    if (tag == 'ci'):
+        return identifiers[model.names[(componentName,element.text.strip())]]
+    if (tag == 'cn'):
+        if (element.get('type') == 'e-notation'):
+            mantissa = element.text.strip()
+            exponent = list(element)[0].tail.strip()
+            return repr(float('%se%s' % (mantissa,exponent)))
+        return repr(float(element.text.strip()))
+    if tag in constantElements:
+        return constantElements[tag]
+    if (tag == 'piecewise'):
+        conditions = []
+        values = []
+        otherwise = 'numpy.nan'
+        for piece in element:
+            if (LocalName(piece) == 'piece'):
+                values.append(Expression(piece[0],componentName,model,identifiers))
+                conditions.append(Expression(piece[1],componentName,model,identifiers))
+            elif (LocalName(piece) == 'otherwise'):
+                otherwise = Expression(piece[0],componentName,model,identifiers)
+        return 'numpy.select([%s],[%s],%s)' % (','.join(conditions),','.join(values),otherwise)
+    if (tag != 'apply'):
+        raise ValueError('Unsupported MathML element %s in %s' % (tag,model.fileName))
+
+    operator = LocalName(element[0])
+    qualifiers = dict((LocalName(child),child) for child in element[1:]
+                      if LocalName(child) in ['degree','logbase','bvar'])
+    arguments = [Expression(child,componentName,model,identifiers) for child in element[1:]
+                 if LocalName(child) not in ['degree','logbase','bvar']]
+    if (operator == 'minus'):
+        if (len(arguments) == 1):
+            return '(-%s)' % arguments[0]
+        return '(%s - %s)' % tuple(arguments)
+    if operator in infixOperators:
+        if (len(arguments) == 1):
+            return arguments[0]
+        return '(%s)' % infixOperators[operator].join(arguments)
+    if (operator == 'root'):
+        if 'degree' in qualifiers:
+            return 'numpy.power(%s,1.0/%s)' % (arguments[0],Expression(qualifiers['degree'][0],componentName,model,
+                                                                       identifiers))
+        return 'numpy.sqrt(%s)' % arguments[0]
+    if (operator == 'log'):
+        if 'logbase' in qualifiers:
+            return '(numpy.log(%s)/numpy.log(%s))' % (arguments[0],Expression(qualifiers['logbase'][0],componentName,
+                                                                              model,identifiers))
+        return 'numpy.log10(%s)' % arguments[0]
+    if operator in ['min','max']:
+        function = 'numpy.minimum' if (operator == 'min') else 'numpy.maximum'
+        expression = arguments[0]
+        for argument in arguments[1:]:
+            expression = '%s(%s,%s)' % (function,expression,argument)
+        return expression
+    if operator in functionOperators:
+        return functionOperators[operator] % tuple(arguments)
+    raise ValueError('Unsupported MathML operator %s in %s' % (operator,model.fileName))
+
+# Get the names of the variables an expression uses
+def ExpressionVariables(element,componentName,model):
+    return set(model.names[(componentName,ci.text.strip())] for ci in element.iter('{%s}ci' % mathMLNamespace))
+
+# Generate the source of a kernel module for a CellML model. The module's Compute(time,states,parameters) takes the
+# states (..., numberOfStates) and parameters (..., numberOfParameters) of any number of points, and a time that
+# broadcasts against them, and returns the rates (..., numberOfStates) and algebraic variables
+# (..., numberOfAlgebraic) of every point at once.
+def GenerateKernel(model,sourceHash=''):
+    rateEquations = [equation for equation in model.equations if (equation[0] == 'rate')]
+    algebraicEquations = dict((equation[1],equation) for equation in model.equations if (equation[0] == 'algebraic'))
+    stateNames = [equation[1] for equation in rateEquations]
+    parameterNames = [name for name in model.order
+                      if name not in stateNames and name not in algebraicEquations and name != model.boundVariable]
+
+    # Give each variable a Python identifier, the bare variable name where that is unique
+    identifiers = {}
+    variableNames = [name.split('/',1)[1] for name in model.order]
+    for name in model.order:
+        variableName = name.split('/',1)[1]
+        identifier = variableName
+        if (variableNames.count(variableName) > 1 or identifier in reservedNames or keyword.iskeyword(identifier) or
+                not identifier.isidentifier()):
+            identifier = 'v_'+''.join(character if character.isalnum() else '_' for character in name)
+        identifiers[name] = identifier
+    if model.boundVariable is not None:
+        identifiers[model.boundVariable] = 'time'
+
+    # Order the algebraic equations so that every variable is calculated before it is used
+    algebraicNames = []
+    remaining = dict((name,ExpressionVariables(equation[3],equation[2],model) & set(algebraicEquations))
+                     for name,equation in algebraicEquations.items())
+    while remaining:
+        ready = [name for name in model.order if name in remaining and not (remaining[name]-set(algebraicNames))]
+        if not ready:
+            raise ValueError('%s has an algebraic loop between %s' % (model.fileName,', '.join(sorted(remaining))))
+        for name in ready:
+            algebraicNames.append(name)
+            del remaining[name]
+
+    lines = ['# Generated from %s by cellml_kernels.py, do not edit' % os.path.basename(model.fileName),
+             'import numpy',
+             '',
+             'modelName = %r' % model.name,
+             'sourceHash = %r' % sourceHash,
+             'stateNames = %r' % stateNames,
+             'parameterNames = %r' % parameterNames,
+             'algebraicNames = %r' % algebraicNames,
+             'boundVariable = %r' % model.boundVariable,
+             'aliases = %r' % model.aliases,
+             'initialStates = %r' % [model.initialValues[name] for name in stateNames],
+             'parameterDefaults = %r' % [model.initialValues[name] for name in parameterNames],
+             '',
+             'def Compute(time,states,parameters):']
+    for stateIdx,name in enumerate(stateNames):
+        lines.append('    %s = states[...,%d]' % (identifiers[name],stateIdx))
+    for parameterIdx,name in enumerate(parameterNames):
+        lines.append('    %s = parameters[...,%d]' % (identifiers[name],parameterIdx))
+    for name in algebraicNames:
+        equation = algebraicEquations[name]
+        lines.append('    %s = %s' % (identifiers[name],Expression(equation[3],equation[2],model,identifiers)))
+    lines.append('    shape = numpy.broadcast(time,states[...,:1],parameters[...,:1]).shape[:-1]')
+    lines.append('    rates = numpy.empty(shape+(%d,))' % len(stateNames))
+    for stateIdx,equation in enumerate(rateEquations):
+        lines.append('    rates[...,%d] = %s' % (stateIdx,Expression(equation[3],equation[2],model,identifiers)))
+    lines.append('    algebraic = numpy.empty(shape+(%d,))' % len(algebraicNames))
+    for algebraicIdx,name in enumerate(algebraicNames):
+        lines.append('    algebraic[...,%d] = %s' % (algebraicIdx,identifiers[name]))
+    lines.append('    return rates,algebraic')
+    return '\n'.join(lines)+'\n'
+
+# A compiled CellML model. Arrays of states and parameters hold one point per row (any leading shape, e.g. elements x
+# Gauss points) and one column per state or parameter in the order of stateNames and parameterNames. Variables can be
+# named by any of their connected "component/variable" names.
+class CellMLKernel(object):
+
+    def __init__(self,module,fileName=None):
+        self.module = module
+        self.fileName = fileName
+        self.stateNames = module.stateNames
+        self.parameterNames = module.parameterNames
+        self.algebraicNames = module.algebraicNames
+        self.aliases = module.aliases
+
+    # Find which kind of variable a name is and its column
+    def Locate(self,name):
+        name = self.aliases.get(name,name)
+        for kind,names in [('state',self.stateNames),('parameter',self.parameterNames),
+                           ('algebraic',self.algebraicNames)]:
+            if name in names:
+                return kind,names.index(name)
+        raise KeyError('%s is not a variable of %s' % (name,self.module.modelName))
+
+    # The initial states of points with the given leading shape
+    def InitialStates(self,shape=()):
+        states = numpy.empty(tuple(numpy.atleast_1d(shape).astype(int))+(len(self.stateNames),))
+        states[...] = self.module.initialStates
+        return states
+
+    # The parameters of points with the given leading shape, the CellML initial values overridden by values, a
+    # dictionary from names to scalars or arrays that broadcast against the shape
+    def Parameters(self,shape=(),values={}):
+        parameters = numpy.empty(tuple(numpy.atleast_1d(shape).astype(int))+(len(self.parameterNames),))
+        parameters[...] = self.module.parameterDefaults
+        for name,value in values.items():
+            kind,index = self.Locate(name)
+            if (kind != 'parameter'):
+                raise KeyError('%s is a %s variable, not a parameter, of %s' % (name,kind,self.module.modelName))
+            parameters[...,index] = value
+        return parameters
+
+    # Evaluate the rates and algebraic variables of every point in one call
+    def Compute(self,states,parameters,time=0.0):
+        return self.module.Compute(time,numpy.asarray(states,dtype=float),numpy.asarray(parameters,dtype=float))
+
+    # Evaluate the named state, parameter or algebraic variables (..., len(names)) of every point
+    def Evaluate(self,names,states,parameters,time=0.0):
+        rates,algebraic = self.Compute(states,parameters,time)
+        arrays = {'state':numpy.asarray(states,dtype=float),'parameter':numpy.asarray(parameters,dtype=float),
+                  'algebraic':algebraic}
+        columns = []
+        for name in names:
+            kind,index = self.Locate(name)
+            columns.append(numpy.broadcast_to(arrays[kind][...,index],algebraic.shape[:-1]))
+        return numpy.stack(columns,axis=-1)
+
+    # Integrate the states of every point from startTime to stopTime with forward Euler steps of timeStep, the
+    # integrator iron uses for the growth ODEs by default
+    def Integrate(self,states,parameters,startTime,stopTime,timeStep):
+        states = numpy.array(states,dtype=float)
+        currentTime = startTime
+        while (currentTime < stopTime-1e-12*max(1.0,abs(stopTime))):
+            step = min(timeStep,stopTime-currentTime)
+            rates,algebraic = self.Compute(states,parameters,currentTime)
+            states = states+step*rates
+            currentTime += step
+        return states
+
+# Hash a CellML file together with the generator version
+def SourceHash(fileName):
+    digest = hashlib.sha256(('cellml_kernels %d\n' % generatorVersion).encode())
+    with open(fileName,'rb') as cellMLFile:
+        digest.update(cellMLFile.read())
+    return digest.hexdigest()
+
+# The kernels compiled in this process, keyed by the hash of their CellML file
+loadedKernels = {}
+
+# Compile a CellML file into a CellMLKernel. The generated module is written to cacheDirectory under the hash of the
+# CellML file and reused by later runs, and by other processes, until the file changes.
+def CompileCellML(fileName,cacheDirectory=None):
+    sourceHash = SourceHash(fileName)
+    if sourceHash in loadedKernels:
+        return loadedKernels[sourceHash]
+    if cacheDirectory is None:
+        cacheDirectory = defaultCacheDirectory
+    modelName = os.path.splitext(os.path.basename(fileName))[0]
+    moduleFileName = os.path.join(cacheDirectory,'%s_%s.py' % (modelName,sourceHash[:20]))
+    if not os.path.exists(moduleFileName):
+        source = GenerateKernel(CellMLModel(fileName),sourceHash)
+        os.makedirs(cacheDirectory,exist_ok=True)
+        # Write under a unique name and rename so that concurrent jobs never read a partial module
+        temporaryFileName = '%s.%d.tmp' % (moduleFileName,os.getpid())
+        with open(temporaryFileName,'w') as moduleFile:
+            moduleFile.write(source)
+        os.replace(temporaryFileName,moduleFileName)
+    specification = importlib.util.spec_from_file_location('cellml_kernel_%s' % sourceHash[:20],moduleFileName)
+    module = importlib.util.module_from_spec(specification)
+    specification.loader.exec_module(module)
+    kernel = CellMLKernel(module,fileName)
+    loadedKernels[sourceHash] = kernel
+    return kernel
+
+# Time evaluating numberOfPoints points in one batched call against one call per point, as iron evaluates them, and
+# check that both give the same results. The states and parameters are the CellML initial values perturbed by a
+# random relative 1%, with the diagonal of any right Cauchy-Green tensor C set around one.
+def Benchmark(kernel,numberOfPoints,repeats=3):
+    random = numpy.random.RandomState(0)
+    states = kernel.InitialStates(numberOfPoints)*(1.0+0.01*random.standard_normal((numberOfPoints,
+                                                                                     len(kernel.stateNames))))
+    parameters = kernel.Parameters(numberOfPoints)
+    for parameterIdx,name in enumerate(kernel.parameterNames):
+        variableName = name.split('/',1)[1]
+        if variableName in ['C11','C22','C33']:
+            parameters[:,parameterIdx] = 1.0
+    parameters += 0.01*numpy.abs(parameters+0.1)*random.standard_normal(parameters.shape)
+
+    batchedTimes = []
+    for repeatIdx in range(repeats):
+        startTime = time.time()
+        batchedRates,batchedAlgebraic = kernel.Compute(states,parameters)
+        batchedTimes.append(time.time()-startTime)
+    startTime = time.time()
+    pointRates = numpy.empty_like(batchedRates)
+    pointAlgebraic = numpy.empty_like(batchedAlgebraic)
+    for pointIdx in range(numberOfPoints):
+        pointRates[pointIdx],pointAlgebraic[pointIdx] = kernel.Compute(states[pointIdx],parameters[pointIdx])
+    pointTime = time.time()-startTime
+    maximumDifference = max(numpy.abs(batchedRates-pointRates).max(initial=0.0),
+                            numpy.abs(batchedAlgebraic-pointAlgebraic).max(initial=0.0))
+    return {'numberOfPoints':numberOfPoints,'batchedTime':min(batchedTimes),'pointTime':pointTime,
+            'maximumDifference':maximumDifference}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile CellML models into vectorised NumPy kernels.')
+    parser.add_argument('cellml',nargs='+',help='CellML 1.0 files to compile')
+    parser.add_argument('--cache-directory',default=None,
+                        help='directory for the generated kernels (default %s)' % defaultCacheDirectory)
+    parser.add_argument('--source',action='store_true',help='print the generated code')
+    parser.add_argument('--benchmark',type=int,default=0,metavar='POINTS',
+                        help='time a batched evaluation of this many points against one evaluation per point')
+    arguments = parser.parse_args()
+
+    for fileName in arguments.cellml:
+        kernel = CompileCellML(fileName,arguments.cache_directory)
+        print('%s: %d states, %d parameters, %d algebraic variables' % (fileName,len(kernel.stateNames),
+                                                                        len(kernel.parameterNames),
+                                                                        len(kernel.algebraicNames)))
+        if arguments.source:
+            with open(kernel.module.__file__) as moduleFile:
+                print(moduleFile.read())
+        if (arguments.benchmark > 0):
+            result = Benchmark(kernel,arguments.benchmark)
+            print('  %d points: batched %.6f s, per point %.6f s, speedup %.1fx, maximum difference %.3e' %
+                  (result['numberOfPoints'],result['batchedTime'],result['pointTime'],
+                   result['pointTime']/max(result['batchedTime'],1e-12),result['maximumDifference']))
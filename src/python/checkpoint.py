@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Writes periodic binary checkpoints of the solution state of a cantilever growth solve and finds the latest one to restart from.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import json, os, re
+
+import numpy
+
+import parallel
+
+checkpointPattern = re.compile(r'^checkpoint_(\d+)\.part(\d+)\.npz$')
+
+# The file of checkpoint number checkpointNumber of a computational node
+def CheckpointFileName(directory,checkpointNumber,computationalNodeNumber):
+    return os.path.join(directory,'checkpoint_%06d.part%d.npz' % (checkpointNumber,computationalNodeNumber))
+
+# The numbers of the checkpoints of a computational node in a directory, in increasing order
+def CheckpointNumbers(directory,computationalNodeNumber):
+    if not os.path.isdir(directory):
+        return []
+    numbers = []
+    for fileName in os.listdir(directory):
+        match = checkpointPattern.match(fileName)
+        if match and int(match.group(2)) == computationalNodeNumber:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+# Write the state of a model at time to a checkpoint file. The DOF arrays are written uncompressed in one binary file
+# per computational node, which is written under a temporary name and renamed so that a job killed while writing
+# leaves the previous checkpoint intact.
+def WriteCheckpoint(fileName,model,time):
+    arrays = model.CheckpointArrays()
+    temporaryFileName = fileName+'.tmp'
+    with open(temporaryFileName,'wb') as checkpointFile:
+        numpy.savez(checkpointFile,time=numpy.float64(time),timeIncrement=numpy.float64(model.nextTimeIncrement),
+                    stepNumber=numpy.int64(model.stepNumber),
+                    numberOfComputationalNodes=numpy.int64(model.numberOfComputationalNodes),
+                    parameters=numpy.array(json.dumps(model.parameters,sort_keys=True)),
+                    **dict(('array_'+name,array) for name,array in arrays.items()))
+    os.replace(temporaryFileName,fileName)
+
+# Read a checkpoint file. Returns a dictionary of the time, the increment of the next step, the number of accepted steps
+# up to the time, the model parameters, the number of computational nodes and the DOF arrays.
+def ReadCheckpoint(fileName):
+    with numpy.load(fileName) as checkpointFile:
+        return {
+            'time':float(checkpointFile['time']),
+            'timeIncrement':float(checkpointFile['timeIncrement']),
+            'stepNumber':int(checkpointFile['stepNumber']),
+            'numberOfComputationalNodes':int(checkpointFile['numberOfComputationalNodes']),
+            'parameters':json.loads(str(checkpointFile['parameters'])),
+            'arrays':dict((name[len('array_'):],checkpointFile[name]) for name in checkpointFile.files
+                          if name.startswith('array_')),
+            }
+
+# Find the latest checkpoint in a directory that every computational node has written and read this computational
+# node's part of it, checking that it was written by a model with the same parameters on the same number of
+# computational nodes. Returns None if there is no checkpoint.
+def LatestCheckpoint(directory,model):
+    numbers = CheckpointNumbers(directory,model.computationalNodeNumber)
+    latestNumber = numbers[-1] if numbers else -1
+    if (model.numberOfComputationalNodes > 1):
+        # The latest checkpoint of all the computational nodes is the earliest of their latest ones
+        latestNumber = int(-parallel.Maximum([-latestNumber],model.numberOfComputationalNodes)[0])
+    if (latestNumber < 0):
+        return None
+    checkpoint = ReadCheckpoint(CheckpointFileName(directory,latestNumber,model.computationalNodeNumber))
+    if (checkpoint['numberOfComputationalNodes'] != model.numberOfComputationalNodes):
+        raise ValueError('Checkpoint %d was written by %d computational nodes, not %d' %
+                         (latestNumber,checkpoint['numberOfComputationalNodes'],model.numberOfComputationalNodes))
+    changedParameters = [name for name in model.parameters if checkpoint['parameters'].get(name) != model.parameters[name]]
+    if changedParameters:
+        raise ValueError('Checkpoint %d was written with different %s' % (latestNumber,', '.join(sorted(changedParameters))))
+    checkpoint['checkpointNumber'] = latestNumber
+    return checkpoint
+
+# Writes a checkpoint of the model every stepInterval time steps, keeping the latest numberToKeep. Keep at least two in
+# a parallel run, a job killed while writing can leave some computational nodes one checkpoint behind the others.
+# Numbering carries on from any checkpoints already in the directory so that a restarted run adds to them, and the
+# step interval from the restored step.
+class CheckpointExporter(object):
+
+    def __init__(self,directory,stepInterval=1,numberToKeep=2):
+        self.directory = directory
+        self.stepInterval = stepInterval
+        self.numberToKeep = numberToKeep
+
+    def Start(self,model):
+        os.makedirs(self.directory,exist_ok=True)
+        numbers = CheckpointNumbers(self.directory,model.computationalNodeNumber)
+        self.checkpointNumber = numbers[-1] if numbers else 0
+        self.stepNumber = model.stepNumber
+
+    def Write(self,model,time):
+        self.stepNumber += 1
+        if self.stepNumber % self.stepInterval == 0:
+            self.checkpointNumber += 1
+            WriteCheckpoint(CheckpointFileName(self.directory,self.checkpointNumber,model.computationalNodeNumber),
+                            model,time)
+            for checkpointNumber in CheckpointNumbers(self.directory,model.computationalNodeNumber)[:-self.numberToKeep]:
+                os.remove(CheckpointFileName(self.directory,checkpointNumber,model.computationalNodeNumber))
+
+    def Finish(self,model):
+        pass
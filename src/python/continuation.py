@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Solves the cantilever growth problem along an ordered path of parameter values, starting the Newton iterations of each point from the solutions of the previous points.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, csv, sys
+
+import numpy
+
+import cantilever_growth
+import field_values
+import sweep
+
+from opencmiss.iron import iron
+
+# The columns written for every point after the parameter columns
+outputNames = ['status','start','newtonIterations','solveTime','coldNewtonIterations','coldSolveTime',
+               'tipDeflection','lambda1','lambda2','lambda3']
+
+# Records the dependent field U DOF values after every step of a solve so that they can seed the next solve
+class SolutionRecorder(object):
+
+    def Start(self,model):
+        self.times = []
+        self.solutions = []
+
+    def Write(self,model,time):
+        self.times.append(time)
+        self.solutions.append(field_values.ParameterSetData(model.dependentField,iron.FieldVariableTypes.U))
+
+    def Finish(self,model):
+        pass
+
+    # The recorded solution at a time, linearly interpolated between the recorded steps
+    def Solution(self,time):
+        stepIdx = int(numpy.searchsorted(self.times,time))
+        if (stepIdx == 0):
+            return self.solutions[0]
+        if (stepIdx == len(self.times)):
+            return self.solutions[-1]
+        weight = (time-self.times[stepIdx-1])/(self.times[stepIdx]-self.times[stepIdx-1])
+        return (1.0-weight)*self.solutions[stepIdx-1]+weight*self.solutions[stepIdx]
+
+# Check that every point of a path gives the same parameters. A parameter left out of one point would keep the value of
+# the point before it rather than its default, and the distance between points would be undefined.
+def CheckPathParameters(points):
+    names = set(points[0]) if points else set()
+    for pointIdx,point in enumerate(points):
+        if (set(point) != names):
+            raise ValueError('Every point of a path must give the same parameters: point %d gives %s but point 1 gives '
+                             '%s' % (pointIdx+1,', '.join(sorted(point)),', '.join(sorted(names))))
+
+# The initial guess of a point of the path: the solution of the previous point or, with two previous points, their
+# solutions linearly extrapolated by the distance to the point relative to the distance between them
+class PathGuess(object):
+
+    def __init__(self,previous,previousPoint,point,beforePrevious=None,beforePreviousPoint=None):
+        self.previous = previous
+        self.before = beforePrevious
+        self.extrapolation = 0.0
+        if beforePrevious is not None:
+            CheckPathParameters([beforePreviousPoint,previousPoint,point])
+            names = sorted(point)
+            step = numpy.array([point[name]-previousPoint[name] for name in names],dtype=float)
+            previousStep = numpy.array([previousPoint[name]-beforePreviousPoint[name] for name in names],dtype=float)
+            if (numpy.linalg.norm(previousStep) > 0.0):
+                self.extrapolation = numpy.linalg.norm(step)/numpy.linalg.norm(previousStep)
+
+    def __call__(self,time):
+        solution = self.previous.Solution(time)
+        if (self.before is not None and self.extrapolation > 0.0):
+            solution = solution+self.extrapolation*(solution-self.before.Solution(time))
+        return solution
+
+# Solve the points of a path in order on one model, seeding each point with the previous solutions. The points must all
+# give the same parameters and can only differ in the updatable parameters of the model. A seeded solve that fails or
+# does not converge is repeated from a cold start. With compareColdStarts every point is also solved from a cold start
+# to measure the saving. Returns a list of result dictionaries in point order.
+def SolvePath(points,extrapolate=True,compareColdStarts=False,echoMonitor=False):
+    CheckPathParameters(points)
+    model = cantilever_growth.CantileverGrowthModel(points[0]).Build()
+    recorders = []
+    results = []
+    try:
+        for pointIdx,point in enumerate(points):
+            model.Update(point)
+            result = {}
+            if compareColdStarts:
+                coldOutputs = model.Solve(echoMonitor)
+                result['coldNewtonIterations'] = coldOutputs['newtonIterations']
+                result['coldSolveTime'] = coldOutputs['solveTime']
+
+            guess = None
+            if (pointIdx >= 2 and extrapolate):
+                guess = PathGuess(recorders[-1],points[pointIdx-1],point,recorders[-2],points[pointIdx-2])
+            elif (pointIdx >= 1):
+                guess = PathGuess(recorders[-1],points[pointIdx-1],point)
+            recorder = SolutionRecorder()
+            outputs = None
+            if guess is not None:
+                result['start'] = 'extrapolated' if (guess.extrapolation > 0.0) else 'previous'
+                try:
+                    outputs = model.Solve(echoMonitor,exporters=[recorder],initialGuess=guess)
+                except RuntimeError:
+                    outputs = None
+                if (outputs is None or not outputs['converged']):
+                    result['start'] = 'cold fallback'
+                    outputs = None
+            else:
+                result['start'] = 'cold'
+            if outputs is None:
+                outputs = model.Solve(echoMonitor,exporters=[recorder])
+            result.update(outputs)
+            result['status'] = 'converged' if outputs['converged'] else 'diverged'
+            recorders.append(recorder)
+            results.append(result)
+            print('Point %d/%d: %s start, %d Newton iterations%s' %
+                  (pointIdx+1,len(points),result['start'],result['newtonIterations'],
+                   ' (%d from a cold start)' % result['coldNewtonIterations'] if compareColdStarts else ''))
+            sys.stdout.flush()
+    finally:
+        model.Destroy()
+    return results
+
+# Describe the Newton iterations and solve time saved against cold starts
+def SavingsReport(results):
+    compared = [result for result in results if 'coldNewtonIterations' in result]
+    if not compared:
+        return 'No cold start comparison'
+    warmIterations = sum(result['newtonIterations'] for result in compared)
+    coldIterations = sum(result['coldNewtonIterations'] for result in compared)
+    warmTime = sum(result['solveTime'] for result in compared)
+    coldTime = sum(result['coldSolveTime'] for result in compared)
+    return '\n'.join([
+        'Newton iterations: %d seeded, %d cold (%.1f%% saved)' %
+        (warmIterations,coldIterations,100.0*(1.0-float(warmIterations)/max(coldIterations,1))),
+        'Solve time: %.3f s seeded, %.3f s cold (%.1f%% saved)' %
+        (warmTime,coldTime,100.0*(1.0-warmTime/coldTime) if coldTime > 0.0 else 0.0),
+        'Cold start fallbacks: %d' % sum(1 for result in results if result['start'] == 'cold fallback')])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve the cantilever growth problem along a parameter path.')
+    inputGroup = parser.add_mutually_exclusive_group(required=True)
+    inputGroup.add_argument('--parameter',nargs='+',metavar=('NAME','VALUE'),
+                            help='parameter name followed by its values along the path')
+    inputGroup.add_argument('--samples',help='CSV file with one column per parameter and one row per point, in order')
+    parser.add_argument('-o','--output',default='continuation_results.csv',help='results CSV file')
+    parser.add_argument('--no-extrapolation',action='store_true',help='seed each point with the previous solution only')
+    parser.add_argument('--compare',action='store_true',help='also solve every point from a cold start')
+    arguments = parser.parse_args()
+
+    if arguments.parameter:
+        points = [{arguments.parameter[0]:float(value)} for value in arguments.parameter[1:]]
+    else:
+        points = sweep.ReadSamples(arguments.samples)
+    results = SolvePath(points,not arguments.no_extrapolation,arguments.compare)
+    parameterNames = sorted(set(name for point in points for name in point))
+    with open(arguments.output,'w') as resultsFile:
+        writer = csv.writer(resultsFile)
+        writer.writerow(['point']+parameterNames+outputNames)
+        for pointIdx,(point,result) in enumerate(zip(points,results)):
+            writer.writerow([pointIdx]+[point.get(name,'') for name in parameterNames]+
+                            [result.get(name,'') for name in outputNames])
+    print(SavingsReport(results))
@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Reads exnode and exelem files, including the partN files of parallel runs, into NumPy arrays and compares a run against expected results with per-field tolerances.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, glob, mmap, os, re, sys
+
+import numpy
+
+# Numbers are parsed in chunks of about this many bytes so large files never need a second full copy in memory
+chunkSize = 1 << 26
+
+# Default tolerances used by the comparison
+defaultAbsoluteTolerance = 1.0e-8
+defaultRelativeTolerance = 1.0e-6
+
+headerKeys = {'exnode':b'#Fields=','exelem':b'Shape.'}
+recordLabels = {
+    'exnode':[b'Node:'],
+    'exelem':[b'Element:',b'Values:',b'Nodes:',b'Scale factors:']}
+recordNumberPatterns = {
+    'exnode':re.compile(br'Node:\s*(\d+)'),
+    'exelem':re.compile(br'Element:\s*(\d+\s+\d+\s+\d+)')}
+fieldPattern = re.compile(r'^\s*\d+\)\s*([^,]+),.*#Components=\s*(\d+)')
+nodeComponentPattern = re.compile(r'^\s*(\S+)\.\s+Value index=\s*(\d+),\s*#Derivatives=\s*(\d+)[^,]*'
+                                  r'(?:,\s*#Versions=\s*(\d+))?')
+elementComponentPattern = re.compile(r'^\s*(\S+)\.\s+\S+,\s*[^,]*,\s*(grid|standard node) based')
+gridPattern = re.compile(r'#xi\d=\s*(\d+)')
+
+# Return the partN files of a parallel run for an output prefix in part order
+def PartPaths(prefix,extension):
+    partPattern = re.compile(r'\.part(\d+)\.%s$' % extension)
+    paths = [path for path in glob.glob('%s.part*.%s' % (glob.escape(prefix),extension)) if partPattern.search(path)]
+    return sorted(paths,key=lambda path: int(partPattern.search(path).group(1)))
+
+# Return the files written for an output prefix, either the single file prefix.extension or the partN files of a
+# parallel run in part order. A path that already ends in the extension is returned as it is.
+def ExfilePaths(prefix,extension):
+    if (prefix.endswith('.'+extension)):
+        return [prefix]
+    if (os.path.exists('%s.%s' % (prefix,extension))):
+        return ['%s.%s' % (prefix,extension)]
+    paths = PartPaths(prefix,extension)
+    if (len(paths) == 0):
+        raise IOError('No %s files found for %s' % (extension,prefix))
+    return paths
+
+# Split a mapped file into (header,start,end) sections where the records between start and end all follow the layout
+# of the header. Headers are found with plain searches, a regular expression over the whole file is far slower.
+def Sections(buffer,extension):
+    headerStarts = []
+    position = buffer.find(headerKeys[extension])
+    while (position >= 0):
+        lineStart = buffer.rfind(b'\n',0,position)+1
+        previousLineStart = buffer.rfind(b'\n',0,max(lineStart-1,0))+1
+        if (lineStart > 0 and buffer[previousLineStart:lineStart].strip().startswith(b'Group name:')):
+            lineStart = previousLineStart
+        headerStarts.append(lineStart)
+        nextRecord = buffer.find(recordLabels[extension][0],position)
+        position = buffer.find(headerKeys[extension],nextRecord) if (nextRecord >= 0) else -1
+    sections = []
+    for sectionIdx,headerStart in enumerate(headerStarts):
+        end = headerStarts[sectionIdx+1] if (sectionIdx+1 < len(headerStarts)) else len(buffer)
+        start = buffer.find(recordLabels[extension][0],headerStart,end)
+        if (start < 0):
+            start = end
+        sections.append((buffer[headerStart:start].decode(),start,end))
+    return sections
+
+# Parse the records between start and end into an array with one row of recordLength numbers per record. The text is
+# handed to NumPy's parser in chunks that end on a record boundary.
+def ParseRecords(buffer,start,end,labels,recordLength):
+    chunks = []
+    while (start < end):
+        chunkEnd = buffer.find(labels[0],min(start+chunkSize,end),end) if (start+chunkSize < end) else -1
+        if (chunkEnd < 0):
+            chunkEnd = end
+        text = buffer[start:chunkEnd]
+        for label in labels:
+            text = text.replace(label,b' ')
+        numbers = numpy.fromstring(text,sep=' ')
+        if (numbers.size%recordLength != 0):
+            raise ValueError('Records do not match their header near byte %d' % start)
+        chunks.append(numbers.reshape(-1,recordLength))
+        start = chunkEnd
+    if (len(chunks) == 0):
+        return numpy.zeros((0,recordLength))
+    return numpy.concatenate(chunks)
+
+# Read the fields and their components from an exnode header. Each component is [name,value index,number of values].
+def NodeHeaderFields(header):
+    fields = []
+    for line in header.splitlines():
+        fieldMatch = fieldPattern.match(line)
+        componentMatch = nodeComponentPattern.match(line)
+        if (fieldMatch):
+            fields.append((fieldMatch.group(1).strip(),[]))
+        elif (componentMatch):
+            numberOfVersions = int(componentMatch.group(4)) if componentMatch.group(4) else 1
+            fields[-1][1].append([componentMatch.group(1),int(componentMatch.group(2)),
+                                  (int(componentMatch.group(3))+1)*numberOfVersions])
+    return fields
+
+# Read the grid based fields, the number of element nodes and the number of scale factors from an exelem header. Each
+# grid based field is (name,component names,number of grid points).
+def ElementHeaderFields(header):
+    fields = []
+    numberOfNodes = 0
+    numberOfScaleFactors = 0
+    lines = header.splitlines()
+    for lineIdx,line in enumerate(lines):
+        fieldMatch = fieldPattern.match(line)
+        componentMatch = elementComponentPattern.match(line)
+        if (fieldMatch):
+            fields.append((fieldMatch.group(1).strip(),[],[]))
+        elif (componentMatch):
+            fields[-1][1].append(componentMatch.group(1))
+            if (componentMatch.group(2) == 'grid'):
+                numberOfGridPoints = 1
+                for numberOfXi in gridPattern.findall(lines[lineIdx+1]):
+                    numberOfGridPoints *= int(numberOfXi)+1
+                fields[-1][2].append(numberOfGridPoints)
+        elif (line.strip().startswith('#Nodes=') and len(fields) == 0):
+            numberOfNodes = int(line.split('=')[1])
+        elif ('#Scale factors=' in line):
+            numberOfScaleFactors += int(line.split('#Scale factors=')[1])
+    gridFields = [(name,components,gridPoints[0]) for name,components,gridPoints in fields if (len(gridPoints) > 0)]
+    return gridFields,numberOfNodes,numberOfScaleFactors
+
+# Gather per-section arrays into one array per field ordered by entity number. Entities missing a field are NaN and an
+# entity written by several parts (shared nodes of a parallel run) is taken from the first part.
+def MergeSections(numbers,sectionFields,shapes):
+    allNumbers = numpy.concatenate(numbers) if (len(numbers) > 0) else numpy.zeros(0,dtype=numpy.int64)
+    uniqueNumbers,firstIdx = numpy.unique(allNumbers,return_index=True)
+    fields = {}
+    for name,shape in shapes.items():
+        merged = numpy.full((len(allNumbers),)+shape,numpy.nan)
+        offset = 0
+        for sectionNumbers,values in zip(numbers,sectionFields):
+            if (name in values):
+                merged[offset:offset+len(sectionNumbers)] = values[name]
+            offset += len(sectionNumbers)
+        fields[name] = merged[firstIdx]
+    return uniqueNumbers,fields
+
+# Read the nodal values of the exnode file or partN files for an output prefix. Returns the sorted node numbers, a
+# dictionary mapping each field name to a (nodes,components) array of nodal values (derivatives and further versions
+# are skipped) and a dictionary of component names.
+def ReadExnode(prefix):
+    numbers = []
+    sectionFields = []
+    shapes = {}
+    componentNames = {}
+    for path in ExfilePaths(prefix,'exnode'):
+        with open(path,'rb') as exnodeFile:
+            buffer = mmap.mmap(exnodeFile.fileno(),0,access=mmap.ACCESS_READ)
+            try:
+                for header,start,end in Sections(buffer,'exnode'):
+                    fields = NodeHeaderFields(header)
+                    numberOfValues = sum(component[2] for name,components in fields for component in components)
+                    records = ParseRecords(buffer,start,end,recordLabels['exnode'],numberOfValues+1)
+                    numbers.append(records[:,0].astype(numpy.int64))
+                    values = {}
+                    for name,components in fields:
+                        values[name] = records[:,[component[1] for component in components]]
+                        shapes[name] = (len(components),)
+                        componentNames[name] = [component[0] for component in components]
+                    sectionFields.append(values)
+            finally:
+                buffer.close()
+    nodeNumbers,fields = MergeSections(numbers,sectionFields,shapes)
+    return nodeNumbers,fields,componentNames
+
+# Read the elements of the exelem file or partN files for an output prefix. Returns the sorted element numbers, the
+# (elements,nodes) element node numbers, a dictionary mapping each grid based field to a (elements,components,grid
+# points) array and a dictionary of component names.
+def ReadExelem(prefix):
+    numbers = []
+    elementNodes = []
+    sectionFields = []
+    shapes = {}
+    componentNames = {}
+    for path in ExfilePaths(prefix,'exelem'):
+        with open(path,'rb') as exelemFile:
+            buffer = mmap.mmap(exelemFile.fileno(),0,access=mmap.ACCESS_READ)
+            try:
+                for header,start,end in Sections(buffer,'exelem'):
+                    fields,numberOfNodes,numberOfScaleFactors = ElementHeaderFields(header)
+                    numberOfValues = sum(len(components)*gridPoints for name,components,gridPoints in fields)
+                    records = ParseRecords(buffer,start,end,recordLabels['exelem'],
+                                           3+numberOfValues+numberOfNodes+numberOfScaleFactors)
+                    numbers.append(records[:,0].astype(numpy.int64))
+                    elementNodes.append(records[:,3+numberOfValues:3+numberOfValues+numberOfNodes].astype(numpy.int64))
+                    values = {}
+                    column = 3
+                    for name,components,gridPoints in fields:
+                        values[name] = records[:,column:column+len(components)*gridPoints].reshape(
+                            -1,len(components),gridPoints)
+                        column += len(components)*gridPoints
+                        shapes[name] = (len(components),gridPoints)
+                        componentNames[name] = components
+                    sectionFields.append(values)
+            finally:
+                buffer.close()
+    numberOfNodes = max([nodes.shape[1] for nodes in elementNodes]+[0])
+    paddedNodes = [numpy.pad(nodes,((0,0),(0,numberOfNodes-nodes.shape[1]))) for nodes in elementNodes]
+    elementNumbers,fields = MergeSections(numbers,sectionFields,shapes)
+    if (len(paddedNodes) > 0):
+        allNodes = numpy.concatenate(paddedNodes)
+        elementNodes = allNodes[numpy.unique(numpy.concatenate(numbers),return_index=True)[1]]
+    else:
+        elementNodes = numpy.zeros((0,0),dtype=numpy.int64)
+    return elementNumbers,elementNodes,fields,componentNames
+
+# Merge the partN files of a parallel run into the single file prefix.extension. The records of nodes or elements that
+# are written by several parts are kept once and a header is only written when it differs from the one before. The
+# merged file is written to a temporary file first so that readers never see a partial file.
+def MergeParts(prefix,extension):
+    paths = PartPaths(prefix,extension)
+    if (len(paths) == 0):
+        raise IOError('No %s part files found for %s' % (extension,prefix))
+    mergedFileName = '%s.%s' % (prefix,extension)
+    writtenNumbers = set()
+    lastHeader = None
+    with open(mergedFileName+'.tmp','wb') as mergedFile:
+        for path in paths:
+            with open(path,'rb') as partFile:
+                buffer = mmap.mmap(partFile.fileno(),0,access=mmap.ACCESS_READ)
+                try:
+                    for header,start,end in Sections(buffer,extension):
+                        if (header != lastHeader):
+                            mergedFile.write(header.encode())
+                            lastHeader = header
+                        # Records start at the beginning of the line holding their label. Runs of records that are
+                        # all kept are copied in one write.
+                        recordStarts = []
+                        keep = []
+                        for match in recordNumberPatterns[extension].finditer(buffer,start,end):
+                            recordStarts.append(max(buffer.rfind(b'\n',start,match.start())+1,start))
+                            number = match.group(1)
+                            keep.append(number not in writtenNumbers)
+                            writtenNumbers.add(number)
+                        recordStarts.append(end)
+                        runStart = None
+                        for recordIdx in range(len(keep)+1):
+                            if (recordIdx < len(keep) and keep[recordIdx]):
+                                if runStart is None:
+                                    runStart = recordStarts[recordIdx]
+                            elif runStart is not None:
+                                mergedFile.write(buffer[runStart:recordStarts[recordIdx]])
+                                runStart = None
+                finally:
+                    buffer.close()
+    os.replace(mergedFileName+'.tmp',mergedFileName)
+    return mergedFileName
+
+# Compare the fields of a run against the expected fields for the same entities (nodes or elements). Tolerances maps a
+# field name to (absolute,relative) and other fields use defaultTolerances. A value passes if
+# |actual-expected| <= absolute+relative*|expected|, and NaN only matches NaN. Returns one row per field with the
+# maximum errors, the number of failing values and the worst entities, ordered by error over allowed error.
+def CompareFields(expectedNumbers,expectedFields,actualNumbers,actualFields,tolerances={},fieldNames=None,
+                  numberOfWorst=5,defaultTolerances=(defaultAbsoluteTolerance,defaultRelativeTolerance)):
+    if (fieldNames is None):
+        fieldNames = sorted(expectedFields.keys())
+    commonNumbers,expectedIdx,actualIdx = numpy.intersect1d(expectedNumbers,actualNumbers,assume_unique=True,
+                                                            return_indices=True)
+    numberOfMissing = len(expectedNumbers)-len(commonNumbers)
+    rows = []
+    for name in fieldNames:
+        absoluteTolerance,relativeTolerance = tolerances.get(name,defaultTolerances)
+        row = {'field':name,'absoluteTolerance':absoluteTolerance,'relativeTolerance':relativeTolerance,
+               'missing':numberOfMissing,'failed':0,'maximumAbsoluteError':0.0,'maximumRelativeError':0.0,'worst':[]}
+        rows.append(row)
+        if (name not in actualFields or name not in expectedFields or
+                actualFields[name].shape[1:] != expectedFields[name].shape[1:]):
+            row['message'] = 'field missing or with a different number of components'
+            row['failed'] = len(expectedNumbers)
+            continue
+        expected = expectedFields[name][expectedIdx].reshape(len(commonNumbers),-1)
+        actual = actualFields[name][actualIdx].reshape(len(commonNumbers),-1)
+        bothNaN = numpy.isnan(expected) & numpy.isnan(actual)
+        error = numpy.where(bothNaN,0.0,numpy.abs(actual-expected))
+        error[numpy.isnan(error)] = numpy.inf
+        allowed = absoluteTolerance+relativeTolerance*numpy.abs(numpy.nan_to_num(expected))
+        with numpy.errstate(divide='ignore',invalid='ignore'):
+            relativeError = numpy.where(error == 0.0,0.0,error/numpy.abs(expected))
+            ratio = numpy.where(error == 0.0,0.0,error/allowed)
+        if (error.size > 0):
+            row['maximumAbsoluteError'] = float(error.max())
+            row['maximumRelativeError'] = float(numpy.nan_to_num(relativeError,nan=numpy.inf).max())
+        row['failed'] = int(numpy.count_nonzero(error > allowed))
+        entityRatio = ratio.max(axis=1) if (ratio.shape[1] > 0) else numpy.zeros(len(commonNumbers))
+        worstIdx = numpy.argsort(-entityRatio)[:numberOfWorst] if (len(entityRatio) <= numberOfWorst) else \
+            numpy.argpartition(-entityRatio,numberOfWorst)[:numberOfWorst]
+        worstIdx = worstIdx[numpy.argsort(-entityRatio[worstIdx])]
+        for entityIdx in worstIdx:
+            if (entityRatio[entityIdx] > 0.0):
+                valueIdx = int(numpy.argmax(ratio[entityIdx]))
+                row['worst'].append((int(commonNumbers[entityIdx]),valueIdx,float(expected[entityIdx,valueIdx]),
+                                     float(actual[entityIdx,valueIdx]),float(entityRatio[entityIdx])))
+    return rows
+
+# Compare the exnode and, if present, exelem output of a run against expected results. Returns the comparison rows and
+# whether every field passed.
+def CompareResults(expectedPrefix,actualPrefix,tolerances={},fieldNames=None,numberOfWorst=5,compareElements=True,
+                   defaultTolerances=(defaultAbsoluteTolerance,defaultRelativeTolerance)):
+    expectedNumbers,expectedFields,componentNames = ReadExnode(expectedPrefix)
+    actualNumbers,actualFields,componentNames = ReadExnode(actualPrefix)
+    nodeFieldNames = None if (fieldNames is None) else [name for name in fieldNames if (name in expectedFields)]
+    rows = CompareFields(expectedNumbers,expectedFields,actualNumbers,actualFields,tolerances,nodeFieldNames,
+                         numberOfWorst,defaultTolerances)
+    for row in rows:
+        row['location'] = 'node'
+    if (compareElements):
+        try:
+            expectedPaths = ExfilePaths(expectedPrefix,'exelem')
+        except IOError:
+            expectedPaths = []
+        if (len(expectedPaths) > 0):
+            expectedNumbers,expectedNodes,expectedFields,componentNames = ReadExelem(expectedPrefix)
+            actualNumbers,actualNodes,actualFields,componentNames = ReadExelem(actualPrefix)
+            elementFieldNames = None if (fieldNames is None) else \
+                [name for name in fieldNames if (name in expectedFields)]
+            elementRows = CompareFields(expectedNumbers,expectedFields,actualNumbers,actualFields,tolerances,
+                                        elementFieldNames,numberOfWorst,defaultTolerances)
+            for row in elementRows:
+                row['location'] = 'element'
+            rows += elementRows
+    passed = all(row['failed'] == 0 and row['missing'] == 0 for row in rows)
+    return rows,passed
+
+# Print a comparison report with one line per field followed by its worst entities
+def PrintReport(rows,output=sys.stdout):
+    output.write('%-28s %-8s %8s %8s %12s %12s\n' % ('Field','Location','Failed','Missing','Max abs err',
+                                                      'Max rel err'))
+    for row in rows:
+        output.write('%-28s %-8s %8d %8d %12.4e %12.4e %s\n' % (row['field'],row['location'],row['failed'],
+                                                                row['missing'],row['maximumAbsoluteError'],
+                                                                row['maximumRelativeError'],row.get('message','')))
+        if (row['failed'] > 0):
+            for number,valueIdx,expected,actual,ratio in row['worst']:
+                output.write('    %s %d value %d: expected %.10e, got %.10e (%.3g x tolerance)\n' % (
+                    row['location'],number,valueIdx+1,expected,actual,ratio))
+
+# Parse Field=absolute[,relative] tolerance arguments
+def ParseTolerances(arguments,absoluteTolerance,relativeTolerance):
+    tolerances = {}
+    for argument in arguments:
+        name,values = argument.split('=')
+        values = [float(value) for value in values.split(',')]
+        tolerances[name] = (values[0],values[1] if (len(values) > 1) else relativeTolerance)
+    return tolerances
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--merge':
+        for extension in ['exnode','exelem']:
+            print('Merged %s' % MergeParts(sys.argv[2],extension))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Compare exnode/exelem results against expected results.')
+    parser.add_argument('expected',help='expected output prefix, e.g. expected_results/results/CantileverGrowth')
+    parser.add_argument('actual',help='output prefix of the run to check, e.g. results/CantileverGrowth')
+    parser.add_argument('--atol',type=float,default=defaultAbsoluteTolerance,help='default absolute tolerance')
+    parser.add_argument('--rtol',type=float,default=defaultRelativeTolerance,help='default relative tolerance')
+    parser.add_argument('--tolerance',action='append',default=[],metavar='FIELD=ATOL[,RTOL]',
+                        help='tolerances for one field, may be repeated')
+    parser.add_argument('--field',action='append',default=None,help='field to compare, may be repeated')
+    parser.add_argument('--worst',type=int,default=5,help='number of worst nodes or elements to report per field')
+    parser.add_argument('--nodes-only',action='store_true',help='do not compare the exelem grid point fields')
+    arguments = parser.parse_args()
+
+    tolerances = ParseTolerances(arguments.tolerance,arguments.atol,arguments.rtol)
+    rows,passed = CompareResults(arguments.expected,arguments.actual,tolerances,arguments.field,arguments.worst,
+                                 not arguments.nodes_only,(arguments.atol,arguments.rtol))
+    PrintReport(rows)
+    print('PASSED' if passed else 'FAILED')
+    sys.exit(0 if passed else 1)
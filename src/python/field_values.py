@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Gathers and sets the nodal and Gauss point values of iron field variables as NumPy arrays.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import numpy
+
+from opencmiss.iron import iron
+
+# Get the values of a node based field variable at the given nodes as a (nodes x components) array
+def NodalValues(field,variableType,nodeNumbers,numberOfComponents,parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    values = numpy.empty((len(nodeNumbers),numberOfComponents))
+    for nodeIdx,nodeNumber in enumerate(nodeNumbers):
+        for componentIdx in range(numberOfComponents):
+            values[nodeIdx,componentIdx] = field.ParameterSetGetNodeDP(variableType,parameterSetType,1,1,
+                                                                       int(nodeNumber),componentIdx+1)
+    return values
+
+# Set the values of a node based field variable at the given nodes from a (nodes x components) array
+def SetNodalValues(field,variableType,nodeNumbers,values,parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    values = numpy.asarray(values,dtype=float)
+    for nodeIdx,nodeNumber in enumerate(nodeNumbers):
+        for componentIdx in range(values.shape[1]):
+            field.ParameterSetUpdateNodeDP(variableType,parameterSetType,1,1,int(nodeNumber),componentIdx+1,
+                                           float(values[nodeIdx,componentIdx]))
+    field.ParameterSetUpdateStart(variableType,parameterSetType)
+    field.ParameterSetUpdateFinish(variableType,parameterSetType)
+
+# Get the values of one component of an element based field variable at the given elements
+def ElementValues(field,variableType,elementNumbers,componentNumber,parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    return numpy.array([field.ParameterSetGetElementDP(variableType,parameterSetType,int(elementNumber),componentNumber)
+                        for elementNumber in elementNumbers],dtype=float)
+
+# Set the values of one component of an element based field variable at the given elements
+def SetElementValues(field,variableType,elementNumbers,componentNumber,values,
+                     parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    for elementNumber,value in zip(elementNumbers,numpy.asarray(values,dtype=float)):
+        field.ParameterSetUpdateElementDP(variableType,parameterSetType,int(elementNumber),componentNumber,float(value))
+    field.ParameterSetUpdateStart(variableType,parameterSetType)
+    field.ParameterSetUpdateFinish(variableType,parameterSetType)
+
+# Get the values of a Gauss point based field variable as an (elements x Gauss points x components) array
+def GaussPointValues(field,variableType,elementNumbers,numberOfGaussPoints,numberOfComponents,
+                     parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    values = numpy.empty((len(elementNumbers),numberOfGaussPoints,numberOfComponents))
+    for elementIdx,elementNumber in enumerate(elementNumbers):
+        for gaussPointIdx in range(numberOfGaussPoints):
+            for componentIdx in range(numberOfComponents):
+                values[elementIdx,gaussPointIdx,componentIdx] = field.ParameterSetGetGaussPointDP(
+                    variableType,parameterSetType,gaussPointIdx+1,int(elementNumber),componentIdx+1)
+    return values
+
+# Set the values of a Gauss point based field variable from an (elements x Gauss points x components) array
+def SetGaussPointValues(field,variableType,elementNumbers,values,parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    values = numpy.asarray(values,dtype=float)
+    for elementIdx,elementNumber in enumerate(elementNumbers):
+        for gaussPointIdx in range(values.shape[1]):
+            for componentIdx in range(values.shape[2]):
+                field.ParameterSetUpdateGaussPointDP(variableType,parameterSetType,gaussPointIdx+1,int(elementNumber),
+                                                     componentIdx+1,float(values[elementIdx,gaussPointIdx,componentIdx]))
+    field.ParameterSetUpdateStart(variableType,parameterSetType)
+    field.ParameterSetUpdateFinish(variableType,parameterSetType)
+
+# Get a copy of the local DOF values, ghosts included, of a field variable parameter set in one call. The DOFs are in
+# iron's internal order, which is the same whenever the same model is built on the same number of computational nodes.
+def ParameterSetData(field,variableType,parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    data = field.ParameterSetDataGet(variableType,parameterSetType)
+    values = numpy.array(data,dtype=float)
+    field.ParameterSetDataRestore(variableType,parameterSetType,data)
+    return values
+
+# Set the local DOF values of a field variable parameter set from an array from ParameterSetData in one call
+def SetParameterSetData(field,variableType,values,parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    data = field.ParameterSetDataGet(variableType,parameterSetType)
+    if (numpy.shape(data) != numpy.shape(values)):
+        raise ValueError('Expected %d DOF values, got %d' % (numpy.size(data),numpy.size(values)))
+    data[...] = values
+    field.ParameterSetDataRestore(variableType,parameterSetType,data)
+    field.ParameterSetUpdateStart(variableType,parameterSetType)
+    field.ParameterSetUpdateFinish(variableType,parameterSetType)
+
+# The Gauss point DOF layouts checked by BlockLayout, keyed by the field, variable, parameter set, elements, numbers of
+# Gauss points and DOFs and the components
+checkedLayouts = {}
+
+# Check whether the DOF array of a Gauss point based field variable holds one block per component with the Gauss points
+# of each element together, in the order of elementNumbers, for the given components. Every DOF is set to a distinct
+# value and every point of the components read back one at a time, after which the original values are put back
+# without an update so that no other computational node is involved. The result is remembered so each layout is only
+# checked once.
+def BlockLayout(field,variableType,elementNumbers,numberOfGaussPoints,componentNumbers,
+                parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    elementNumbers = numpy.asarray(elementNumbers,dtype=int)
+    numberOfElements = len(elementNumbers)
+    data = field.ParameterSetDataGet(variableType,parameterSetType)
+    numberOfDofs = numpy.size(data)
+    key = (id(field),variableType,parameterSetType,elementNumbers.tobytes(),numberOfGaussPoints,numberOfDofs,
+           tuple(componentNumbers))
+    if (key in checkedLayouts and checkedLayouts[key][0] is field):
+        field.ParameterSetDataRestore(variableType,parameterSetType,data)
+        return checkedLayouts[key][1]
+    numberOfPoints = numberOfElements*numberOfGaussPoints
+    blockLayout = (numberOfPoints > 0 and numberOfDofs % numberOfPoints == 0 and
+                   numberOfDofs//numberOfPoints >= max(componentNumbers))
+    if blockLayout:
+        original = numpy.array(data,dtype=float)
+        probe = numpy.arange(1.0,numberOfDofs+1.0)
+        data[...] = numpy.reshape(probe,numpy.shape(data))
+        field.ParameterSetDataRestore(variableType,parameterSetType,data)
+        blocks = probe.reshape(-1,numberOfElements,numberOfGaussPoints)
+        blockLayout = all(field.ParameterSetGetGaussPointDP(variableType,parameterSetType,gaussPointIdx+1,
+                                                            int(elementNumber),componentNumber) ==
+                          blocks[componentNumber-1,elementIdx,gaussPointIdx]
+                          for elementIdx,elementNumber in enumerate(elementNumbers)
+                          for gaussPointIdx in range(numberOfGaussPoints)
+                          for componentNumber in componentNumbers)
+        data = field.ParameterSetDataGet(variableType,parameterSetType)
+        data[...] = numpy.reshape(original,numpy.shape(data))
+    field.ParameterSetDataRestore(variableType,parameterSetType,data)
+    checkedLayouts[key] = (field,blockLayout)
+    return blockLayout
+
+# Set components of a Gauss point based field variable from an (elements x Gauss points x components) array, where the
+# elements are all the local elements of the field in order. If BlockLayout finds iron's layout of one block per
+# component with the Gauss points of each element together, the values are written into the parameter set DOF array in
+# one call. Otherwise, e.g. because the domain has ghost elements, they are set one point at a time.
+def SetGaussPointComponentValues(field,variableType,elementNumbers,componentNumbers,values,
+                                 parameterSetType=iron.FieldParameterSetTypes.VALUES):
+    values = numpy.asarray(values,dtype=float)
+    numberOfElements,numberOfGaussPoints = values.shape[:2]
+    if BlockLayout(field,variableType,elementNumbers,numberOfGaussPoints,componentNumbers,parameterSetType):
+        data = field.ParameterSetDataGet(variableType,parameterSetType)
+        blocks = numpy.reshape(data,(-1,numberOfElements,numberOfGaussPoints))
+        for componentIdx,componentNumber in enumerate(componentNumbers):
+            blocks[componentNumber-1] = values[:,:,componentIdx]
+        field.ParameterSetDataRestore(variableType,parameterSetType,data)
+        field.ParameterSetUpdateStart(variableType,parameterSetType)
+        field.ParameterSetUpdateFinish(variableType,parameterSetType)
+        return
+    for elementIdx,elementNumber in enumerate(elementNumbers):
+        for gaussPointIdx in range(numberOfGaussPoints):
+            for componentIdx,componentNumber in enumerate(componentNumbers):
+                field.ParameterSetUpdateGaussPointDP(variableType,parameterSetType,gaussPointIdx+1,int(elementNumber),
+                                                     componentNumber,
+                                                     float(values[elementIdx,gaussPointIdx,componentIdx]))
+    field.ParameterSetUpdateStart(variableType,parameterSetType)
+    field.ParameterSetUpdateFinish(variableType,parameterSetType)
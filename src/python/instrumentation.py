@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Records timed phases, counters and events of a cantilever growth run and writes them as JSON lines or as a Chrome trace.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import json, math, os, time
+
+# Trace events follow the Chrome trace event format so that a trace written as a Chrome trace can be loaded into
+# chrome://tracing or Perfetto, and a JSON lines trace holds the same events one per line. Times are microseconds from
+# the start of the trace.
+CHROME_TRACE = 'chrome'
+JSON_LINES = 'jsonl'
+
+# Replace the non-finite numbers in an event, e.g. a NaN residual norm of a diverged step, by null, as JSON has no NaN
+# or infinity
+def FiniteValues(value):
+    if isinstance(value,float) and not math.isfinite(value):
+        return None
+    if isinstance(value,dict):
+        return dict((key,FiniteValues(item)) for key,item in value.items())
+    if isinstance(value,(list,tuple)):
+        return [FiniteValues(item) for item in value]
+    return value
+
+# Time a phase of a run as a context manager. The phase becomes a complete ('X') event when the context exits and
+# further arguments can be attached to it with Arguments while it runs.
+class TracePhase(object):
+
+    def __init__(self,trace,name,arguments):
+        self.trace = trace
+        self.name = name
+        self.arguments = dict(arguments)
+        self.duration = 0.0
+
+    def Arguments(self,**arguments):
+        self.arguments.update(arguments)
+
+    def __enter__(self):
+        self.startTime = time.time()
+        return self
+
+    def __exit__(self,exceptionType,exceptionValue,traceback):
+        self.duration = time.time()-self.startTime
+        if exceptionType is not None:
+            self.arguments['exception'] = exceptionType.__name__
+        self.trace.AddEvent({'name':self.name,'ph':'X','ts':self.trace.Timestamp(self.startTime),
+                             'dur':self.duration*1.0e6,'args':self.arguments})
+        return False
+
+# A trace of the events of a run. Without a file name the events are only kept in memory in events. With a file name
+# ending in .jsonl the events are written as JSON lines, and dropped from events, each time Flush is called, otherwise
+# the whole trace is written as a Chrome trace by Close. A %d in the file name is replaced by the process (MPI rank) number, which can be set
+# until the first write.
+class Trace(object):
+
+    def __init__(self,fileName=None,traceFormat=None):
+        self.fileName = fileName
+        if (traceFormat is None):
+            traceFormat = JSON_LINES if (fileName and fileName.endswith('.jsonl')) else CHROME_TRACE
+        self.traceFormat = traceFormat
+        self.processNumber = 0
+        self.startTime = time.time()
+        self.events = []
+        self.numberOfWrittenEvents = 0
+        self.traceFile = None
+
+    # Microseconds since the start of the trace
+    def Timestamp(self,eventTime=None):
+        return ((time.time() if eventTime is None else eventTime)-self.startTime)*1.0e6
+
+    def AddEvent(self,event):
+        event['pid'] = self.processNumber
+        event.setdefault('tid',0)
+        self.events.append(event)
+
+    # Time a phase, e.g. with trace.Phase('solve',step=1) as phase: ...
+    def Phase(self,name,**arguments):
+        return TracePhase(self,name,arguments)
+
+    # Record a complete event for a phase timed elsewhere
+    def Complete(self,name,startTime,duration,**arguments):
+        self.AddEvent({'name':name,'ph':'X','ts':self.Timestamp(startTime),'dur':duration*1.0e6,'args':arguments})
+
+    # Record counter values, shown as a graph over time in a Chrome trace
+    def Counter(self,name,**values):
+        self.AddEvent({'name':name,'ph':'C','ts':self.Timestamp(),'args':values})
+
+    # Record an instant event with arguments, e.g. the Newton residual history of a step
+    def Instant(self,name,**arguments):
+        self.AddEvent({'name':name,'ph':'i','s':'p','ts':self.Timestamp(),'args':arguments})
+
+    def OpenFile(self):
+        if self.traceFile is None:
+            fileName = self.fileName % self.processNumber if ('%d' in self.fileName) else self.fileName
+            outputDirectory = os.path.dirname(fileName)
+            if outputDirectory and not os.path.exists(outputDirectory):
+                os.makedirs(outputDirectory)
+            self.traceFile = open(fileName,'w')
+        return self.traceFile
+
+    # Write the events recorded since the last flush to a JSON lines trace. The written events are dropped so that a
+    # long running process does not hold all of them.
+    def Flush(self):
+        if self.fileName and self.traceFormat == JSON_LINES:
+            traceFile = self.OpenFile()
+            for event in self.events:
+                traceFile.write(json.dumps(FiniteValues(event),allow_nan=False)+'\n')
+            traceFile.flush()
+            self.numberOfWrittenEvents += len(self.events)
+            self.events = []
+
+    # Finish writing the trace
+    def Close(self):
+        if not self.fileName:
+            return
+        if self.traceFormat == JSON_LINES:
+            self.Flush()
+        else:
+            json.dump({'traceEvents':FiniteValues(self.events),'displayTimeUnit':'ms'},self.OpenFile(),allow_nan=False)
+        self.traceFile.close()
+        self.traceFile = None
+
+# A trace that times phases but keeps no events, for runs that are not traced
+class NullTrace(Trace):
+
+    def AddEvent(self,event):
+        pass
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Checks the analytic and coloured finite difference Mooney-Rivlin tangents of mooney_rivlin.py against the point by point finite difference tangent, reporting accuracy and cost, and with --solve compares the Newton iterations and solve times of iron's two Jacobian calculation types on the full problem.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, time
+
+import numpy
+
+import benchmark
+import mooney_rivlin
+from cantilever_parameters import FD_JACOBIAN, EQUATIONS_JACOBIAN
+
+# Set the size of the deformations about the identity and the finite difference perturbation
+deformationScale = 0.2
+perturbation = 1.0e-7
+
+# materials parameters
+c1 = 2.0
+c2 = 6.0
+
+# Generate random right Cauchy-Green tensors (points x 6) from deformation gradients about the identity
+def RandomStrains(numberOfPoints,seed=0):
+    randomState = numpy.random.RandomState(seed)
+    F = numpy.eye(3)+deformationScale*randomState.uniform(-1.0,1.0,(numberOfPoints,3,3))
+    fullC = numpy.einsum('pki,pkj->pij',F,F)
+    return fullC[:,[0,0,0,1,1,2],[0,1,2,1,2,2]]
+
+# Evaluate a tangent of mooney_rivlin.py at the strains C and time it. Returns the tangent and the elapsed time.
+def TimeTangent(tangentFunction,C,*arguments):
+    startTime = time.time()
+    tangent = tangentFunction(C,c1,c2,*arguments)
+    return tangent,time.time()-startTime
+
+# Compare the analytic and coloured finite difference tangents with the point by point finite difference tangent at
+# numberOfPoints random strains and report their differences and evaluation times
+def CheckTangents(numberOfPoints):
+    C = RandomStrains(numberOfPoints)
+    analyticTangent,analyticTime = TimeTangent(mooney_rivlin.Tangent,C)
+    fdTangent,fdTime = TimeTangent(mooney_rivlin.FiniteDifferenceTangent,C,perturbation)
+    colouredTangent,colouredTime = TimeTangent(mooney_rivlin.ColouredFiniteDifferenceTangent,C,perturbation)
+
+    scale = numpy.max(numpy.abs(analyticTangent))
+    print('Mooney-Rivlin tangent check at %d points (c1 = %g, c2 = %g)' % (numberOfPoints,c1,c2))
+    print('  %-12s %16s %16s %16s' % ('Method','Time (s)','Time/point (s)','Max rel. diff'))
+    for name,tangent,elapsed in [('FD',fdTangent,fdTime),
+                                 ('Coloured FD',colouredTangent,colouredTime),
+                                 ('Analytic',analyticTangent,analyticTime)]:
+        difference = numpy.max(numpy.abs(tangent-fdTangent))/scale
+        print('  %-12s %16.6e %16.6e %16.6e' % (name,elapsed,elapsed/numberOfPoints,difference))
+    print('  Analytic vs coloured FD max rel. diff = %e' %
+          (numpy.max(numpy.abs(analyticTangent-colouredTangent))/scale))
+
+# Solve the full problem once with each Jacobian calculation type, each in fresh processes, and report the Newton
+# iterations and the solve time. Both are finite difference Jacobians computed by iron; neither uses the tangents of
+# mooney_rivlin.py as iron has no hook for a Python tangent.
+def CompareJacobianSolves(elements,interpolation=(2,1)):
+    print('Newton Jacobian comparison on %dx%dx%d elements (u%d p%d)' % (elements+interpolation))
+    print('  %-9s %10s %8s %10s %12s %12s %14s' % ('Jacobian','Status','Newton','Solve (s)','Time/iter (s)',
+                                                    'Residual','Tip deflection'))
+    for name,jacobianCalculationType in [('FD',FD_JACOBIAN),('Equations',EQUATIONS_JACOBIAN)]:
+        case = benchmark.BenchmarkCases([elements],[interpolation],[1])[0]
+        case['parameters']['jacobianCalculationType'] = jacobianCalculationType
+        result = benchmark.RunCase(case)
+        if ('timings' not in result):
+            print('  %-9s %10s %s' % (name,result['status'],result.get('message','')))
+            continue
+        solveTime = result['timings']['solve']
+        print('  %-9s %10s %8d %10.3f %12.4e %12.4e %14.6e' % (name,result['status'],result['newtonIterations'],
+                                                               solveTime,solveTime/max(result['newtonIterations'],1),
+                                                               result['finalResidualNorm'],result['tipDeflection']))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the Mooney-Rivlin tangents or compare the Newton Jacobians.')
+    parser.add_argument('numberOfPoints',nargs='?',type=int,default=2000,help='number of Gauss points to check')
+    parser.add_argument('--solve',nargs='?',const='1,1,3',default=None,metavar='ELEMENTS',
+                        help='solve the problem on the x,y,z elements with each Jacobian calculation type instead')
+    arguments = parser.parse_args()
+
+    if arguments.solve is not None:
+        CompareJacobianSolves(benchmark.IntegerTuples(arguments.solve,3)[0])
+    else:
+        CheckTangents(arguments.numberOfPoints)
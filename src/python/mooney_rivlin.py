@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Vectorised NumPy evaluation of the Mooney-Rivlin law in mooneyrivlin.cellml together with its analytic consistent tangent and finite difference approximations of it, for checking the law outside iron. The solve does not use these tangents.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import numpy
+
+# Component ordering of the strain (U1) and stress (U2) dependent field variables and the CellML C/Tdev variables
+C11, C12, C13, C22, C23, C33 = range(6)
+NUMBER_OF_COMPONENTS = 6
+DIAGONAL_COMPONENTS = [C11,C22,C33]
+
+# Calculate the first and third invariants of the right Cauchy-Green tensors in C (..., 6)
+def Invariants(C):
+    C = numpy.asarray(C,dtype=float)
+    I1 = C[...,C11]+C[...,C22]+C[...,C33]
+    I3 = C[...,C11]*C[...,C22]*C[...,C33]+2.0*C[...,C12]*C[...,C23]*C[...,C13] \
+         -C[...,C11]*C[...,C23]*C[...,C23]-C[...,C22]*C[...,C13]*C[...,C13]-C[...,C33]*C[...,C12]*C[...,C12]
+    return I1,I3
+
+# Calculate the derivative of I3 with respect to each of the six independent components of C
+def ThirdInvariantDerivative(C):
+    C = numpy.asarray(C,dtype=float)
+    dI3dC = numpy.empty(C.shape)
+    dI3dC[...,C11] = C[...,C22]*C[...,C33]-C[...,C23]*C[...,C23]
+    dI3dC[...,C22] = C[...,C11]*C[...,C33]-C[...,C13]*C[...,C13]
+    dI3dC[...,C33] = C[...,C11]*C[...,C22]-C[...,C12]*C[...,C12]
+    dI3dC[...,C12] = 2.0*(C[...,C23]*C[...,C13]-C[...,C33]*C[...,C12])
+    dI3dC[...,C13] = 2.0*(C[...,C12]*C[...,C23]-C[...,C22]*C[...,C13])
+    dI3dC[...,C23] = 2.0*(C[...,C12]*C[...,C13]-C[...,C11]*C[...,C23])
+    return dI3dC
+
+# Evaluate the deviatoric stress Tdev for every point in C (..., 6) exactly as mooneyrivlin.cellml does. c1 and c2
+# may be scalars or arrays that broadcast against the points.
+def Stress(C,c1,c2):
+    C = numpy.asarray(C,dtype=float)
+    I1,I3 = Invariants(C)
+    a = numpy.power(numpy.sqrt(I3),-1.0/3.0)
+    b = -2.0*numpy.asarray(c2,dtype=float)
+    c = 2.0*(c1+I1*c2)
+    Tdev = (a*b)[...,numpy.newaxis]*C
+    for component in DIAGONAL_COMPONENTS:
+        Tdev[...,component] += a*c
+    return Tdev
+
+# Evaluate the analytic consistent tangent dTdev/dC (..., 6, 6) for every point in C. Row i holds the derivatives of
+# stress component i with respect to the six independent strain components.
+def Tangent(C,c1,c2):
+    C = numpy.asarray(C,dtype=float)
+    I1,I3 = Invariants(C)
+    dI3dC = ThirdInvariantDerivative(C)
+    a = numpy.power(numpy.sqrt(I3),-1.0/3.0)
+    b = numpy.broadcast_to(-2.0*numpy.asarray(c2,dtype=float),a.shape)
+    c = 2.0*(c1+I1*c2)
+    # a = I3^(-1/6) so da/dC = -a/(6 I3) dI3/dC
+    dadC = (-a/(6.0*I3))[...,numpy.newaxis]*dI3dC
+    stressOverA = b[...,numpy.newaxis]*C
+    for component in DIAGONAL_COMPONENTS:
+        stressOverA[...,component] += c
+    tangent = stressOverA[...,:,numpy.newaxis]*dadC[...,numpy.newaxis,:]
+    for component in range(NUMBER_OF_COMPONENTS):
+        tangent[...,component,component] += a*b
+    # The diagonal stresses also depend on I1 through c
+    dcdI1 = numpy.broadcast_to(2.0*numpy.asarray(c2,dtype=float),a.shape)
+    for row in DIAGONAL_COMPONENTS:
+        for column in DIAGONAL_COMPONENTS:
+            tangent[...,row,column] += a*dcdI1
+    return tangent
+
+# Approximate the tangent by forward differences one point and one strain component at a time, with a separate
+# constitutive evaluation for every perturbation
+def FiniteDifferenceTangent(C,c1,c2,perturbation=1.0e-7):
+    C = numpy.atleast_2d(numpy.asarray(C,dtype=float))
+    c1 = numpy.broadcast_to(numpy.asarray(c1,dtype=float),C.shape[:-1])
+    c2 = numpy.broadcast_to(numpy.asarray(c2,dtype=float),C.shape[:-1])
+    tangent = numpy.empty(C.shape+(NUMBER_OF_COMPONENTS,))
+    for pointIdx in numpy.ndindex(*C.shape[:-1]):
+        point = C[pointIdx]
+        reference = Stress(point,c1[pointIdx],c2[pointIdx])
+        for component in range(NUMBER_OF_COMPONENTS):
+            perturbed = point.copy()
+            perturbed[component] += perturbation
+            tangent[pointIdx+(slice(None),component)] = \
+                (Stress(perturbed,c1[pointIdx],c2[pointIdx])-reference)/perturbation
+    return tangent
+
+# Approximate the tangent by coloured forward differences. The stress at one point does not depend on the strain at any
+# other point so the same strain component can be perturbed at every point at once, giving one batched constitutive
+# evaluation per strain component rather than one per point and component.
+def ColouredFiniteDifferenceTangent(C,c1,c2,perturbation=1.0e-7):
+    C = numpy.asarray(C,dtype=float)
+    reference = Stress(C,c1,c2)
+    tangent = numpy.empty(C.shape+(NUMBER_OF_COMPONENTS,))
+    for component in range(NUMBER_OF_COMPONENTS):
+        perturbed = C.copy()
+        perturbed[...,component] += perturbation
+        tangent[...,component] = (Stress(perturbed,c1,c2)-reference)/perturbation
+    return tangent
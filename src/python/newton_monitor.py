@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Captures the Newton solver monitor output that iron writes to stdout and turns it into iteration counts and residual histories.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import os, re, sys, tempfile
+
+# Have gfortran write stdout unbuffered so that the monitor output of a solve can be captured as it is written. This
+# needs to be set before iron is imported.
+os.environ.setdefault('GFORTRAN_UNBUFFERED_PRECONNECTED','y')
+
+iterationPattern = re.compile(r'Iteration number\s*=\s*(\d+)')
+functionNormPattern = re.compile(r'Function Norm\s*=\s*([-+.0-9EeDd]+)')
+notConvergedPattern = re.compile(r'did not converge|diverged',re.IGNORECASE)
+solverTimingPattern = re.compile(r'^[\s*]*([^=\n]*?)[\s:,]*User time\s*=\s*([-+.0-9EeDd]+)'
+                                 r'(?:[\s,]*System time\s*=\s*([-+.0-9EeDd]+))?',re.IGNORECASE|re.MULTILINE)
+
+# Capture everything written to the stdout file descriptor, including the output of the Fortran library, while the
+# context is active. The captured text is echoed to stdout afterwards if echo is set.
+class OutputCapture(object):
+
+    def __init__(self,echo=True):
+        self.echo = echo
+        self.text = ''
+
+    def __enter__(self):
+        sys.stdout.flush()
+        self.captureFile = tempfile.TemporaryFile()
+        self.savedDescriptor = os.dup(1)
+        os.dup2(self.captureFile.fileno(),1)
+        return self
+
+    def __exit__(self,exceptionType,exceptionValue,traceback):
+        sys.stdout.flush()
+        os.dup2(self.savedDescriptor,1)
+        os.close(self.savedDescriptor)
+        self.captureFile.seek(0)
+        self.text = self.captureFile.read().decode('utf-8','replace')
+        self.captureFile.close()
+        if self.echo:
+            sys.stdout.write(self.text)
+            sys.stdout.flush()
+        return False
+
+# Split monitor output into the residual histories of the individual Newton solves. Each history is a list of
+# (iteration number, function norm) pairs and a new solve starts whenever the iteration number drops back to zero.
+def ParseNewtonMonitor(text):
+    histories = []
+    for line in text.splitlines():
+        match = iterationPattern.search(line)
+        if match:
+            iterationNumber = int(match.group(1))
+            if iterationNumber == 0 or not histories:
+                histories.append([])
+            histories[-1].append((iterationNumber,float('nan')))
+            continue
+        match = functionNormPattern.search(line)
+        if match and histories:
+            iterationNumber,_ = histories[-1][-1]
+            histories[-1][-1] = (iterationNumber,float(match.group(1).replace('D','E').replace('d','e')))
+    return histories
+
+# Summarise monitor output as the number of Newton solves, the total and largest number of iterations, the final
+# residual norm and whether every solve converged.
+def NewtonSummary(text):
+    histories = ParseNewtonMonitor(text)
+    iterations = [history[-1][0] for history in histories]
+    return {
+        'newtonSolves':len(histories),
+        'newtonIterations':sum(iterations),
+        'maximumNewtonIterations':max(iterations) if iterations else 0,
+        'finalResidualNorm':histories[-1][-1][1] if histories else float('nan'),
+        'converged':notConvergedPattern.search(text) is None,
+        }
+
+# Read the solver timings written by solvers with TIMING output. Each timing is a (label, user time, system time)
+# tuple, e.g. from "***   Solver solve: User time = 0.012, System time = 0.001". Lines without a system time give NaN.
+def ParseSolverTimings(text):
+    timings = []
+    for match in solverTimingPattern.finditer(text):
+        systemTime = match.group(3)
+        timings.append((match.group(1).strip(),float(match.group(2).replace('D','E').replace('d','e')),
+                        float(systemTime.replace('D','E').replace('d','e')) if systemTime else float('nan')))
+    return timings
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Combines values over the computational nodes of a parallel run using mpi4py if it is installed.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import numpy
+
+# MPI reductions are only available if mpi4py is installed. It is imported after iron has initialised MPI, mpi4py then
+# uses that MPI environment and leaves finalising it to iron.
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
+
+# The rank of this process in the MPI world, or default if mpi4py is not installed
+def Rank(default=0):
+    if MPI is None:
+        return default
+    return MPI.COMM_WORLD.Get_rank()
+
+# Whether values can be combined over numberOfComputationalNodes computational nodes
+def Available(numberOfComputationalNodes):
+    return numberOfComputationalNodes == 1 or MPI is not None
+
+# Sum an array over all the computational nodes
+def Sum(values,numberOfComputationalNodes):
+    values = numpy.array(values,dtype=float)
+    if (numberOfComputationalNodes == 1):
+        return values
+    if MPI is None:
+        raise RuntimeError('mpi4py is needed to combine the results of a parallel run')
+    result = numpy.empty_like(values)
+    MPI.COMM_WORLD.Allreduce(values,result,op=MPI.SUM)
+    return result
+
+# Take the elementwise maximum of an array over all the computational nodes
+def Maximum(values,numberOfComputationalNodes):
+    values = numpy.array(values,dtype=float)
+    if (numberOfComputationalNodes == 1):
+        return values
+    if MPI is None:
+        raise RuntimeError('mpi4py is needed to combine the results of a parallel run')
+    result = numpy.empty_like(values)
+    MPI.COMM_WORLD.Allreduce(values,result,op=MPI.MAX)
+    return result
+
+# Gather an array from every computational node. Returns the list of the arrays in computational node order.
+def Gather(values,numberOfComputationalNodes):
+    values = numpy.asarray(values)
+    if (numberOfComputationalNodes == 1):
+        return [values]
+    if MPI is None:
+        raise RuntimeError('mpi4py is needed to combine the results of a parallel run')
+    return MPI.COMM_WORLD.allgather(values)
+
+# Wait for all the computational nodes, e.g. until every rank has written its part file
+def Barrier(numberOfComputationalNodes):
+    if (numberOfComputationalNodes > 1):
+        if MPI is None:
+            raise RuntimeError('mpi4py is needed to synchronise a parallel run')
+        MPI.COMM_WORLD.Barrier()
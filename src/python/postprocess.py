@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Calculates scalar metrics of cantilever growth results without a GUI by evaluating the Lagrange interpolation of the fields with NumPy, writing them as a tidy table.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, csv, os, sys
+
+import numpy
+
+import exfile
+import results_store
+
+# The names of the components of the stress (U2) and growth (U3) fields
+stressComponentNames = ['11','12','13','22','23','33']
+growthComponentNames = ['lambda1','lambda2','lambda3']
+
+# The columns of the metrics table. Each row holds one metric of one step of one run.
+metricColumns = ['run','step','time','metric','value']
+
+# Evaluate the 1D Lagrange basis functions on numberOfNodesXi equally spaced nodes, or their derivatives of the given
+# order, at the points xi. Returns a (points x nodes) array.
+def LagrangeBasis1D(xi,numberOfNodesXi,derivative=0):
+    nodeXi = numpy.linspace(0.0,1.0,numberOfNodesXi)
+    values = numpy.empty((len(xi),numberOfNodesXi))
+    for nodeIdx in range(numberOfNodesXi):
+        otherNodeXi = numpy.delete(nodeXi,nodeIdx)
+        basis = numpy.polynomial.Polynomial.fromroots(otherNodeXi)/numpy.prod(nodeXi[nodeIdx]-otherNodeXi)
+        values[:,nodeIdx] = basis.deriv(derivative)(xi)
+    return values
+
+# Evaluate the tensor product Lagrange basis functions of a 3D element at the points xi (points x 3). derivatives gives
+# the order of differentiation with respect to each xi direction. Element nodes are ordered with xi1 varying fastest,
+# as in iron and the exelem files. Returns a (points x element nodes) array.
+def LagrangeBasis(xi,numberOfNodesXi,derivatives=(0,0,0)):
+    xi = numpy.atleast_2d(numpy.asarray(xi,dtype=float))
+    basis = [LagrangeBasis1D(xi[:,direction],numberOfNodesXi,derivatives[direction]) for direction in range(3)]
+    return numpy.einsum('pk,pj,pi->pkji',basis[2],basis[1],basis[0]).reshape(len(xi),-1)
+
+# Interpolate nodal values (nodes x components) over every element at once. elementNodes (elements x element nodes)
+# holds row indices into nodalValues. Returns an (elements x points x components) array.
+def Interpolate(nodalValues,elementNodes,xi,numberOfNodesXi,derivatives=(0,0,0)):
+    return numpy.einsum('pn,enc->epc',LagrangeBasis(xi,numberOfNodesXi,derivatives),nodalValues[elementNodes])
+
+# The Gauss-Legendre points (points x 3) and weights of a tensor product rule on the unit cube
+def GaussPoints(numberOfGaussXi):
+    points,weights = numpy.polynomial.legendre.leggauss(numberOfGaussXi)
+    points = 0.5*(points+1.0)
+    weights = 0.5*weights
+    grids = numpy.meshgrid(points,points,points,indexing='ij')
+    weightGrids = numpy.meshgrid(weights,weights,weights,indexing='ij')
+    return numpy.stack([grid.ravel() for grid in grids[::-1]],axis=1),numpy.prod([grid.ravel() for grid in weightGrids],
+                                                                              axis=0)
+
+# The element node row indices (elements x element nodes) of a regular mesh whose nodes, numbered with x varying
+# fastest, are in rows of coordinates in node number order
+def RegularElementNodes(coordinates,numberOfNodesXi):
+    numberOfAxisNodes = [len(numpy.unique(numpy.round(coordinates[:,axis],10))) for axis in range(3)]
+    numberOfElements = [(numberOfNodes-1)//(numberOfNodesXi-1) for numberOfNodes in numberOfAxisNodes]
+    local = numpy.arange(numberOfNodesXi)
+    localNodes = (local[numpy.newaxis,numpy.newaxis,:]+numberOfAxisNodes[0]*(
+        local[numpy.newaxis,:,numpy.newaxis]+numberOfAxisNodes[1]*local[:,numpy.newaxis,numpy.newaxis])).ravel()
+    elementNodes = []
+    for elementZ in range(numberOfElements[2]):
+        for elementY in range(numberOfElements[1]):
+            for elementX in range(numberOfElements[0]):
+                firstNode = (numberOfNodesXi-1)*(elementX+numberOfAxisNodes[0]*(elementY+numberOfAxisNodes[1]*elementZ))
+                elementNodes.append(firstNode+localNodes)
+    return numpy.array(elementNodes,dtype=int)
+
+# The change in volume of the deformed cantilever relative to the reference volume, integrating the Jacobians of the
+# reference and deformed element mappings with Gauss quadrature
+def VolumeChange(referenceCoordinates,coordinates,elementNodes,numberOfNodesXi):
+    xi,weights = GaussPoints(numberOfNodesXi+1)
+    volumes = []
+    for nodalCoordinates in [referenceCoordinates,coordinates]:
+        jacobian = numpy.stack([Interpolate(nodalCoordinates,elementNodes,xi,numberOfNodesXi,derivatives)
+                                for derivatives in [(1,0,0),(0,1,0),(0,0,1)]],axis=-1)
+        volumes.append(numpy.sum(numpy.linalg.det(jacobian)*weights))
+    return volumes[1]/volumes[0]-1.0
+
+# The curvature of the deformed centreline of the cantilever, the line through the middle of the x-y cross section,
+# at numberOfPointsXi points along each element it passes through. Returns the reference z coordinates and curvatures.
+def CentrelineCurvature(referenceCoordinates,coordinates,elementNodes,numberOfNodesXi,numberOfPointsXi=5):
+    centre = 0.5*(referenceCoordinates.min(axis=0)+referenceCoordinates.max(axis=0))
+    elementMinimum = referenceCoordinates[elementNodes].min(axis=1)
+    elementMaximum = referenceCoordinates[elementNodes].max(axis=1)
+    tolerance = 1e-10*max(1.0,numpy.ptp(referenceCoordinates))
+    onCentreline = numpy.all((elementMinimum[:,:2] <= centre[:2]+tolerance) &
+                             (elementMaximum[:,:2] >= centre[:2]-tolerance),axis=1)
+    # Take one column of elements along z that holds the centreline
+    elements = numpy.flatnonzero(onCentreline)
+    elements = elements[numpy.all(numpy.isclose(elementMinimum[elements,:2],elementMinimum[elements[0],:2]),axis=1)]
+    elementXi = (centre[:2]-elementMinimum[elements[0],:2])/(elementMaximum[elements[0],:2]-elementMinimum[elements[0],:2])
+    xi = numpy.column_stack([numpy.full(numberOfPointsXi,elementXi[0]),numpy.full(numberOfPointsXi,elementXi[1]),
+                             numpy.linspace(0.0,1.0,numberOfPointsXi)])
+    elementLengths = (elementMaximum[elements,2]-elementMinimum[elements,2])[:,numpy.newaxis,numpy.newaxis]
+    # The reference mapping is affine along z so derivatives with respect to z are xi3 derivatives over the length
+    firstDerivative = Interpolate(coordinates,elementNodes[elements],xi,numberOfNodesXi,(0,0,1))/elementLengths
+    secondDerivative = Interpolate(coordinates,elementNodes[elements],xi,numberOfNodesXi,(0,0,2))/elementLengths**2
+    curvature = numpy.linalg.norm(numpy.cross(firstDerivative,secondDerivative),axis=-1)/\
+        numpy.linalg.norm(firstDerivative,axis=-1)**3
+    z = elementMinimum[elements,2][:,numpy.newaxis]+xi[numpy.newaxis,:,2]*elementLengths[:,:,0]
+    order = numpy.argsort(z.ravel(),kind='stable')
+    return z.ravel()[order],curvature.ravel()[order]
+
+# Calculate the metrics of one state: reference and deformed nodal coordinates (nodes x 3), element nodes as row
+# indices, and the stress (..., 6) and growth (..., 3) values at the Gauss or grid points. Returns a list of
+# (metric, value) pairs.
+def StateMetrics(state,numberOfNodesXi):
+    referenceCoordinates = state['referenceCoordinates']
+    coordinates = state['coordinates']
+    elementNodes = state['elementNodes']
+    metrics = []
+    # The tip deflection is the mean y displacement of the nodes on the z = length face
+    tolerance = 1e-10*max(1.0,numpy.ptp(referenceCoordinates))
+    tipNodes = referenceCoordinates[:,2] >= referenceCoordinates[:,2].max()-tolerance
+    metrics.append(('tipDeflection',float(numpy.mean(coordinates[tipNodes,1]-referenceCoordinates[tipNodes,1]))))
+    z,curvature = CentrelineCurvature(referenceCoordinates,coordinates,elementNodes,numberOfNodesXi)
+    metrics.append(('curvatureMean',float(numpy.sum(0.5*(curvature[1:]+curvature[:-1])*numpy.diff(z))/(z[-1]-z[0]))))
+    metrics.append(('curvatureMax',float(curvature.max())))
+    metrics.append(('curvatureRoot',float(curvature[0])))
+    metrics.append(('volumeChange',float(VolumeChange(referenceCoordinates,coordinates,elementNodes,numberOfNodesXi))))
+    for fieldName,componentNames in [('stress',stressComponentNames),('growth',growthComponentNames)]:
+        if state.get(fieldName) is None:
+            continue
+        values = numpy.asarray(state[fieldName]).reshape(-1,len(componentNames))
+        for componentIdx,componentName in enumerate(componentNames):
+            prefix = fieldName+componentName if fieldName == 'stress' else componentName
+            metrics.append((prefix+'Min',float(values[:,componentIdx].min())))
+            metrics.append((prefix+'Max',float(values[:,componentIdx].max())))
+            metrics.append((prefix+'Mean',float(values[:,componentIdx].mean())))
+    return metrics
+
+# Read the state of an exnode/exelem export, including the partN files of a parallel run. Yields one state.
+def ExfileStates(prefix):
+    nodeNumbers,nodeFields,nodeComponentNames = exfile.ReadExnode(prefix)
+    elementNumbers,elementNodeNumbers,elementFields,elementComponentNames = exfile.ReadExelem(prefix)
+    rows = numpy.zeros(nodeNumbers.max()+1,dtype=int)
+    rows[nodeNumbers] = numpy.arange(len(nodeNumbers))
+    # The grid point fields are (elements x components x grid points)
+    yield {
+        'step':0,
+        'time':float('nan'),
+        'referenceCoordinates':nodeFields['Geometry'][:,:3],
+        'coordinates':nodeFields['Displacement'][:,:3],
+        'elementNodes':rows[elementNodeNumbers],
+        'stress':numpy.swapaxes(elementFields['Stress'],1,2) if 'Stress' in elementFields else None,
+        'growth':numpy.swapaxes(elementFields['Growth'],1,2) if 'Growth' in elementFields else None,
+        }
+
+# The values of a results store field at a step, or None if the store does not have the field or, as for the strain
+# and stress of steps a LEAN_MEMORY run did not output them at, only has NaN for it
+def StepValues(fields,name,stepIdx):
+    if name not in fields:
+        return None
+    values = numpy.asarray(fields[name][stepIdx])
+    return None if numpy.all(numpy.isnan(values)) else values
+
+# Read the states of every step of a serial results store, memory mapping the fields so that one step is read at a
+# time. The element nodes are those of the regular generated mesh with numberOfNodesXi nodes per element direction.
+def StoreStates(path,numberOfNodesXi):
+    times,fields,static = results_store.ReadResults(path)
+    referenceCoordinates = static['referenceCoordinates']
+    order = numpy.argsort(static['nodeNumbers'])
+    elementNodes = order[RegularElementNodes(referenceCoordinates[order],numberOfNodesXi)]
+    for stepIdx,stepTime in enumerate(times):
+        yield {
+            'step':stepIdx+1,
+            'time':float(stepTime),
+            'referenceCoordinates':referenceCoordinates,
+            'coordinates':referenceCoordinates+numpy.asarray(fields['displacement'][stepIdx]),
+            'elementNodes':elementNodes,
+            'stress':StepValues(fields,'stress',stepIdx),
+            'growth':StepValues(fields,'growth',stepIdx),
+            }
+
+# Yield the states of a run, a results store directory or HDF5 file or an exnode/exelem output prefix
+def RunStates(run,numberOfNodesXi):
+    if (os.path.isdir(run) or os.path.splitext(run)[1] in ['.h5','.hdf5']):
+        return StoreStates(run,numberOfNodesXi)
+    return ExfileStates(run)
+
+# Yield the tidy metric rows of every step of every run, one step at a time
+def MetricRows(runs,numberOfNodesXi=3):
+    for run in runs:
+        for state in RunStates(run,numberOfNodesXi):
+            for metric,value in StateMetrics(state,numberOfNodesXi):
+                yield {'run':run,'step':state['step'],'time':state['time'],'metric':metric,'value':value}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calculate metrics of cantilever growth results.')
+    parser.add_argument('runs',nargs='+',help='results stores or exnode/exelem output prefixes')
+    parser.add_argument('-o','--output',default=None,help='metrics CSV file (default standard output)')
+    parser.add_argument('--nodes-xi',type=int,default=3,
+                        help='nodes per element direction of results stores, 3 for quadratic interpolation')
+    arguments = parser.parse_args()
+
+    outputFile = open(arguments.output,'w',newline='') if arguments.output else sys.stdout
+    writer = csv.DictWriter(outputFile,metricColumns)
+    writer.writeheader()
+    for row in MetricRows(arguments.runs,arguments.nodes_xi):
+        writer.writerow(row)
+    if arguments.output:
+        outputFile.close()
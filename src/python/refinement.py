@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Refines the cantilever mesh in elements (h) or interpolation order (p) until the tip deflection and stress converge, seeding each level with the previous level's solution.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, csv, math, sys
+
+import numpy
+
+import cantilever_growth
+import continuation
+import field_values
+import postprocess
+
+from opencmiss.iron import iron
+
+from cantilever_parameters import *
+
+H_REFINEMENT = 'h'
+P_REFINEMENT = 'p'
+
+# The metrics checked for convergence by default
+defaultMetricNames = ['tipDeflection','stress33Max','stress33Mean']
+
+# The columns written for every level before the metric columns
+levelNames = ['level','numberOfGlobalXElements','numberOfGlobalYElements','numberOfGlobalZElements','uInterpolation',
+              'numberOfDofs','start','newtonIterations','coldNewtonIterations','solveTime','status']
+
+# Records the dependent field values, displacements and pressure, after every step of a solve so that they can be
+# interpolated onto a refined mesh. The pressure is recorded at every node, where it is interpolated on the
+# displacement basis, or per element if it is element based.
+class NodalSolutionRecorder(object):
+
+    def Start(self,model):
+        self.times = []
+        self.solutions = []
+        self.elementPressures = []
+        self.referenceCoordinates = model.ReferenceCoordinates()
+        self.numberOfNodesXi = model.numberOfNodesXi
+        self.nodalPressure = bool(model.pressureNodes.all())
+
+    def Write(self,model,time):
+        self.times.append(time)
+        self.solutions.append(field_values.NodalValues(model.dependentField,iron.FieldVariableTypes.U,model.localNodes,
+                                                       4 if self.nodalPressure else 3))
+        if not self.nodalPressure:
+            self.elementPressures.append(field_values.ElementValues(model.dependentField,iron.FieldVariableTypes.U,
+                                                                    model.localElements,4))
+
+    def Finish(self,model):
+        pass
+
+    # The recorded pressure of a step at the points (points x 3) in the reference coordinates
+    def Pressure(self,stepIdx,points):
+        if self.nodalPressure:
+            return InterpolateRegularMesh(self.referenceCoordinates,self.solutions[stepIdx][:,3:],self.numberOfNodesXi,
+                                          points)[:,0]
+        return self.elementPressures[stepIdx][RegularMeshElements(self.referenceCoordinates,self.numberOfNodesXi,
+                                                                  points)[0]]
+
+# Find the elements of a regular mesh with numberOfNodesXi nodes per element direction, whose nodes and elements are
+# numbered with x varying fastest, holding the points (points x 3) in its reference coordinates. Returns the element
+# indices and the xi coordinates of the points.
+def RegularMeshElements(referenceCoordinates,numberOfNodesXi,points):
+    elementIndices = numpy.zeros(len(points),dtype=int)
+    xi = numpy.empty((len(points),3))
+    elementStride = 1
+    for axis in range(3):
+        axisNodes = numpy.unique(numpy.round(referenceCoordinates[:,axis],10))
+        bounds = axisNodes[::numberOfNodesXi-1]
+        axisIndices = numpy.clip(numpy.searchsorted(bounds,points[:,axis],side='right')-1,0,len(bounds)-2)
+        xi[:,axis] = (points[:,axis]-bounds[axisIndices])/(bounds[axisIndices+1]-bounds[axisIndices])
+        elementIndices += elementStride*axisIndices
+        elementStride *= len(bounds)-1
+    return elementIndices,xi
+
+# Interpolate nodal values (nodes x components) of a regular mesh with numberOfNodesXi nodes per element direction,
+# whose nodes are numbered with x varying fastest, at the points (points x 3) in its reference coordinates
+def InterpolateRegularMesh(referenceCoordinates,nodalValues,numberOfNodesXi,points):
+    elementIndices,xi = RegularMeshElements(referenceCoordinates,numberOfNodesXi,points)
+    elementNodes = postprocess.RegularElementNodes(referenceCoordinates,numberOfNodesXi)
+    basis = postprocess.LagrangeBasis(xi,numberOfNodesXi)
+    return numpy.einsum('pn,pnc->pc',basis,nodalValues[elementNodes[elementIndices]])
+
+# Interpolate the solution of each step recorded on a coarser model onto a built model and convert them to dependent
+# field U DOF values. The solutions are written into the dependent field to get their DOF values, which Solve then
+# resets. Every displacement and pressure DOF is set, the pressure at the nodes or, if it is element based, at the
+# element centres. Returns a continuation.SolutionRecorder holding them, whose Solution method is an initial guess for
+# Solve.
+def ProlongateSolutions(coarse,model):
+    points = model.ReferenceCoordinates()
+    nodalPressure = model.pressureNodes.all()
+    if not nodalPressure:
+        elementCentres = model.GaussPointCoordinates().mean(axis=1)
+    prolongated = continuation.SolutionRecorder()
+    prolongated.Start(model)
+    for stepIdx,(stepTime,solution) in enumerate(zip(coarse.times,coarse.solutions)):
+        deformedCoordinates = InterpolateRegularMesh(coarse.referenceCoordinates,solution[:,:3],coarse.numberOfNodesXi,
+                                                     points)
+        if nodalPressure:
+            field_values.SetNodalValues(model.dependentField,iron.FieldVariableTypes.U,model.localNodes,
+                                        numpy.column_stack([deformedCoordinates,coarse.Pressure(stepIdx,points)]))
+        else:
+            field_values.SetNodalValues(model.dependentField,iron.FieldVariableTypes.U,model.localNodes,
+                                        deformedCoordinates)
+            field_values.SetElementValues(model.dependentField,iron.FieldVariableTypes.U,model.localElements,4,
+                                          coarse.Pressure(stepIdx,elementCentres))
+        prolongated.Write(model,stepTime)
+    return prolongated
+
+# The number of nodes along the loaded tip edge of a mesh, which lies along x
+def NumberOfEdgeNodes(parameters):
+    return parameters['numberOfGlobalXElements']*parameters['uInterpolation']+1
+
+# The parameters of each level of a refinement study. h refinement multiplies the number of elements in each of the
+# directions by factor every level, p refinement raises the displacement interpolation order every level up to cubic.
+# The first level has the given parameters. A nodal tip force is divided by the relative number of loaded edge nodes on
+# the other levels so that every level applies the same total force, still spread equally over the edge nodes.
+def RefinementLevels(parameters,strategy=H_REFINEMENT,numberOfLevels=4,factor=2,directions='xyz'):
+    parameters = CantileverParameters(parameters)
+    levels = []
+    for levelIdx in range(numberOfLevels):
+        level = dict(parameters)
+        if (strategy == H_REFINEMENT):
+            for direction in directions:
+                name = 'numberOfGlobal%sElements' % direction.upper()
+                level[name] = parameters[name]*factor**levelIdx
+        elif (strategy == P_REFINEMENT):
+            level['uInterpolation'] = parameters['uInterpolation']+levelIdx
+            if (level['uInterpolation'] > CUBIC_LAGRANGE):
+                break
+        else:
+            raise ValueError('Invalid refinement strategy')
+        if (level['forceType'] == NODAL_FORCE):
+            level['force'] = parameters['force']*NumberOfEdgeNodes(parameters)/NumberOfEdgeNodes(level)
+        levels.append(level)
+    return levels
+
+# The convergence metrics of the current solution of a model solved on one computational node
+def ModelMetrics(model,outputs):
+    arrays = model.ResultArrays()
+    referenceCoordinates = model.ReferenceCoordinates()
+    state = {
+        'referenceCoordinates':referenceCoordinates,
+        'coordinates':referenceCoordinates+arrays['displacement'],
+        'elementNodes':postprocess.RegularElementNodes(referenceCoordinates,model.numberOfNodesXi),
+        'stress':arrays['stress'],
+        'growth':arrays['growth'],
+        }
+    metrics = dict(postprocess.StateMetrics(state,model.numberOfNodesXi))
+    metrics['tipDeflection'] = outputs['tipDeflection']
+    return metrics
+
+# The convergence of a metric over its values on the last three levels. The reduction factor is the ratio of the last
+# two changes. With a refinement ratio the observed order of convergence is log(reduction)/log(ratio), and the
+# Richardson estimate of the converged value assumes the changes keep reducing by the same factor.
+def ConvergenceEstimate(values,refinementRatio=None):
+    estimate = {'reductionFactor':float('nan'),'observedOrder':float('nan'),'richardsonEstimate':float('nan')}
+    if (len(values) < 3):
+        return estimate
+    coarseChange = values[-2]-values[-3]
+    fineChange = values[-1]-values[-2]
+    if (fineChange == 0.0):
+        estimate['richardsonEstimate'] = values[-1]
+        return estimate
+    reductionFactor = coarseChange/fineChange
+    estimate['reductionFactor'] = reductionFactor
+    if (reductionFactor > 1.0):
+        if refinementRatio is not None:
+            estimate['observedOrder'] = math.log(reductionFactor)/math.log(refinementRatio)
+        estimate['richardsonEstimate'] = values[-1]+fineChange/(reductionFactor-1.0)
+    return estimate
+
+# Solve the levels in order until the relative change of every metric from the previous level is within tolerance.
+# Each level is seeded with the previous level's solution interpolated onto its mesh unless prolongate is unset, and
+# with compareColdStarts is also solved from a cold start. Returns a list of result dictionaries, one per solved level.
+def RunRefinement(levels,metricNames=defaultMetricNames,tolerance=1e-3,prolongate=True,compareColdStarts=False,
+                  echoMonitor=False):
+    results = []
+    coarse = None
+    for levelIdx,parameters in enumerate(levels):
+        model = cantilever_growth.CantileverGrowthModel(parameters).Build()
+        try:
+            if (model.numberOfComputationalNodes > 1):
+                raise RuntimeError('The refinement study runs on one computational node')
+            result = dict((name,parameters[name]) for name in levelNames[1:5])
+            result['level'] = levelIdx
+            result['numberOfDofs'] = model.numberOfDofs
+            if compareColdStarts:
+                coldOutputs = model.Solve(echoMonitor)
+                result['coldNewtonIterations'] = coldOutputs['newtonIterations']
+            recorder = NodalSolutionRecorder()
+            outputs = None
+            if (coarse is not None and prolongate):
+                result['start'] = 'prolongated'
+                guess = ProlongateSolutions(coarse,model)
+                try:
+                    outputs = model.Solve(echoMonitor,exporters=[recorder],initialGuess=guess.Solution)
+                except RuntimeError:
+                    outputs = None
+                if (outputs is None or not outputs['converged']):
+                    result['start'] = 'cold fallback'
+                    outputs = None
+            else:
+                result['start'] = 'cold'
+            if outputs is None:
+                outputs = model.Solve(echoMonitor,exporters=[recorder])
+            result['newtonIterations'] = outputs['newtonIterations']
+            result['solveTime'] = outputs['solveTime']
+            result['status'] = 'converged' if outputs['converged'] else 'diverged'
+            result['metrics'] = ModelMetrics(model,outputs)
+        finally:
+            model.Destroy()
+        results.append(result)
+        coarse = recorder
+        changes = []
+        if (levelIdx > 0):
+            for name in metricNames:
+                value = result['metrics'][name]
+                previousValue = results[-2]['metrics'][name]
+                changes.append(abs(value-previousValue)/max(abs(value),1e-12))
+        print('Level %d: %d DOFs, %s start, %d Newton iterations%s, %s' %
+              (levelIdx,result['numberOfDofs'],result['start'],result['newtonIterations'],
+               ' (%d from a cold start)' % result['coldNewtonIterations'] if compareColdStarts else '',
+               ', '.join('%s %g' % (name,result['metrics'][name]) for name in metricNames)))
+        sys.stdout.flush()
+        if (changes and max(changes) <= tolerance):
+            result['converged'] = True
+            break
+        result['converged'] = False
+    return results
+
+# Describe the convergence of each metric over the solved levels
+def ConvergenceReport(results,metricNames=defaultMetricNames,refinementRatio=None):
+    lines = ['Converged to tolerance' if results[-1]['converged'] else 'Not converged within %d levels' % len(results)]
+    for name in metricNames:
+        estimate = ConvergenceEstimate([result['metrics'][name] for result in results],refinementRatio)
+        lines.append('%s: finest %g, reduction factor %g, observed order %g, Richardson estimate %g' %
+                     (name,results[-1]['metrics'][name],estimate['reductionFactor'],estimate['observedOrder'],
+                      estimate['richardsonEstimate']))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Refine the cantilever growth problem until its metrics converge.')
+    parser.add_argument('--strategy',choices=[H_REFINEMENT,P_REFINEMENT],default=H_REFINEMENT,
+                        help='refine the number of elements (h) or the interpolation order (p)')
+    parser.add_argument('--levels',type=int,default=4,help='maximum number of levels')
+    parser.add_argument('--factor',type=int,default=2,help='h refinement element multiplier per level')
+    parser.add_argument('--directions',default='xyz',help='directions to refine the elements in for h refinement')
+    parser.add_argument('--tolerance',type=float,default=1e-3,help='relative change of every metric to stop at')
+    parser.add_argument('--metric',nargs='+',default=defaultMetricNames,
+                        help='metrics to converge, any of the postprocess.py metrics')
+    parser.add_argument('--no-prolongation',action='store_true',help='solve every level from a cold start')
+    parser.add_argument('--compare',action='store_true',help='also solve every level from a cold start')
+    parser.add_argument('-o','--output',default='refinement_results.csv',help='results CSV file')
+    arguments = parser.parse_args()
+
+    levels = RefinementLevels({},arguments.strategy,arguments.levels,arguments.factor,arguments.directions)
+    results = RunRefinement(levels,arguments.metric,arguments.tolerance,not arguments.no_prolongation,
+                            arguments.compare)
+    metricNames = sorted(results[0]['metrics'])
+    with open(arguments.output,'w') as resultsFile:
+        writer = csv.writer(resultsFile)
+        writer.writerow(levelNames+metricNames)
+        for result in results:
+            writer.writerow([result.get(name,'') for name in levelNames]+
+                            [result['metrics'][name] for name in metricNames])
+    refinementRatio = arguments.factor if (arguments.strategy == H_REFINEMENT) else None
+    print(ConvergenceReport(results,arguments.metric,refinementRatio))
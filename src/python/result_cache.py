@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief A content addressed cache of cantilever growth results keyed by a hash of the run parameters and CellML models, with least recently used eviction and safe concurrent writers.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import fcntl, hashlib, json, os, shutil, tempfile, time
+
+import numpy
+
+import cantilever_parameters
+
+# Bump when what is stored for a run changes so that older entries are not used
+cacheVersion = 1
+
+# The default size limit of a cache
+defaultMaximumBytes = 1<<30
+
+# The key of a run: a hash of every parameter, defaults included, and of the CellML models so that editing a model
+# invalidates the results computed with it
+def RunKey(parameters={}):
+    digest = hashlib.sha256(('cantilever_growth results %d\n' % cacheVersion).encode())
+    digest.update(json.dumps(cantilever_parameters.CantileverParameters(parameters),sort_keys=True).encode())
+    for fileName in [cantilever_parameters.growthCellMLFileName,cantilever_parameters.constituativeCellMLFileName]:
+        with open(os.path.join(cantilever_parameters.cellMLDirectory,fileName),'rb') as cellMLFile:
+            digest.update(cellMLFile.read())
+    return digest.hexdigest()
+
+# A cache of run results in a directory. Each entry is a directory entries/<key> holding the scalar outputs as
+# outputs.json and optionally the final result arrays as results.npz. Entries are written to a temporary directory and
+# renamed into place, so any number of processes can share the cache: readers only ever see complete entries and when
+# two writers store the same run the second rename fails and its copy is dropped. Using an entry marks it as recently
+# used and once the entries take more than maximumBytes the least recently used are evicted, under a lock so that
+# concurrent writers do not evict twice.
+class ResultCache(object):
+
+    def __init__(self,directory,maximumBytes=defaultMaximumBytes):
+        self.directory = directory
+        self.maximumBytes = maximumBytes
+        self.entriesDirectory = os.path.join(directory,'entries')
+        self.temporaryDirectory = os.path.join(directory,'tmp')
+        os.makedirs(self.entriesDirectory,exist_ok=True)
+        os.makedirs(self.temporaryDirectory,exist_ok=True)
+
+    def EntryDirectory(self,key):
+        return os.path.join(self.entriesDirectory,key)
+
+    # Get the stored results of a run. Returns a dictionary with the outputs and, if they were stored, the result
+    # arrays, or None if the run is not in the cache.
+    def Get(self,parameters={}):
+        entryDirectory = self.EntryDirectory(RunKey(parameters))
+        try:
+            with open(os.path.join(entryDirectory,'outputs.json')) as outputsFile:
+                entry = {'outputs':json.load(outputsFile),'arrays':None}
+            if os.path.exists(os.path.join(entryDirectory,'results.npz')):
+                with numpy.load(os.path.join(entryDirectory,'results.npz')) as resultsFile:
+                    entry['arrays'] = dict((name,resultsFile[name]) for name in resultsFile.files)
+            os.utime(entryDirectory)
+        except (FileNotFoundError,NotADirectoryError):
+            # Not stored, or evicted while it was being read
+            return None
+        return entry
+
+    # Store the outputs and optionally the result arrays of a run
+    def Put(self,parameters,outputs,arrays=None):
+        entryDirectory = self.EntryDirectory(RunKey(parameters))
+        if os.path.exists(entryDirectory):
+            os.utime(entryDirectory)
+            return
+        temporaryDirectory = tempfile.mkdtemp(dir=self.temporaryDirectory)
+        with open(os.path.join(temporaryDirectory,'outputs.json'),'w') as outputsFile:
+            json.dump(outputs,outputsFile)
+        if arrays is not None:
+            numpy.savez(os.path.join(temporaryDirectory,'results.npz'),**arrays)
+        try:
+            os.rename(temporaryDirectory,entryDirectory)
+        except OSError:
+            # Another writer stored the same run first
+            shutil.rmtree(temporaryDirectory,ignore_errors=True)
+        self.Evict()
+
+    # The size in bytes and last use time of every entry
+    def Entries(self):
+        entries = []
+        for key in os.listdir(self.entriesDirectory):
+            entryDirectory = self.EntryDirectory(key)
+            try:
+                size = sum(os.path.getsize(os.path.join(entryDirectory,fileName))
+                           for fileName in os.listdir(entryDirectory))
+                entries.append((os.path.getmtime(entryDirectory),size,key))
+            except FileNotFoundError:
+                pass
+        return entries
+
+    # Evict the least recently used entries until the cache fits in maximumBytes. An entry is renamed out of entries
+    # before it is deleted so that readers never see it half deleted.
+    def Evict(self):
+        with open(os.path.join(self.directory,'lock'),'w') as lockFile:
+            fcntl.flock(lockFile,fcntl.LOCK_EX)
+            entries = sorted(self.Entries())
+            totalBytes = sum(size for lastUsed,size,key in entries)
+            for lastUsed,size,key in entries:
+                if (totalBytes <= self.maximumBytes):
+                    break
+                evictedDirectory = os.path.join(self.temporaryDirectory,'evicted_%s_%d' % (key,os.getpid()))
+                try:
+                    os.rename(self.EntryDirectory(key),evictedDirectory)
+                except FileNotFoundError:
+                    continue
+                shutil.rmtree(evictedDirectory,ignore_errors=True)
+                totalBytes -= size
+
+# Solve a run unless its results are already in the cache. iron is only imported on a miss. Converged runs are stored
+# with their final result arrays. Returns the scalar outputs with 'cached' set if they came from the cache.
+def CachedSolve(parameters,cache,echoMonitor=True,storeArrays=True):
+    entry = cache.Get(parameters)
+    if entry is not None:
+        outputs = dict(entry['outputs'])
+        outputs['cached'] = True
+        return outputs
+    import cantilever_growth
+    model = cantilever_growth.CantileverGrowthModel(parameters).Build()
+    try:
+        outputs = model.Solve(echoMonitor)
+        arrays = model.ResultArrays() if (storeArrays and model.numberOfComputationalNodes == 1) else None
+    finally:
+        model.Destroy()
+    if outputs['converged']:
+        cache.Put(parameters,outputs,arrays)
+    outputs['cached'] = False
+    return outputs
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Streams the results of every time step of a cantilever growth solve to a chunked binary store (HDF5 or append-only NumPy files) and optionally to exnode/exelem files for cmgui.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+import json, os
+
+import numpy
+
+# HDF5 stores are only available if h5py is installed
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# An append-only store in a directory. Arrays written once are kept as .npy files, each streamed field is a raw
+# little-endian float64 file with one record appended per step and metadata.json records the record shapes and the
+# number of complete steps. A step only counts once its metadata has been written so an interrupted run leaves a
+# readable store. Opening a store on an existing directory starts a new, empty store there unless numberOfSteps is
+# given, which resumes the store after its first numberOfSteps steps and drops any later ones.
+class NumpyResultsStore(object):
+
+    def __init__(self,path,numberOfSteps=None):
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.metadata = {'format':'numpy','numberOfSteps':0,'times':[],'fields':{},'static':[]}
+        metadataFileName = os.path.join(path,'metadata.json')
+        if (numberOfSteps is not None and os.path.exists(metadataFileName)):
+            with open(metadataFileName) as metadataFile:
+                self.metadata = json.load(metadataFile)
+            numberOfSteps = min(numberOfSteps,self.metadata['numberOfSteps'])
+            self.metadata['numberOfSteps'] = numberOfSteps
+            self.metadata['times'] = self.metadata['times'][:numberOfSteps]
+        self.WriteMetadata()
+        # The records past the resumed steps are dropped only once the metadata no longer counts them
+        if (numberOfSteps is not None):
+            for name,shape in self.metadata['fields'].items():
+                with open(os.path.join(path,name+'.f64'),'r+b') as fieldFile:
+                    fieldFile.truncate(numberOfSteps*int(numpy.prod(shape))*8)
+
+    def WriteMetadata(self):
+        temporaryFileName = os.path.join(self.path,'metadata.json.tmp')
+        with open(temporaryFileName,'w') as metadataFile:
+            json.dump(self.metadata,metadataFile)
+        os.rename(temporaryFileName,os.path.join(self.path,'metadata.json'))
+
+    def WriteStatic(self,name,array):
+        numpy.save(os.path.join(self.path,name+'.npy'),numpy.asarray(array))
+        if name not in self.metadata['static']:
+            self.metadata['static'].append(name)
+        self.WriteMetadata()
+
+    def Append(self,time,fields):
+        for name,array in fields.items():
+            array = numpy.ascontiguousarray(array,dtype='<f8')
+            # The first record of a field replaces any file left in the directory by an earlier run
+            mode = 'ab'
+            if name not in self.metadata['fields']:
+                self.metadata['fields'][name] = list(array.shape)
+                mode = 'wb'
+            elif list(array.shape) != self.metadata['fields'][name]:
+                raise ValueError('Field %s changed shape from %s to %s' % (name,self.metadata['fields'][name],
+                                                                          list(array.shape)))
+            with open(os.path.join(self.path,name+'.f64'),mode) as fieldFile:
+                fieldFile.write(array.tobytes())
+        self.metadata['times'].append(float(time))
+        self.metadata['numberOfSteps'] += 1
+        self.WriteMetadata()
+
+    def Close(self):
+        pass
+
+# A store in an HDF5 file. Each streamed field is a chunked dataset that grows by one record per step. As with a NumPy
+# store, given numberOfSteps an existing file is resumed after its first numberOfSteps steps.
+class HDF5ResultsStore(object):
+
+    def __init__(self,path,compression=None,numberOfSteps=None):
+        if h5py is None:
+            raise ImportError('h5py is needed to write HDF5 results stores')
+        self.compression = compression
+        if (numberOfSteps is not None and os.path.exists(path)):
+            self.file = h5py.File(path,'a')
+            numberOfSteps = min(numberOfSteps,self.file['times'].shape[0])
+            for dataset in [self.file['times']]+list(self.file.get('fields',{}).values()):
+                dataset.resize(numberOfSteps,axis=0)
+            return
+        self.file = h5py.File(path,'w')
+        self.file.attrs['format'] = 'hdf5'
+        self.file.create_dataset('times',shape=(0,),maxshape=(None,),dtype='f8',chunks=(1024,))
+
+    def WriteStatic(self,name,array):
+        if ('static/'+name) in self.file:
+            del self.file['static/'+name]
+        self.file.create_dataset('static/'+name,data=numpy.asarray(array))
+
+    def Append(self,time,fields):
+        stepIdx = self.file['times'].shape[0]
+        for name,array in fields.items():
+            array = numpy.asarray(array,dtype='f8')
+            datasetName = 'fields/'+name
+            if datasetName not in self.file:
+                self.file.create_dataset(datasetName,shape=(0,)+array.shape,maxshape=(None,)+array.shape,dtype='f8',
+                                         chunks=(1,)+array.shape,compression=self.compression)
+            dataset = self.file[datasetName]
+            dataset.resize(stepIdx+1,axis=0)
+            dataset[stepIdx] = array
+        self.file['times'].resize(stepIdx+1,axis=0)
+        self.file['times'][stepIdx] = time
+        self.file.flush()
+
+    def Close(self):
+        self.file.close()
+
+# Open a new results store, or given numberOfSteps resume an existing one after that many steps. Paths ending in .h5 or
+# .hdf5 give an HDF5 store, anything else a NumPy store directory.
+def OpenResultsStore(path,numberOfSteps=None):
+    if os.path.splitext(path)[1] in ['.h5','.hdf5']:
+        return HDF5ResultsStore(path,numberOfSteps=numberOfSteps)
+    return NumpyResultsStore(path,numberOfSteps)
+
+# Read a results store. Returns the step times, a dictionary of the streamed fields with the step as the first axis
+# and a dictionary of the static arrays. The fields of NumPy stores are memory mapped rather than read.
+def ReadResults(path):
+    if os.path.isdir(path):
+        with open(os.path.join(path,'metadata.json')) as metadataFile:
+            metadata = json.load(metadataFile)
+        numberOfSteps = metadata['numberOfSteps']
+        fields = {}
+        for name,shape in metadata['fields'].items():
+            fields[name] = numpy.memmap(os.path.join(path,name+'.f64'),dtype='<f8',mode='r',
+                                        shape=tuple([numberOfSteps]+shape))
+        static = dict((name,numpy.load(os.path.join(path,name+'.npy'))) for name in metadata['static'])
+        return numpy.array(metadata['times'][:numberOfSteps]),fields,static
+    if h5py is None:
+        raise ImportError('h5py is needed to read HDF5 results stores')
+    with h5py.File(path,'r') as resultsFile:
+        fields = dict((name,dataset[...]) for name,dataset in resultsFile.get('fields',{}).items())
+        static = dict((name,dataset[...]) for name,dataset in resultsFile.get('static',{}).items())
+        return resultsFile['times'][...],fields,static
+
+# Streams the model results to a results store after every time step. In a parallel run each computational node
+# writes the nodes and elements of its own domain to its own store, path.partN. A solve restarted from a checkpoint
+# resumes the store after the steps before the checkpoint.
+class StoreExporter(object):
+
+    def __init__(self,path):
+        self.path = path
+
+    def Start(self,model):
+        path = self.path
+        if (model.numberOfComputationalNodes > 1):
+            root,extension = os.path.splitext(self.path)
+            path = '%s.part%d%s' % (root,model.computationalNodeNumber,extension)
+        self.store = OpenResultsStore(path,model.stepNumber if (model.stepNumber > 0) else None)
+        self.store.WriteStatic('nodeNumbers',model.localNodes)
+        self.store.WriteStatic('referenceCoordinates',model.ReferenceCoordinates())
+        self.store.WriteStatic('elementNumbers',model.localElements)
+
+    # Steps without the strain and stress, see CantileverGrowthModel.DerivedOutputStep, get NaN records for them so that
+    # every field has a record for every step
+    def Write(self,model,time):
+        arrays = model.ResultArrays(model.DerivedOutputStep(time))
+        for name in ['strain','stress']:
+            if name not in arrays:
+                arrays[name] = numpy.full((len(model.localElements),model.numberOfGaussPoints,6),numpy.nan)
+        self.store.Append(time,arrays)
+
+    def Finish(self,model):
+        self.store.Close()
+
+# Exports the model fields as exnode/exelem files for cmgui every stepInterval time steps. The files are numbered by
+# the step, which a solve restarted from a checkpoint carries on from the checkpoint's step.
+class ExnodeExporter(object):
+
+    def __init__(self,outputPrefix,stepInterval=1):
+        self.outputPrefix = outputPrefix
+        self.stepInterval = stepInterval
+
+    def Start(self,model):
+        self.stepNumber = model.stepNumber
+
+    def Write(self,model,time):
+        self.stepNumber += 1
+        if self.stepNumber % self.stepInterval == 0:
+            model.Export('%s_%04d' % (self.outputPrefix,self.stepNumber))
+
+    def Finish(self,model):
+        pass
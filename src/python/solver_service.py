@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Keeps a pool of long-lived worker processes with built cantilever growth models and serves solve jobs to them over a local socket.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, json, multiprocessing, os, socket, socketserver, statistics, sys, tempfile, threading, time
+
+import numpy
+
+import cantilever_parameters
+import sweep
+
+# The default number of jobs a worker solves before it is replaced, which bounds any memory iron leaks between solves
+defaultMaximumJobs = 100
+
+# The parameters a model is built from. Jobs with the same build key can be solved on the same model after an Update.
+def BuildKey(parameters):
+    parameters = cantilever_parameters.CantileverParameters(parameters)
+    return tuple(sorted((name,value) for name,value in parameters.items()
+                        if name not in cantilever_parameters.updatableParameters))
+
+# Solve jobs received on connection until it is closed or sent None. This is what each worker process runs. The model
+# of the last job is kept built and the next job updates it if only updatable parameters differ, so iron, the CellML
+# models and the problem are only set up again when a job needs a different mesh or discretisation. The solver output
+# goes to logFileName rather than the service's standard output.
+def WorkerLoop(connection,logFileName=None):
+    logFile = open(logFileName if logFileName else os.devnull,'a')
+    os.dup2(logFile.fileno(),sys.stdout.fileno())
+    os.dup2(logFile.fileno(),sys.stderr.fileno())
+    import cantilever_growth
+    model = None
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        startTime = time.time()
+        result = {}
+        try:
+            parameters = cantilever_parameters.CantileverParameters(job.get('parameters',{}))
+            if (model is not None and BuildKey(parameters) != BuildKey(model.parameters)):
+                model.Destroy()
+                model = None
+            result['built'] = model is None
+            if model is None:
+                model = cantilever_growth.CantileverGrowthModel(parameters).Build()
+            else:
+                model.Update(parameters)
+            outputs = model.Solve(echoMonitor=False)
+            outputNames = job.get('outputs') or sorted(outputs)
+            unknownNames = [name for name in outputNames if name not in outputs]
+            if unknownNames:
+                raise ValueError('Unknown outputs: '+', '.join(unknownNames))
+            result['outputs'] = dict((name,outputs[name]) for name in outputNames)
+            arrayNames = job.get('arrays') or []
+            if arrayNames:
+                arrays = model.ResultArrays('strain' in arrayNames or 'stress' in arrayNames)
+                arrays['referenceCoordinates'] = model.ReferenceCoordinates()
+                result['arrays'] = dict((name,numpy.asarray(arrays[name]).tolist()) for name in arrayNames)
+            result['status'] = 'converged' if outputs['converged'] else 'diverged'
+        except Exception as exception:
+            result['status'] = 'failed'
+            result['message'] = '%s: %s' % (type(exception).__name__,exception)
+            # A failed build or solve can leave the model in any state so the next job starts from a new one
+            if model is not None:
+                try:
+                    model.Destroy()
+                except Exception:
+                    pass
+                model = None
+        result['solveWallTime'] = time.time()-startTime
+        connection.send(result)
+        sys.stdout.flush()
+    if model is not None:
+        model.Destroy()
+
+# A job waiting in the queue of a SolverPool
+class PendingJob(object):
+
+    def __init__(self,job):
+        self.job = job
+        self.buildKey = BuildKey(job.get('parameters',{}))
+        self.submitTime = time.time()
+        self.done = threading.Event()
+        self.result = None
+
+# One worker process of a SolverPool, started when it is first needed, running workerFunction. The process is replaced
+# after maximumJobs jobs, when a job exceeds its timeout and when it crashes. The build key of the model the process
+# holds is kept by the pool, under its condition, as the other workers' threads read it to pick their jobs.
+class WorkerSlot(object):
+
+    def __init__(self,slotNumber,maximumJobs,logDirectory=None,workerFunction=WorkerLoop):
+        self.slotNumber = slotNumber
+        self.maximumJobs = maximumJobs
+        self.logDirectory = logDirectory
+        self.workerFunction = workerFunction
+        self.process = None
+        self.connection = None
+        self.buildKey = None
+        self.numberOfJobs = 0
+        self.numberOfProcesses = 0
+
+    def Start(self):
+        context = multiprocessing.get_context('spawn')
+        self.connection,workerConnection = context.Pipe()
+        logFileName = os.path.join(self.logDirectory,'worker%d.log' % self.slotNumber) if self.logDirectory else None
+        self.process = context.Process(target=self.workerFunction,args=(workerConnection,logFileName),daemon=True)
+        self.process.start()
+        workerConnection.close()
+        self.numberOfJobs = 0
+        self.numberOfProcesses += 1
+
+    # Stop the worker process, letting it destroy its model unless kill is set
+    def Stop(self,kill=False):
+        if self.process is None:
+            return
+        if not kill:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError,OSError):
+                pass
+            self.process.join(10.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+
+    # Solve a job on the worker process and return its result
+    def Run(self,job,timeout=None):
+        if (self.process is None or not self.process.is_alive()):
+            self.Stop(kill=True)
+            self.Start()
+        self.connection.send(job)
+        if not self.connection.poll(timeout):
+            self.Stop(kill=True)
+            return {'status':'timeout','message':'Job exceeded %g s' % timeout}
+        try:
+            result = self.connection.recv()
+        except EOFError:
+            self.process.join(1.0)
+            exitCode = self.process.exitcode
+            self.Stop(kill=True)
+            return {'status':'crashed','message':'Worker exited with code %s' % exitCode}
+        self.numberOfJobs += 1
+        if (self.numberOfJobs >= self.maximumJobs):
+            self.Stop()
+        return result
+
+# A pool of numberOfWorkers worker processes solving queued jobs. A job is a dictionary of the 'parameters' to solve
+# for, the names of the scalar 'outputs' (default all) and result 'arrays' (default none, any of the ResultArrays and
+# referenceCoordinates) to return and an optional 'timeout' in seconds, otherwise the pool's timeout. A free worker
+# takes the oldest queued job, or a job that its model can be updated for if there is one in the first numberOfWorkers
+# jobs of the queue, so that a mix of meshes does not rebuild models any more than needed without holding back the
+# oldest jobs for long. The workers run workerFunction, see WorkerLoop.
+class SolverPool(object):
+
+    def __init__(self,numberOfWorkers=1,timeout=None,maximumJobs=defaultMaximumJobs,logDirectory=None,
+                 workerFunction=WorkerLoop):
+        if logDirectory and not os.path.exists(logDirectory):
+            os.makedirs(logDirectory)
+        self.timeout = timeout
+        self.slots = [WorkerSlot(slotNumber,maximumJobs,logDirectory,workerFunction)
+                      for slotNumber in range(numberOfWorkers)]
+        self.pending = []
+        self.condition = threading.Condition()
+        self.closed = False
+        self.threads = [threading.Thread(target=self.SlotLoop,args=(slot,),daemon=True) for slot in self.slots]
+        for thread in self.threads:
+            thread.start()
+
+    def NextJob(self,slot):
+        for pendingJob in self.pending[:len(self.slots)]:
+            if (slot.buildKey is not None and pendingJob.buildKey == slot.buildKey):
+                self.pending.remove(pendingJob)
+                return pendingJob
+        return self.pending.pop(0)
+
+    def SlotLoop(self,slot):
+        while True:
+            with self.condition:
+                while (not self.pending and not self.closed):
+                    self.condition.wait()
+                if self.closed:
+                    break
+                pendingJob = self.NextJob(slot)
+            startTime = time.time()
+            try:
+                result = slot.Run(pendingJob.job,pendingJob.job.get('timeout',self.timeout))
+            except Exception as exception:
+                slot.Stop(kill=True)
+                result = {'status':'failed','message':'%s: %s' % (type(exception).__name__,exception)}
+            # The worker keeps its model if the job was solved and the process was not stopped
+            with self.condition:
+                if (slot.process is not None and result['status'] in ['converged','diverged']):
+                    slot.buildKey = pendingJob.buildKey
+                else:
+                    slot.buildKey = None
+            result['worker'] = slot.slotNumber
+            result['queueTime'] = startTime-pendingJob.submitTime
+            result['wallTime'] = time.time()-pendingJob.submitTime
+            pendingJob.result = result
+            pendingJob.done.set()
+        slot.Stop()
+
+    # Queue a job and wait for its result. Unknown parameters are rejected with a ValueError before the job is queued.
+    def Submit(self,job):
+        pendingJob = PendingJob(job)
+        with self.condition:
+            if self.closed:
+                raise RuntimeError('The solver pool is closed')
+            self.pending.append(pendingJob)
+            self.condition.notify()
+        pendingJob.done.wait()
+        return pendingJob.result
+
+    # The number of queued jobs and the jobs and processes of each worker
+    def Status(self):
+        with self.condition:
+            return {'queued':len(self.pending),
+                    'workers':[{'worker':slot.slotNumber,'jobs':slot.numberOfJobs,'processes':slot.numberOfProcesses,
+                                'warm':slot.buildKey is not None} for slot in self.slots]}
+
+    # Stop the workers once their current jobs are done. Queued jobs are not solved.
+    def Close(self):
+        with self.condition:
+            self.closed = True
+            for pendingJob in self.pending:
+                pendingJob.result = {'status':'cancelled','message':'The solver pool was closed'}
+                pendingJob.done.set()
+            self.pending = []
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+# Serves a connection to the service. Each line received is a JSON job, or {"command": "status"}, and is answered
+# with a line of JSON once it is done. Jobs from one connection are solved in turn, open several connections to have
+# jobs solved concurrently.
+class JobHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line.decode())
+                if (job.get('command') == 'status'):
+                    result = self.server.pool.Status()
+                else:
+                    result = self.server.pool.Submit(job)
+            except Exception as exception:
+                result = {'status':'failed','message':'%s: %s' % (type(exception).__name__,exception)}
+            self.wfile.write((json.dumps(result)+'\n').encode())
+            self.wfile.flush()
+
+# The service: a SolverPool answering jobs on a Unix domain socket at address
+class SolverServer(socketserver.ThreadingMixIn,socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self,address,pool):
+        if os.path.exists(address):
+            os.remove(address)
+        socketserver.UnixStreamServer.__init__(self,address,JobHandler)
+        self.pool = pool
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+# A connection to the service
+class SolverClient(object):
+
+    def __init__(self,address):
+        self.socket = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        self.socket.connect(address)
+        self.file = self.socket.makefile('rwb')
+
+    def Request(self,request):
+        self.file.write((json.dumps(request)+'\n').encode())
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise RuntimeError('The solver service closed the connection')
+        return json.loads(line.decode())
+
+    # Solve for the parameters and return the result, see SolverPool
+    def Solve(self,parameters={},outputs=None,arrays=None,timeout=None):
+        job = {'parameters':parameters}
+        if outputs is not None:
+            job['outputs'] = outputs
+        if arrays is not None:
+            job['arrays'] = arrays
+        if timeout is not None:
+            job['timeout'] = timeout
+        return self.Request(job)
+
+    def Status(self):
+        return self.Request({'command':'status'})
+
+    def Close(self):
+        self.file.close()
+        self.socket.close()
+
+# Compare the latency of solving the points through a one worker service with launching a fresh script for each, as
+# sweep.py does. The first service job includes starting the worker and building the model.
+def Benchmark(points,timeout=None):
+    freshLatencies = []
+    for point in points:
+        result = sweep.SolvePoint(point,timeout)
+        freshLatencies.append(result['wallTime'])
+    address = os.path.join(tempfile.mkdtemp(prefix='cantilever_service_'),'socket')
+    pool = SolverPool(1,timeout)
+    server = SolverServer(address,pool)
+    serverThread = threading.Thread(target=server.serve_forever,daemon=True)
+    serverThread.start()
+    serviceLatencies = []
+    try:
+        client = SolverClient(address)
+        for point in points:
+            startTime = time.time()
+            result = client.Solve(point,outputs=['tipDeflection'])
+            serviceLatencies.append(time.time()-startTime)
+            if (result['status'] != 'converged'):
+                print('Service job %s: %s' % (result['status'],result.get('message','')))
+        client.Close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        pool.Close()
+        os.rmdir(os.path.dirname(address))
+    warmLatencies = serviceLatencies[1:] or serviceLatencies
+    return '\n'.join([
+        'Jobs: %d' % len(points),
+        'Fresh script latency: mean %.3f s, median %.3f s' % (statistics.mean(freshLatencies),
+                                                             statistics.median(freshLatencies)),
+        'Service first job latency: %.3f s' % serviceLatencies[0],
+        'Service warm job latency: mean %.3f s, median %.3f s' % (statistics.mean(warmLatencies),
+                                                                 statistics.median(warmLatencies)),
+        'Speed up (median): %.1fx' % (statistics.median(freshLatencies)/statistics.median(warmLatencies))])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve cantilever growth solve jobs from a pool of warm workers.')
+    parser.add_argument('--socket',default=os.path.join(tempfile.gettempdir(),'cantilever_growth.sock'),
+                        help='Unix domain socket to serve on or connect to')
+    parser.add_argument('-n','--workers',type=int,default=1,help='number of worker processes')
+    parser.add_argument('--timeout',type=float,default=None,help='default maximum time in seconds for one job')
+    parser.add_argument('--max-jobs',type=int,default=defaultMaximumJobs,
+                        help='number of jobs after which a worker process is replaced')
+    parser.add_argument('--log-directory',default=None,help='directory to write the solver output of each worker')
+    parser.add_argument('--client',action='store_true',
+                        help='send the JSON jobs on standard input, one per line, to a running service and print the '
+                        'results')
+    parser.add_argument('--benchmark',type=int,default=0,metavar='N',
+                        help='compare the latency of N jobs through the service with launching fresh scripts')
+    arguments = parser.parse_args()
+
+    if arguments.benchmark:
+        forces = numpy.linspace(-0.3,-0.5,arguments.benchmark)
+        print(Benchmark([{'force':float(force)} for force in forces],arguments.timeout))
+    elif arguments.client:
+        client = SolverClient(arguments.socket)
+        for line in sys.stdin:
+            if line.strip():
+                print(json.dumps(client.Request(json.loads(line))))
+                sys.stdout.flush()
+        client.Close()
+    else:
+        pool = SolverPool(arguments.workers,arguments.timeout,arguments.max_jobs,arguments.log_directory)
+        server = SolverServer(arguments.socket,pool)
+        print('Serving on %s with %d workers' % (arguments.socket,arguments.workers))
+        sys.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            pool.Close()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+#> \file
+#> \brief Sweeps the cantilever growth problem over a parameter grid or a file of sample points, solving the points in parallel worker processes and collecting the scalar outputs into one results table.
+#>
+#> \section LICENSE
+#>
+#> Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#>
+#> The contents of this file are subject to the Mozilla Public License
+#> Version 1.1 (the "License"); you may not use this file except in
+#> compliance with the License. You may obtain a copy of the License at
+#> http://www.mozilla.org/MPL/
+#>
+#> Software distributed under the License is distributed on an "AS IS"
+#> basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See the
+#> License for the specific language governing rights and limitations
+#> under the License.
+#>
+#> The Original Code is OpenCMISS
+#>
+#> The Initial Developer of the Original Code is University of Auckland,
+#> Auckland, New Zealand and University of Oxford, Oxford, United
+#> Kingdom. Portions created by the University of Auckland and University
+#> of Oxford are Copyright (C) 2007 by the University of Auckland and
+#> the University of Oxford. All Rights Reserved.
+#>
+#> Contributor(s): 
+#>
+#> Alternatively, the contents of this file may be used under the terms of
+#> either the GNU General Public License Version 2 or later (the "GPL"), or
+#> the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+#> in which case the provisions of the GPL or the LGPL are applicable instead
+#> of those above. if you wish to allow use of your version of this file only
+#> under the terms of either the GPL or the LGPL, and not to allow others to
+#> use your version of this file under the terms of the MPL, indicate your
+#> decision by deleting the provisions above and replace them with the notice
+#> and other provisions required by the GPL or the LGPL. if you do not delete
+#> the provisions above, a recipient may use your version of this file under
+#> the terms of any one of the MPL, the GPL or the LGPL.
+#>
+
+#> Main script
+import argparse, csv, itertools, json, os, subprocess, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+
+import result_cache
+
+# The columns written for every point after the parameter columns
+outputNames = ['status','tipDeflection','lambda1','lambda2','lambda3','newtonSolves','newtonIterations',
+               'maximumNewtonIterations','finalResidualNorm','solveTime','wallTime','message']
+
+# Read a JSON parameter grid. Each entry maps a parameter name to a value or a list of values and the points are the
+# cartesian product of the lists.
+def ReadGrid(fileName):
+    with open(fileName) as gridFile:
+        grid = json.load(gridFile)
+    names = list(grid.keys())
+    values = [grid[name] if isinstance(grid[name],list) else [grid[name]] for name in names]
+    return [dict(zip(names,point)) for point in itertools.product(*values)]
+
+# Read sample points from a CSV file with one column per parameter and one row per point. Empty cells are left out of
+# the point so that those parameters keep their defaults.
+def ReadSamples(fileName):
+    points = []
+    with open(fileName) as samplesFile:
+        reader = csv.DictReader(samplesFile)
+        for row in reader:
+            point = {}
+            for name,value in row.items():
+                # DictReader puts the cells past the last column in a list under None
+                if name is None:
+                    if any(cell.strip() for cell in value):
+                        raise ValueError('%s line %d has more cells than columns' % (fileName,reader.line_num))
+                    continue
+                if (value is None or value.strip() == ''):
+                    continue
+                try:
+                    point[name] = float(value)
+                except ValueError:
+                    raise ValueError('%s line %d column %s: %r is not a number' % (fileName,reader.line_num,name,
+                                                                                     value))
+            points.append(point)
+    return points
+
+# Solve one point in this process and write its outputs as JSON. This is what each worker process runs. With a
+# cache directory the point is looked up in, and once converged stored in, a result_cache.ResultCache.
+def WorkerMain(pointFileName,resultFileName,cacheDirectory=None,cacheBytes=None):
+    with open(pointFileName) as pointFile:
+        point = json.load(pointFile)
+    result = {}
+    try:
+        if cacheDirectory:
+            result = result_cache.CachedSolve(point,result_cache.ResultCache(cacheDirectory,int(cacheBytes)),
+                                              echoMonitor=False)
+        else:
+            import cantilever_growth
+            result = cantilever_growth.SolveCantilever(point,echoMonitor=False)
+        result['status'] = 'converged' if result['converged'] else 'diverged'
+    except Exception as exception:
+        result['status'] = 'failed'
+        result['message'] = '%s: %s' % (type(exception).__name__,exception)
+    with open(resultFileName,'w') as resultFile:
+        json.dump(result,resultFile)
+
+# Solve one point in a fresh worker process so that every point has its own iron problem and a point that fails or
+# crashes the worker only loses that point. A point already in the cache is returned without starting a worker.
+def SolvePoint(point,timeout=None,logFileName=None,cache=None):
+    if cache is not None:
+        entry = cache.Get(point)
+        if entry is not None:
+            result = dict(entry['outputs'])
+            result.update({'status':'converged','message':'cached','wallTime':0.0})
+            return result
+    workDirectory = tempfile.mkdtemp(prefix='cantilever_sweep_')
+    pointFileName = os.path.join(workDirectory,'point.json')
+    resultFileName = os.path.join(workDirectory,'result.json')
+    with open(pointFileName,'w') as pointFile:
+        json.dump(point,pointFile)
+    logFile = open(logFileName,'w') if logFileName else open(os.devnull,'w')
+    startTime = time.time()
+    try:
+        workerArguments = [pointFileName,resultFileName]
+        if cache is not None:
+            workerArguments += [cache.directory,str(cache.maximumBytes)]
+        returnCode = subprocess.call([sys.executable,os.path.abspath(__file__),'--worker']+workerArguments,
+                                     cwd=os.path.dirname(os.path.abspath(__file__)),stdout=logFile,
+                                     stderr=subprocess.STDOUT,timeout=timeout)
+        if os.path.exists(resultFileName):
+            with open(resultFileName) as resultFile:
+                result = json.load(resultFile)
+        else:
+            result = {'status':'crashed','message':'Worker exited with code %d' % returnCode}
+    except subprocess.TimeoutExpired:
+        result = {'status':'timeout','message':'Worker exceeded %g s' % timeout}
+    finally:
+        logFile.close()
+        for fileName in [pointFileName,resultFileName]:
+            if os.path.exists(fileName):
+                os.remove(fileName)
+        os.rmdir(workDirectory)
+    result['wallTime'] = time.time()-startTime
+    return result
+
+# Solve all the points using numberOfWorkers concurrent worker processes. Points found in the optional
+# result_cache.ResultCache are not solved again. Returns the results in point order.
+def RunSweep(points,numberOfWorkers=None,timeout=None,logDirectory=None,cache=None):
+    if numberOfWorkers is None:
+        numberOfWorkers = os.cpu_count() or 1
+    if logDirectory and not os.path.exists(logDirectory):
+        os.makedirs(logDirectory)
+
+    def Solve(pointIdx):
+        logFileName = os.path.join(logDirectory,'point%d.log' % pointIdx) if logDirectory else None
+        result = SolvePoint(points[pointIdx],timeout,logFileName,cache)
+        print('Point %d/%d: %s (%.1f s)' % (pointIdx+1,len(points),result['status'],result['wallTime']))
+        sys.stdout.flush()
+        return result
+
+    with ThreadPoolExecutor(max_workers=numberOfWorkers) as executor:
+        return list(executor.map(Solve,range(len(points))))
+
+# Write the parameters and outputs of every point as columns of a CSV file or, for a .npz file name, as one NumPy
+# array per column.
+def WriteResults(fileName,points,results):
+    parameterNames = []
+    for point in points:
+        parameterNames.extend(name for name in point if name not in parameterNames)
+    columnNames = ['point']+parameterNames+outputNames
+    rows = [[pointIdx]+[point.get(name,'') for name in parameterNames]+[result.get(name,'') for name in outputNames]
+            for pointIdx,(point,result) in enumerate(zip(points,results))]
+    if fileName.endswith('.npz'):
+        import numpy
+        columns = {}
+        for columnIdx,name in enumerate(columnNames):
+            values = [row[columnIdx] for row in rows]
+            # Outputs that are missing for failed points become NaN in numeric columns
+            if name not in ['status','message'] and all(value == '' or isinstance(value,(int,float)) for value in values):
+                columns[name] = numpy.array([float('nan') if value == '' else value for value in values],dtype=float)
+            else:
+                columns[name] = numpy.array([str(value) for value in values])
+        numpy.savez(fileName,**columns)
+    else:
+        with open(fileName,'w') as resultsFile:
+            writer = csv.writer(resultsFile)
+            writer.writerow(columnNames)
+            writer.writerows(rows)
+
+if __name__ == '__main__':
+    if len(sys.argv) in [4,6] and sys.argv[1] == '--worker':
+        WorkerMain(*sys.argv[2:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Sweep the cantilever growth problem over a set of parameter points.')
+    inputGroup = parser.add_mutually_exclusive_group(required=True)
+    inputGroup.add_argument('--grid',help='JSON file mapping parameter names to lists of values')
+    inputGroup.add_argument('--samples',help='CSV file with one column per parameter and one row per point')
+    parser.add_argument('-o','--output',default='sweep_results.csv',help='results file (.csv or .npz)')
+    parser.add_argument('-n','--workers',type=int,default=None,help='number of worker processes')
+    parser.add_argument('--timeout',type=float,default=None,help='maximum time in seconds for one point')
+    parser.add_argument('--log-directory',default=None,help='directory to write the solver output of each point')
+    parser.add_argument('--cache',default=None,help='result cache directory, which may be shared by concurrent sweeps')
+    parser.add_argument('--cache-size',type=float,default=result_cache.defaultMaximumBytes/2**20,
+                        help='size limit of the result cache in MB')
+    arguments = parser.parse_args()
+
+    points = ReadGrid(arguments.grid) if arguments.grid else ReadSamples(arguments.samples)
+    print('Solving %d points' % len(points))
+    cache = result_cache.ResultCache(arguments.cache,int(arguments.cache_size*2**20)) if arguments.cache else None
+    results = RunSweep(points,arguments.workers,arguments.timeout,arguments.log_directory,cache)
+    WriteResults(arguments.output,points,results)
+    numberOfConverged = sum(1 for result in results if result['status'] == 'converged')
+    print('%d of %d points converged. Results written to %s' % (numberOfConverged,len(points),arguments.output))
@@ -0,0 +1,36 @@
+import json
+
+import benchmark
+
+def test_launcher_rank(monkeypatch):
+    for name in ['OMPI_COMM_WORLD_RANK','PMI_RANK','PMIX_RANK']:
+        monkeypatch.delenv(name,raising=False)
+    assert benchmark.LauncherRank() == 0
+    monkeypatch.setenv('PMI_RANK','3')
+    assert benchmark.LauncherRank() == 3
+
+def test_worker_failing_before_build_writes_its_own_rank_file(tmp_path,monkeypatch):
+    monkeypatch.setenv('OMPI_COMM_WORLD_RANK','2')
+    caseFileName = tmp_path/'case.json'
+    # Missing parameters make the worker fail whether or not iron is installed
+    caseFileName.write_text(json.dumps({}))
+    benchmark.WorkerMain(str(caseFileName),str(tmp_path/'result.json'))
+    with open(str(tmp_path/'result.json.2')) as resultFile:
+        result = json.load(resultFile)
+    assert result['status'] == 'failed'
+    assert result['peakRSS'] > 0
+
+def test_merge_rank_results_takes_slowest_rank():
+    rankResults = [{'status':'converged','timings':{'solve':1.0},'peakRSS':10},
+                   {'status':'diverged','message':'rank 1','timings':{'solve':2.0},'peakRSS':20}]
+    result = benchmark.MergeRankResults(rankResults)
+    assert result['status'] == 'diverged'
+    assert result['timings']['solve'] == 2.0
+    assert (result['peakRSS'],result['totalPeakRSS']) == (20,30)
+    assert benchmark.MergeRankResults([])['status'] == 'crashed'
+
+def test_case_key_names_the_linear_solver():
+    case = benchmark.BenchmarkCases([(1,1,3)],[(2,1)],[2],['gmres'],'jacobi')[0]
+    assert benchmark.CaseKey(case) == '1x1x3 u2 p1 np2 gmres/jacobi'
+    weakCase = benchmark.BenchmarkCases([(1,1,3)],[(2,1)],[4],scaling='weak')[0]
+    assert weakCase['parameters']['numberOfGlobalZElements'] == 12
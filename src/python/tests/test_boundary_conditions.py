@@ -0,0 +1,45 @@
+import numpy
+import pytest
+
+pytest.importorskip('opencmiss.iron')
+import boundary_conditions
+
+# The nodes of a line of elements along the z axis with numberOfNodesXi nodes per element
+def LineCoordinates(numberOfElements,numberOfNodesXi,length=3.0):
+    z = numpy.linspace(0.0,length,numberOfElements*(numberOfNodesXi-1)+1)
+    return numpy.stack([numpy.ones(len(z)),numpy.zeros(len(z)),z],axis=1)
+
+@pytest.mark.parametrize('numberOfNodesXi',[2,3,4])
+def test_load_weights_sum_to_one(numberOfNodesXi):
+    weights = boundary_conditions.LoadWeights(LineCoordinates(3,numberOfNodesXi),numberOfNodesXi)
+    assert weights.shape == (3*(numberOfNodesXi-1)+1,)
+    assert numpy.isclose(numpy.sum(weights),1.0)
+
+def test_load_weights_of_quadratic_line():
+    # Three quadratic elements of length 1: 1/6, 4/6, 1/6 per element, shared end nodes added, over a total of 3
+    weights = boundary_conditions.LoadWeights(LineCoordinates(3,3),3)
+    numpy.testing.assert_allclose(weights*3.0*6.0,[1.0,4.0,2.0,4.0,2.0,4.0,1.0])
+
+def test_load_weights_do_not_depend_on_node_order():
+    coordinates = LineCoordinates(2,3)
+    order = numpy.array([3,0,4,1,2])
+    numpy.testing.assert_allclose(boundary_conditions.LoadWeights(coordinates[order],3),
+                                  boundary_conditions.LoadWeights(coordinates,3)[order])
+
+def test_load_weights_of_face_are_product_of_edges():
+    # A 2 x 1 face of linear elements in the x-y plane
+    x,y = numpy.meshgrid([0.0,0.5,1.0],[0.0,1.0],indexing='ij')
+    coordinates = numpy.stack([x.ravel(),y.ravel(),numpy.zeros(x.size)],axis=1)
+    weights = boundary_conditions.LoadWeights(coordinates,2)
+    numpy.testing.assert_allclose(weights,numpy.outer([0.25,0.5,0.25],[0.5,0.5]).ravel())
+
+def test_load_weights_reject_partial_elements():
+    with pytest.raises(ValueError):
+        boundary_conditions.LoadWeights(LineCoordinates(3,3)[:4],3)
+
+def test_edge_nodes():
+    x,y,z = numpy.meshgrid([0.0,1.0],[0.0,1.0],[0.0,1.5,3.0],indexing='ij')
+    coordinates = numpy.stack([x.ravel(),y.ravel(),z.ravel()],axis=1)
+    nodeNumbers = numpy.arange(1,len(coordinates)+1)
+    edgeNodes = boundary_conditions.EdgeNodes(nodeNumbers,coordinates,[(0,1.0),(2,3.0)])
+    numpy.testing.assert_array_equal(edgeNodes,[9,12])
@@ -0,0 +1,79 @@
+import json
+
+import numpy
+import pytest
+
+import calibration
+
+# A pool that is never sent a job
+class IdlePool(object):
+
+    def __init__(self,numberOfWorkers,timeout):
+        pass
+
+    def Close(self):
+        pass
+
+# A calibration whose tip deflection and curvature are known functions of the fibre and sheet rates, and whose solves
+# fail for fibre rates above failingFibreRate
+class SyntheticCalibration(calibration.Calibration):
+
+    failingFibreRate = float('inf')
+
+    def Solve(self,point):
+        if (point['fibreRate'] > self.failingFibreRate):
+            return {'point':point,'curvatureMetric':self.curvatureMetric,'status':'diverged','message':''}
+        return {'point':point,'curvatureMetric':self.curvatureMetric,'status':'converged',
+                'tipDeflection':-point['fibreRate']*point['sheetRate'],
+                'curvature':point['sheetRate']/point['fibreRate']}
+
+@pytest.fixture(autouse=True)
+def idlePool(monkeypatch):
+    monkeypatch.setattr(calibration.solver_service,'SolverPool',IdlePool)
+
+def test_damped_steps_of_a_linear_residual():
+    jacobian = numpy.array([[2.0,0.0],[0.0,1.0],[1.0,1.0]])
+    residuals = numpy.array([1.0,-2.0,0.5])
+    gaussNewtonStep = numpy.linalg.lstsq(jacobian,-residuals,rcond=None)[0]
+    smallStep,largeStep = calibration.DampedSteps(jacobian,residuals,[1e-12,1e8],10.0)
+    numpy.testing.assert_allclose(smallStep,gaussNewtonStep,rtol=1e-9)
+    gradient = jacobian.T.dot(residuals)
+    numpy.testing.assert_allclose(largeStep/numpy.linalg.norm(largeStep),-gradient/numpy.linalg.norm(gradient),
+                                  rtol=1e-6)
+    clippedStep = calibration.DampedSteps(jacobian,residuals,[1e-12],0.1)[0]
+    assert numpy.abs(clippedStep).max() == pytest.approx(0.1)
+    numpy.testing.assert_allclose(clippedStep,gaussNewtonStep*0.1/numpy.abs(gaussNewtonStep).max(),rtol=1e-9)
+
+def test_fit_finds_the_rates_of_synthetic_targets():
+    fit = SyntheticCalibration({'tipDeflection':-0.02,'curvature':5.0},['fibreRate','sheetRate'],numberOfWorkers=2).Fit(
+        {'fibreRate':0.1,'sheetRate':0.1})
+    assert fit['parameters']['fibreRate'] == pytest.approx(0.004**0.5,rel=1e-4)
+    assert fit['parameters']['sheetRate'] == pytest.approx(5.0*0.004**0.5,rel=1e-4)
+    assert fit['cost'] < 1e-9
+
+def test_parameters_must_be_positive_and_continuous():
+    with pytest.raises(ValueError):
+        SyntheticCalibration({'curvature':1.0},['force'])
+    with pytest.raises(ValueError,match='fibreRate must be positive'):
+        SyntheticCalibration({'curvature':1.0},['fibreRate']).Fit({'fibreRate':0.0})
+
+def test_only_converged_evaluations_are_memoised_for_their_metric(tmp_path):
+    logFileName = str(tmp_path/'evaluations.jsonl')
+    fit = SyntheticCalibration({'curvature':1.0},['fibreRate'],evaluationLogFileName=logFileName)
+    fit.failingFibreRate = 0.5
+    point = dict(fit.baseParameters)
+    failingPoint = dict(point,fibreRate=1.0)
+    assert [evaluation['status'] for evaluation in fit.Evaluate([point,failingPoint,point])] == ['converged',
+                                                                                              'diverged','converged']
+    assert fit.numberOfSolves == 2
+    with open(logFileName) as logFile:
+        assert [json.loads(line)['status'] for line in logFile] == ['converged']
+    fit.Evaluate([point,failingPoint])
+    assert fit.numberOfSolves == 3
+    resumed = SyntheticCalibration({'curvature':1.0},['fibreRate'],evaluationLogFileName=logFileName)
+    resumed.Evaluate([point])
+    assert resumed.numberOfSolves == 0
+    otherMetric = SyntheticCalibration({'curvature':1.0},['fibreRate'],curvatureMetric='curvatureMax',
+                                       evaluationLogFileName=logFileName)
+    otherMetric.Evaluate([point])
+    assert otherMetric.numberOfSolves == 1
@@ -0,0 +1,149 @@
+import numpy
+import pytest
+
+pytest.importorskip('opencmiss.iron')
+import cantilever_growth
+
+# A model with the node arrays of a serial run of four nodes, without any iron fields
+def NodeArraysModel():
+    model = cantilever_growth.CantileverGrowthModel.__new__(cantilever_growth.CantileverGrowthModel)
+    model.FieldVariables = lambda: []
+    model.nodeNumbers = numpy.arange(1,5)
+    model.localNodes = model.nodeNumbers
+    model.localReferenceCoordinates = numpy.zeros((4,3))
+    return model
+
+def test_memory_usage_counts_shared_arrays_once():
+    usage = NodeArraysModel().MemoryUsage()
+    assert [entry[1] for entry in usage] == ['localNodes','localReferenceCoordinates']
+    assert sum(entry[4] for entry in usage) == 4*8+4*3*8
+
+def test_release_mesh_arrays_reduces_memory_usage(monkeypatch):
+    model = NodeArraysModel()
+    before = sum(entry[4] for entry in model.MemoryUsage())
+    model.geometricField = None
+    model.ReleaseMeshArrays()
+    assert sum(entry[4] for entry in model.MemoryUsage()) == before-4*3*8
+    monkeypatch.setattr(cantilever_growth.boundary_conditions,'NodeCoordinates',
+                        lambda field,nodes: (nodes,numpy.ones((len(nodes),3))))
+    numpy.testing.assert_array_equal(model.ReferenceCoordinates(),numpy.ones((4,3)))
+
+def test_result_arrays_read_the_pressure_at_every_node(monkeypatch):
+    model = NodeArraysModel()
+    model.parameters = {'pInterpolation':cantilever_growth.LINEAR_LAGRANGE}
+    model.pressureNodes = model.PressureNodes()
+    model.dependentField = None
+    model.localElements = numpy.arange(1,3)
+    model.numberOfGaussPoints = 8
+    monkeypatch.setattr(cantilever_growth.field_values,'NodalValues',
+                        lambda field,variableType,nodes,numberOfComponents:
+                        numpy.outer(nodes,numpy.ones(numberOfComponents))+numpy.arange(numberOfComponents))
+    monkeypatch.setattr(cantilever_growth.field_values,'GaussPointValues',
+                        lambda field,variableType,elements,numberOfGaussPoints,numberOfComponents:
+                        numpy.zeros((len(elements),numberOfGaussPoints,numberOfComponents)))
+    arrays = model.ResultArrays(False)
+    numpy.testing.assert_array_equal(arrays['pressure'],[4.0,5.0,6.0,7.0])
+    numpy.testing.assert_array_equal(arrays['displacement'][:,1],[2.0,3.0,4.0,5.0])
+    model.parameters['pInterpolation'] = cantilever_growth.CONSTANT_LAGRANGE
+    model.pressureNodes = model.PressureNodes()
+    monkeypatch.setattr(cantilever_growth.field_values,'ElementValues',
+                        lambda field,variableType,elements,componentNumber: numpy.full(len(elements),-6.0))
+    arrays = model.ResultArrays(False)
+    assert numpy.isnan(arrays['pressure']).all()
+    numpy.testing.assert_array_equal(arrays['elementPressure'],[-6.0,-6.0])
+
+# A model with the mesh sizes of the given parameters, without any iron objects
+def MeshModel(parameters={},numberOfComputationalNodes=1):
+    model = cantilever_growth.CantileverGrowthModel.__new__(cantilever_growth.CantileverGrowthModel)
+    model.parameters = cantilever_growth.CantileverParameters(parameters)
+    model.numberOfDimensions = 3
+    numberOfNodesXi = model.parameters['uInterpolation']+1
+    numberOfElements = [model.parameters['numberOfGlobal%sElements' % direction] for direction in 'XYZ']
+    model.numberOfNodes = int(numpy.prod([count*(numberOfNodesXi-1)+1 for count in numberOfElements]))
+    model.numberOfElements = int(numpy.prod(numberOfElements))
+    model.numberOfDofs = model.NumberOfDofs()
+    model.numberOfComputationalNodes = numberOfComputationalNodes
+    return model
+
+def test_number_of_dofs_has_a_pressure_at_every_node():
+    assert MeshModel().numberOfDofs == 4*63
+    assert MeshModel({'pInterpolation':cantilever_growth.CONSTANT_LAGRANGE}).numberOfDofs == 3*63+3
+    assert MeshModel({'uInterpolation':cantilever_growth.LINEAR_LAGRANGE}).numberOfDofs == 4*16
+
+def test_automatic_linear_solver_is_direct_in_serial_or_below_the_dof_limit():
+    parameters = {'linearSolverType':cantilever_growth.AUTOMATIC_LINEAR_SOLVER,'directSolverMaximumDofs':100}
+    assert MeshModel(parameters).LinearSolverType() == cantilever_growth.DIRECT_LINEAR_SOLVER
+    assert MeshModel(parameters,4).LinearSolverType() == cantilever_growth.GMRES_LINEAR_SOLVER
+    assert MeshModel(dict(parameters,directSolverMaximumDofs=252),4).LinearSolverType() == \
+        cantilever_growth.DIRECT_LINEAR_SOLVER
+    assert MeshModel({'linearSolverType':cantilever_growth.BICGSTAB_LINEAR_SOLVER}).LinearSolverType() == \
+        cantilever_growth.BICGSTAB_LINEAR_SOLVER
+
+# A linear solver recording the settings made on it
+class RecordingSolver(object):
+
+    def __init__(self):
+        self.settings = {}
+
+    def __getattr__(self,name):
+        return lambda *arguments: self.settings.__setitem__(name,arguments)
+
+def test_set_linear_solver_sets_the_preconditioner_and_tolerances():
+    model = MeshModel({'linearSolverType':cantilever_growth.AUTOMATIC_LINEAR_SOLVER,'directSolverMaximumDofs':100},4)
+    model.linearSolver = RecordingSolver()
+    model.SetLinearSolver()
+    settings = model.linearSolver.settings
+    assert model.linearSolverType == cantilever_growth.GMRES_LINEAR_SOLVER
+    assert model.linearSolver.linearType == cantilever_growth.iron.LinearSolverTypes.ITERATIVE
+    assert settings['LinearIterativePreconditionerTypeSet'] == \
+        (cantilever_growth.iron.IterativePreconditionerTypes.ADDITIVE_SCHWARZ,)
+    assert settings['LinearIterativeRelativeToleranceSet'] == (model.parameters['linearForcingTerm'],)
+    assert settings['LinearIterativeAbsoluteToleranceSet'] == (0.1*model.parameters['newtonAbsoluteTolerance'],)
+    model = MeshModel()
+    model.linearSolver = RecordingSolver()
+    model.SetLinearSolver()
+    assert model.linearSolver.linearType == cantilever_growth.iron.LinearSolverTypes.DIRECT
+    assert model.linearSolver.settings == {}
+
+# A field whose variables each hold an array of DOF values
+class DofField(object):
+
+    def __init__(self,data):
+        self.data = data
+
+    def ParameterSetDataGet(self,variableType,parameterSetType):
+        return self.data[variableType]
+
+    def ParameterSetDataRestore(self,variableType,parameterSetType,data):
+        pass
+
+    def ParameterSetUpdateStart(self,variableType,parameterSetType):
+        pass
+
+    def ParameterSetUpdateFinish(self,variableType,parameterSetType):
+        pass
+
+# A model with a dependent field and growth state whose DOFs are random values, or zero
+def CheckpointedModel(seed=None):
+    randomState = numpy.random.RandomState(seed or 0)
+    values = (lambda size: randomState.standard_normal(size)) if (seed is not None) else numpy.zeros
+    model = MeshModel()
+    model.nextTimeIncrement = 0.05
+    model.stepNumber = 9
+    variableTypes = cantilever_growth.iron.FieldVariableTypes
+    model.dependentField = DofField(dict((variableType,values(10)) for variableType in
+                                         [variableTypes.U,variableTypes.DELUDELN,variableTypes.U1,variableTypes.U2,
+                                          variableTypes.U3]))
+    model.growthCellMLStateField = DofField({variableTypes.U:values(6)})
+    return model
+
+def test_restoring_a_checkpoint_gives_a_bit_for_bit_identical_state(tmp_path):
+    model = CheckpointedModel(1)
+    fileName = str(tmp_path/'checkpoint_000001.part0.npz')
+    cantilever_growth.checkpoint.WriteCheckpoint(fileName,model,0.5)
+    restarted = CheckpointedModel()
+    state = cantilever_growth.checkpoint.ReadCheckpoint(fileName)
+    assert state['stepNumber'] == 9
+    restarted.RestoreCheckpointArrays(state['arrays'])
+    for name,array in model.CheckpointArrays().items():
+        assert restarted.CheckpointArrays()[name].tobytes() == array.tobytes()
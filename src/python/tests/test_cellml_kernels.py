@@ -0,0 +1,48 @@
+import os
+
+import numpy
+import pytest
+
+import cellml_kernels
+import mooney_rivlin
+
+modelDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def cacheDirectory(tmp_path,monkeypatch):
+    # Compile afresh for every test rather than reusing kernels loaded by an earlier one
+    monkeypatch.setattr(cellml_kernels,'loadedKernels',{})
+    return str(tmp_path/'kernels')
+
+def test_mooney_rivlin_kernel_matches_numpy_stress(cacheDirectory):
+    kernel = cellml_kernels.CompileCellML(os.path.join(modelDirectory,'mooneyrivlin.cellml'),cacheDirectory)
+    randomState = numpy.random.RandomState(0)
+    F = numpy.eye(3)+0.2*randomState.uniform(-1.0,1.0,(40,3,3))
+    fullC = numpy.einsum('pki,pkj->pij',F,F)
+    C = fullC[:,[0,0,0,1,1,2],[0,1,2,1,2,2]]
+    c1 = numpy.linspace(1.0,3.0,40)
+    values = {'interface/c1':c1,'interface/c2':6.0}
+    for name,(row,column) in [('C11',(0,0)),('C12',(0,1)),('C13',(0,2)),('C22',(1,1)),('C23',(1,2)),('C33',(2,2))]:
+        values['interface/'+name] = fullC[:,row,column]
+    parameters = kernel.Parameters(40,values)
+    Tdev = kernel.Evaluate(['equations/Tdev11','equations/Tdev12','equations/Tdev13','equations/Tdev22',
+                            'equations/Tdev23','equations/Tdev33'],kernel.InitialStates(40),parameters)
+    numpy.testing.assert_allclose(Tdev,mooney_rivlin.Stress(C,c1,6.0),rtol=1.0e-12,atol=1.0e-12)
+
+def test_growth_kernel_integrates_constant_rates(cacheDirectory):
+    kernel = cellml_kernels.CompileCellML(os.path.join(modelDirectory,'simplegrowth.cellml'),cacheDirectory)
+    assert kernel.stateNames == ['Main/lambda1','Main/lambda2','Main/lambda3']
+    parameters = kernel.Parameters(5,{'Main/fibrerate':numpy.linspace(0.0,0.04,5)})
+    states = kernel.Integrate(kernel.InitialStates(5),parameters,0.0,1.0,0.1)
+    numpy.testing.assert_allclose(states[:,0],1.0+numpy.linspace(0.0,0.04,5))
+    numpy.testing.assert_allclose(states[:,1],1.0-0.01)
+    numpy.testing.assert_allclose(states[:,2],1.0+0.005)
+
+def test_kernels_are_cached_by_source_hash(cacheDirectory):
+    fileName = os.path.join(modelDirectory,'simplegrowth.cellml')
+    kernel = cellml_kernels.CompileCellML(fileName,cacheDirectory)
+    cachedFileNames = os.listdir(cacheDirectory)
+    assert cachedFileNames == ['simplegrowth_%s.py' % cellml_kernels.SourceHash(fileName)[:20]]
+    assert cellml_kernels.CompileCellML(fileName,cacheDirectory) is kernel
+    with pytest.raises(KeyError):
+        kernel.Parameters(1,{'Main/lambda1':2.0})
@@ -0,0 +1,93 @@
+import os
+
+import numpy
+import pytest
+
+import checkpoint
+
+# A model holding only what the checkpoints read, with the arrays of its state
+class CheckpointedModel(object):
+
+    def __init__(self,arrays,parameters={'c1':2.0,'force':-0.3},computationalNodeNumber=0,
+                 numberOfComputationalNodes=1,stepNumber=0):
+        self.arrays = arrays
+        self.stepNumber = stepNumber
+        self.parameters = dict(parameters)
+        self.computationalNodeNumber = computationalNodeNumber
+        self.numberOfComputationalNodes = numberOfComputationalNodes
+        self.nextTimeIncrement = 0.1
+
+    def CheckpointArrays(self):
+        return self.arrays
+
+def StateArrays(seed=0):
+    randomState = numpy.random.RandomState(seed)
+    return {'dependentU':numpy.concatenate([randomState.standard_normal(20),[0.1+0.2,-0.0,1e-310,numpy.nan]]),
+            'growthState':randomState.standard_normal((4,3))}
+
+def test_checkpoint_round_trip_is_bit_for_bit(tmp_path):
+    arrays = StateArrays()
+    model = CheckpointedModel(arrays,stepNumber=14)
+    fileName = checkpoint.CheckpointFileName(str(tmp_path),7,0)
+    checkpoint.WriteCheckpoint(fileName,model,1.25)
+    assert os.listdir(str(tmp_path)) == ['checkpoint_000007.part0.npz']
+    state = checkpoint.ReadCheckpoint(fileName)
+    assert state['time'] == 1.25
+    assert state['timeIncrement'] == 0.1
+    assert state['stepNumber'] == 14
+    assert state['numberOfComputationalNodes'] == 1
+    assert state['parameters'] == model.parameters
+    assert sorted(state['arrays']) == sorted(arrays)
+    for name,array in arrays.items():
+        assert state['arrays'][name].dtype == array.dtype
+        assert state['arrays'][name].tobytes() == array.tobytes()
+
+def test_exporter_keeps_the_latest_checkpoints_and_carries_on_numbering(tmp_path):
+    directory = str(tmp_path/'checkpoints')
+    model = CheckpointedModel(StateArrays())
+    exporter = checkpoint.CheckpointExporter(directory,stepInterval=2,numberToKeep=2)
+    exporter.Start(model)
+    for stepIdx in range(7):
+        exporter.Write(model,0.1*(stepIdx+1))
+    exporter.Finish(model)
+    assert checkpoint.CheckpointNumbers(directory,0) == [2,3]
+    assert sorted(os.listdir(directory)) == ['checkpoint_000002.part0.npz','checkpoint_000003.part0.npz']
+    assert checkpoint.ReadCheckpoint(checkpoint.CheckpointFileName(directory,3,0))['time'] == pytest.approx(0.6)
+    restarted = checkpoint.CheckpointExporter(directory,stepInterval=1,numberToKeep=2)
+    restarted.Start(model)
+    restarted.Write(model,0.7)
+    assert checkpoint.CheckpointNumbers(directory,0) == [3,4]
+
+def test_restarted_exporter_keeps_the_step_interval_of_the_restored_step(tmp_path):
+    directory = str(tmp_path/'checkpoints')
+    model = CheckpointedModel(StateArrays(),stepNumber=3)
+    exporter = checkpoint.CheckpointExporter(directory,stepInterval=2)
+    exporter.Start(model)
+    exporter.Write(model,0.4)
+    assert checkpoint.CheckpointNumbers(directory,0) == [1]
+    exporter.Write(model,0.5)
+    assert checkpoint.CheckpointNumbers(directory,0) == [1]
+
+def test_latest_checkpoint_is_the_highest_number_of_this_computational_node(tmp_path):
+    directory = str(tmp_path)
+    model = CheckpointedModel(StateArrays())
+    assert checkpoint.LatestCheckpoint(directory,model) is None
+    for checkpointNumber,time in [(1,0.1),(12,1.2),(3,0.3)]:
+        checkpoint.WriteCheckpoint(checkpoint.CheckpointFileName(directory,checkpointNumber,0),model,time)
+    checkpoint.WriteCheckpoint(checkpoint.CheckpointFileName(directory,13,1),CheckpointedModel(StateArrays(),
+                                                                                              computationalNodeNumber=1),
+                               1.3)
+    open(os.path.join(directory,'checkpoint_000014.part0.npz.tmp'),'w').close()
+    latest = checkpoint.LatestCheckpoint(directory,model)
+    assert latest['checkpointNumber'] == 12
+    assert latest['time'] == 1.2
+
+def test_latest_checkpoint_rejects_other_parameters_and_computational_nodes(tmp_path):
+    directory = str(tmp_path)
+    checkpoint.WriteCheckpoint(checkpoint.CheckpointFileName(directory,1,0),CheckpointedModel(StateArrays()),0.1)
+    with pytest.raises(ValueError,match='different force'):
+        checkpoint.LatestCheckpoint(directory,CheckpointedModel(StateArrays(),{'c1':2.0,'force':-0.6}))
+    checkpoint.WriteCheckpoint(checkpoint.CheckpointFileName(directory,2,0),
+                               CheckpointedModel(StateArrays(),numberOfComputationalNodes=2),0.2)
+    with pytest.raises(ValueError,match='written by 2 computational nodes'):
+        checkpoint.LatestCheckpoint(directory,CheckpointedModel(StateArrays()))
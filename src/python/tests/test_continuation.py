@@ -0,0 +1,39 @@
+import numpy
+import pytest
+
+pytest.importorskip('opencmiss.iron')
+import continuation
+
+# A recorded solution that is the same at every time
+class ConstantRecorder(object):
+
+    def __init__(self,solution):
+        self.solution = numpy.asarray(solution,dtype=float)
+
+    def Solution(self,time):
+        return self.solution
+
+def test_solution_recorder_interpolates_between_steps():
+    recorder = continuation.SolutionRecorder()
+    recorder.times = [1.0,2.0]
+    recorder.solutions = [numpy.array([0.0,10.0]),numpy.array([1.0,20.0])]
+    numpy.testing.assert_allclose(recorder.Solution(1.25),[0.25,12.5])
+    numpy.testing.assert_allclose(recorder.Solution(0.5),[0.0,10.0])
+    numpy.testing.assert_allclose(recorder.Solution(3.0),[1.0,20.0])
+
+def test_path_guess_extrapolates_by_relative_step():
+    guess = continuation.PathGuess(ConstantRecorder([2.0]),{'force':-0.4},{'force':-0.6},ConstantRecorder([1.0]),
+                                   {'force':-0.3})
+    assert guess.extrapolation == pytest.approx(2.0)
+    numpy.testing.assert_allclose(guess(1.0),[4.0])
+    previousOnly = continuation.PathGuess(ConstantRecorder([2.0]),{'force':-0.4},{'force':-0.6})
+    numpy.testing.assert_allclose(previousOnly(1.0),[2.0])
+
+def test_path_guess_rejects_points_with_different_parameters():
+    with pytest.raises(ValueError,match='point 3 gives c1, force'):
+        continuation.PathGuess(ConstantRecorder([2.0]),{'force':-0.4},{'force':-0.6,'c1':2.0},ConstantRecorder([1.0]),
+                               {'force':-0.3})
+
+def test_solve_path_checks_parameters_before_building():
+    with pytest.raises(ValueError):
+        continuation.SolvePath([{'force':-0.3},{'c1':2.0}])
@@ -0,0 +1,90 @@
+import os, shutil
+
+import numpy
+
+import exfile
+
+expectedPrefix = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'expected_results','results',
+                              'CantileverGrowth')
+
+nodeHeader = ''' Group name: Region
+ #Fields=1
+ 1) Displacement, field,  rectangular cartesian, #Components=2
+   1.  Value index= 1, #Derivatives= 0
+   2.  Value index= 2, #Derivatives= 0
+'''
+
+def WriteExnode(fileName,nodes):
+    with open(fileName,'w') as exnodeFile:
+        exnodeFile.write(nodeHeader)
+        for nodeNumber,values in nodes:
+            exnodeFile.write(' Node: %12d\n' % nodeNumber)
+            for value in values:
+                exnodeFile.write('  %.16E\n' % value)
+
+def CopyExpected(directory):
+    for extension in ['exnode','exelem']:
+        shutil.copy('%s.part0.%s' % (expectedPrefix,extension),os.path.join(str(directory),'CantileverGrowth.part0.%s'
+                                                                            % extension))
+    return os.path.join(str(directory),'CantileverGrowth')
+
+def test_read_exnode_of_expected_results():
+    nodeNumbers,fields,componentNames = exfile.ReadExnode(expectedPrefix)
+    numpy.testing.assert_array_equal(nodeNumbers,numpy.arange(1,64))
+    assert fields['Displacement'].shape == (63,4)
+    assert componentNames['Geometry'] == ['x','y','z']
+    numpy.testing.assert_allclose(fields['Geometry'][4],[5.0,5.0,0.0])
+    numpy.testing.assert_allclose(fields['Displacement'][4],[5.0,5.0,0.0,-23.197393892972212])
+
+def test_read_exelem_of_expected_results():
+    elementNumbers,elementNodes,fields,componentNames = exfile.ReadExelem(expectedPrefix)
+    numpy.testing.assert_array_equal(elementNumbers,[1,2,3])
+    assert elementNodes.shape == (3,27)
+    assert fields['Stress'].shape == (3,6,27)
+
+def test_read_exnode_merges_parts(tmp_path):
+    prefix = str(tmp_path/'Run')
+    # Node 2 is written by both parts, as for a node on the boundary between two domains
+    WriteExnode(prefix+'.part0.exnode',[(1,[1.0,2.0]),(2,[3.0,4.0])])
+    WriteExnode(prefix+'.part1.exnode',[(2,[3.0,4.0]),(3,[5.0,6.0])])
+    nodeNumbers,fields,componentNames = exfile.ReadExnode(prefix)
+    numpy.testing.assert_array_equal(nodeNumbers,[1,2,3])
+    numpy.testing.assert_array_equal(fields['Displacement'],[[1.0,2.0],[3.0,4.0],[5.0,6.0]])
+    mergedFileName = exfile.MergeParts(prefix,'exnode')
+    mergedNumbers,mergedFields,componentNames = exfile.ReadExnode(mergedFileName)
+    numpy.testing.assert_array_equal(mergedNumbers,nodeNumbers)
+    numpy.testing.assert_array_equal(mergedFields['Displacement'],fields['Displacement'])
+
+def test_compare_results_passes_for_identical_results(tmp_path):
+    rows,passed = exfile.CompareResults(expectedPrefix,CopyExpected(tmp_path))
+    assert passed
+    assert all(row['maximumAbsoluteError'] == 0.0 for row in rows)
+    assert set(row['location'] for row in rows) == set(['node','element'])
+
+def test_compare_results_reports_worst_node(tmp_path):
+    actualPrefix = CopyExpected(tmp_path)
+    exnodeFileName = actualPrefix+'.part0.exnode'
+    with open(exnodeFileName) as exnodeFile:
+        text = exnodeFile.read()
+    assert text.count('-2.3197393892972212E+01') == 1
+    with open(exnodeFileName,'w') as exnodeFile:
+        exnodeFile.write(text.replace('-2.3197393892972212E+01','-2.3197493892972212E+01'))
+    rows,passed = exfile.CompareResults(expectedPrefix,actualPrefix,compareElements=False)
+    assert not passed
+    row = [row for row in rows if row['field'] == 'Displacement'][0]
+    assert row['failed'] == 1
+    numpy.testing.assert_allclose(row['maximumAbsoluteError'],1.0e-4,rtol=1.0e-6)
+    number,valueIdx,expected,actual,ratio = row['worst'][0]
+    assert (number,valueIdx) == (5,3)
+    # A looser tolerance for the field lets it pass
+    rows,passed = exfile.CompareResults(expectedPrefix,actualPrefix,{'Displacement':(1.0e-3,0.0)},
+                                        compareElements=False)
+    assert passed
+
+def test_compare_fields_nan_only_matches_nan():
+    numbers = numpy.array([1,2])
+    expected = {'Strain':numpy.array([[numpy.nan],[1.0]])}
+    rows = exfile.CompareFields(numbers,expected,numbers,{'Strain':numpy.array([[numpy.nan],[1.0]])})
+    assert rows[0]['failed'] == 0
+    rows = exfile.CompareFields(numbers,expected,numbers,{'Strain':numpy.array([[0.0],[numpy.nan]])})
+    assert rows[0]['failed'] == 2
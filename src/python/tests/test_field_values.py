@@ -0,0 +1,68 @@
+import numpy
+import pytest
+
+pytest.importorskip('opencmiss.iron')
+import field_values
+
+# A Gauss point based field variable whose DOF array maps (component,element,Gauss point) through dofIndex
+class GaussPointField(object):
+
+    def __init__(self,numberOfComponents,numberOfElements,numberOfGaussPoints,dofIndex):
+        self.shape = (numberOfComponents,numberOfElements,numberOfGaussPoints)
+        self.dofIndex = dofIndex
+        self.data = numpy.zeros(numberOfComponents*numberOfElements*numberOfGaussPoints)
+        self.numberOfPointUpdates = 0
+
+    def ParameterSetDataGet(self,variableType,parameterSetType):
+        return self.data
+
+    def ParameterSetDataRestore(self,variableType,parameterSetType,data):
+        pass
+
+    def ParameterSetGetGaussPointDP(self,variableType,parameterSetType,gaussPointNumber,elementNumber,componentNumber):
+        return self.data[self.dofIndex[componentNumber-1,elementNumber-1,gaussPointNumber-1]]
+
+    def ParameterSetUpdateGaussPointDP(self,variableType,parameterSetType,gaussPointNumber,elementNumber,
+                                       componentNumber,value):
+        self.numberOfPointUpdates += 1
+        self.data[self.dofIndex[componentNumber-1,elementNumber-1,gaussPointNumber-1]] = value
+
+    def ParameterSetUpdateStart(self,variableType,parameterSetType):
+        pass
+
+    def ParameterSetUpdateFinish(self,variableType,parameterSetType):
+        pass
+
+    def Values(self,componentNumbers):
+        return numpy.stack([self.data[self.dofIndex[componentNumber-1]] for componentNumber in componentNumbers],axis=-1)
+
+def SetValues(field,values,componentNumbers):
+    elementNumbers = numpy.arange(1,values.shape[0]+1)
+    field_values.SetGaussPointComponentValues(field,1,elementNumbers,componentNumbers,values)
+
+def test_block_layout_is_set_in_one_call():
+    shape = (3,5,8)
+    field = GaussPointField(3,5,8,numpy.arange(numpy.prod(shape)).reshape(shape))
+    values = numpy.random.RandomState(0).uniform(size=(5,8,2))
+    SetValues(field,values,[1,3])
+    assert field.numberOfPointUpdates == 0
+    numpy.testing.assert_array_equal(field.Values([1,3]),values)
+    numpy.testing.assert_array_equal(field.Values([2]),numpy.zeros((5,8,1)))
+
+def test_layout_differing_away_from_the_checked_points_is_found():
+    # Two Gauss points of one element in the middle are swapped, which checks of the first, middle and last points miss
+    shape = (2,6,4)
+    dofIndex = numpy.arange(numpy.prod(shape)).reshape(shape)
+    dofIndex[:,1,[1,2]] = dofIndex[:,1,[2,1]]
+    field = GaussPointField(2,6,4,dofIndex)
+    values = numpy.random.RandomState(1).uniform(size=(6,4,2))
+    SetValues(field,values,[1,2])
+    assert field.numberOfPointUpdates == values.size
+    numpy.testing.assert_array_equal(field.Values([1,2]),values)
+
+def test_probe_does_not_change_the_other_components():
+    shape = (3,2,2)
+    field = GaussPointField(3,2,2,numpy.arange(numpy.prod(shape)).reshape(shape))
+    field.data[:] = 7.0
+    SetValues(field,numpy.ones((2,2,1)),[2])
+    numpy.testing.assert_array_equal(field.Values([1,3]),numpy.full((2,2,2),7.0))
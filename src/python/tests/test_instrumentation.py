@@ -0,0 +1,47 @@
+import json
+
+import instrumentation
+
+def test_non_finite_values_are_written_as_null(tmp_path):
+    traceFileName = str(tmp_path/'trace.jsonl')
+    trace = instrumentation.Trace(traceFileName)
+    trace.Counter('newton',iterations=3,finalResidualNorm=float('nan'))
+    trace.Instant('step',residuals=[1.0,float('inf')],nested={'value':-float('inf')})
+    trace.Close()
+    with open(traceFileName) as traceFile:
+        events = [json.loads(line) for line in traceFile]
+    assert events[0]['args'] == {'iterations':3,'finalResidualNorm':None}
+    assert events[1]['args'] == {'residuals':[1.0,None],'nested':{'value':None}}
+
+def test_chrome_trace_is_valid_json(tmp_path):
+    traceFileName = str(tmp_path/'trace.json')
+    trace = instrumentation.Trace(traceFileName)
+    with trace.Phase('solve',step=1) as phase:
+        phase.Arguments(residual=float('nan'))
+    trace.Close()
+    with open(traceFileName) as traceFile:
+        events = json.load(traceFile)['traceEvents']
+    assert events[0]['name'] == 'solve'
+    assert events[0]['ph'] == 'X'
+    assert events[0]['args'] == {'step':1,'residual':None}
+
+def test_json_lines_flush_drops_written_events(tmp_path):
+    traceFileName = str(tmp_path/'trace.jsonl')
+    trace = instrumentation.Trace(traceFileName)
+    for stepIdx in range(3):
+        trace.Instant('step',step=stepIdx)
+        trace.Flush()
+        assert trace.events == []
+    trace.Close()
+    with open(traceFileName) as traceFile:
+        assert [json.loads(line)['args']['step'] for line in traceFile] == [0,1,2]
+
+def test_null_trace_times_phases_without_keeping_events():
+    trace = instrumentation.NullTrace()
+    with trace.Phase('build') as phase:
+        pass
+    trace.Counter('newton',iterations=2)
+    trace.Flush()
+    trace.Close()
+    assert phase.duration >= 0.0
+    assert trace.events == []
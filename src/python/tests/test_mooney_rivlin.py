@@ -0,0 +1,39 @@
+import numpy
+
+import mooney_rivlin
+
+# Random right Cauchy-Green tensors about the identity in the (..., 6) component ordering
+def RandomStrains(numberOfPoints,scale=0.2,seed=0):
+    randomState = numpy.random.RandomState(seed)
+    F = numpy.eye(3)+scale*randomState.uniform(-1.0,1.0,(numberOfPoints,3,3))
+    C = numpy.einsum('pki,pkj->pij',F,F)
+    return C[:,[0,0,0,1,1,2],[0,1,2,1,2,2]]
+
+def test_stress_of_identity_is_hydrostatic():
+    C = numpy.array([1.0,0.0,0.0,1.0,0.0,1.0])
+    Tdev = mooney_rivlin.Stress(C,2.0,6.0)
+    # a = 1, Tdev = -2 c2 C + 2 (c1+3 c2) I
+    numpy.testing.assert_allclose(Tdev,[-12.0+40.0,0.0,0.0,28.0,0.0,28.0])
+
+def test_tangent_matches_finite_differences():
+    C = RandomStrains(50)
+    c1 = numpy.linspace(1.0,3.0,50)
+    analytic = mooney_rivlin.Tangent(C,c1,6.0)
+    centred = numpy.empty(analytic.shape)
+    perturbation = 1.0e-6
+    for component in range(mooney_rivlin.NUMBER_OF_COMPONENTS):
+        plus = C.copy()
+        plus[:,component] += perturbation
+        minus = C.copy()
+        minus[:,component] -= perturbation
+        centred[...,component] = (mooney_rivlin.Stress(plus,c1,6.0)-mooney_rivlin.Stress(minus,c1,6.0))/(2.0*perturbation)
+    numpy.testing.assert_allclose(analytic,centred,rtol=0.0,atol=1.0e-7*numpy.max(numpy.abs(analytic)))
+
+def test_finite_difference_tangents_agree():
+    C = RandomStrains(20,seed=1)
+    analytic = mooney_rivlin.Tangent(C,2.0,6.0)
+    pointwise = mooney_rivlin.FiniteDifferenceTangent(C,2.0,6.0)
+    coloured = mooney_rivlin.ColouredFiniteDifferenceTangent(C,2.0,6.0)
+    scale = numpy.max(numpy.abs(analytic))
+    numpy.testing.assert_allclose(coloured,pointwise,rtol=0.0,atol=1.0e-12*scale)
+    numpy.testing.assert_allclose(pointwise,analytic,rtol=0.0,atol=1.0e-5*scale)
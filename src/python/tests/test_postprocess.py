@@ -0,0 +1,68 @@
+import os
+
+import numpy
+import pytest
+
+import postprocess
+
+expectedPrefix = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'expected_results','results',
+                              'CantileverGrowth')
+
+# The nodes of a regular quadratic mesh of 2 x 2 x 4 elements over 2 x 2 x 8, numbered with x varying fastest
+def ReferenceState():
+    x,y,z = [numpy.linspace(0.0,extent,2*numberOfElements+1) for extent,numberOfElements in [(2.0,2),(2.0,2),(8.0,4)]]
+    Z,Y,X = numpy.meshgrid(z,y,x,indexing='ij')
+    referenceCoordinates = numpy.column_stack([X.ravel(),Y.ravel(),Z.ravel()])
+    return {'referenceCoordinates':referenceCoordinates,
+            'elementNodes':postprocess.RegularElementNodes(referenceCoordinates,3)}
+
+# Bend the reference state about the x axis so that the centreline y = 1 becomes an arc of radius bendRadius
+def Bend(referenceCoordinates,bendRadius):
+    angle = referenceCoordinates[:,2]/bendRadius
+    radius = bendRadius+referenceCoordinates[:,1]-1.0
+    return numpy.column_stack([referenceCoordinates[:,0],1.0-bendRadius+radius*numpy.cos(angle),
+                               radius*numpy.sin(angle)])
+
+def test_stretch_metrics():
+    state = ReferenceState()
+    state['coordinates'] = state['referenceCoordinates']*[1.0,1.0,1.1]
+    metrics = dict(postprocess.StateMetrics(state,3))
+    assert metrics['tipDeflection'] == pytest.approx(0.0,abs=1.0e-12)
+    assert metrics['volumeChange'] == pytest.approx(0.1,rel=1.0e-10)
+    assert metrics['curvatureMax'] == pytest.approx(0.0,abs=1.0e-10)
+    assert 'stress11Min' not in metrics
+
+def test_bend_metrics():
+    state = ReferenceState()
+    referenceCoordinates = state['referenceCoordinates']
+    state['coordinates'] = Bend(referenceCoordinates,20.0)
+    metrics = dict(postprocess.StateMetrics(state,3))
+    tipNodes = referenceCoordinates[:,2] == 8.0
+    assert metrics['tipDeflection'] == pytest.approx(numpy.mean(state['coordinates'][tipNodes,1]-
+                                                                referenceCoordinates[tipNodes,1]))
+    assert metrics['tipDeflection'] < -1.5
+    for name in ['curvatureMean','curvatureMax','curvatureRoot']:
+        assert metrics[name] == pytest.approx(1.0/20.0,rel=1.0e-2)
+    # Bending about the centreline stretches one side as much as it compresses the other
+    assert metrics['volumeChange'] == pytest.approx(0.0,abs=1.0e-4)
+
+def test_stress_and_growth_metrics():
+    state = ReferenceState()
+    state['coordinates'] = state['referenceCoordinates']
+    stress = numpy.zeros((16,27,6))
+    stress[...,0] = numpy.linspace(-1.0,3.0,16*27).reshape(16,27)
+    state['stress'] = stress
+    state['growth'] = numpy.ones((16,27,3))
+    metrics = dict(postprocess.StateMetrics(state,3))
+    assert (metrics['stress11Min'],metrics['stress11Max']) == (-1.0,3.0)
+    assert metrics['stress11Mean'] == pytest.approx(1.0)
+    assert (metrics['lambda1Min'],metrics['lambda3Max']) == (1.0,1.0)
+
+def test_expected_results_tip_deflection():
+    state = next(postprocess.ExfileStates(expectedPrefix))
+    metrics = dict(postprocess.StateMetrics(state,3))
+    referenceCoordinates,coordinates = state['referenceCoordinates'],state['coordinates']
+    tipNodes = referenceCoordinates[:,2] == referenceCoordinates[:,2].max()
+    assert metrics['tipDeflection'] == pytest.approx(numpy.mean(coordinates[tipNodes,1]-referenceCoordinates[tipNodes,1]))
+    assert metrics['tipDeflection'] == pytest.approx(-2.263,abs=1.0e-3)
+    assert all(numpy.isfinite(value) for value in metrics.values())
@@ -0,0 +1,147 @@
+import math
+
+import numpy
+import pytest
+
+pytest.importorskip('opencmiss.iron')
+import field_values
+import refinement
+from cantilever_parameters import *
+
+# The reference coordinates (nodes x 3) of a regular mesh of the unit cube with numberOfAxisNodes nodes along each axis,
+# numbered with x varying fastest
+def GridCoordinates(numberOfAxisNodes):
+    axis = numpy.linspace(0.0,1.0,numberOfAxisNodes)
+    z,y,x = numpy.meshgrid(axis,axis,axis,indexing='ij')
+    return numpy.column_stack([x.ravel(),y.ravel(),z.ravel()])
+
+# A dependent field U variable holding the values set at each node and element component
+class DependentField(object):
+
+    def __init__(self):
+        self.nodeValues = {}
+        self.elementValues = {}
+
+    def ParameterSetGetNodeDP(self,variableType,parameterSetType,versionNumber,derivativeNumber,nodeNumber,
+                              componentNumber):
+        return self.nodeValues.get((nodeNumber,componentNumber),0.0)
+
+    def ParameterSetUpdateNodeDP(self,variableType,parameterSetType,versionNumber,derivativeNumber,nodeNumber,
+                                 componentNumber,value):
+        self.nodeValues[(nodeNumber,componentNumber)] = value
+
+    def ParameterSetGetElementDP(self,variableType,parameterSetType,elementNumber,componentNumber):
+        return self.elementValues.get((elementNumber,componentNumber),0.0)
+
+    def ParameterSetUpdateElementDP(self,variableType,parameterSetType,elementNumber,componentNumber,value):
+        self.elementValues[(elementNumber,componentNumber)] = value
+
+    def ParameterSetUpdateStart(self,variableType,parameterSetType):
+        pass
+
+    def ParameterSetUpdateFinish(self,variableType,parameterSetType):
+        pass
+
+    def ParameterSetDataGet(self,variableType,parameterSetType):
+        return numpy.array([self.nodeValues[key] for key in sorted(self.nodeValues)]+
+                           [self.elementValues[key] for key in sorted(self.elementValues)])
+
+    def ParameterSetDataRestore(self,variableType,parameterSetType,data):
+        pass
+
+# A quadratic model of the unit cube with numberOfElementsXi elements along each axis, holding only what the nodal
+# solution recorder and the prolongation use
+class UnitCubeModel(object):
+
+    def __init__(self,numberOfElementsXi,nodalPressure=True):
+        self.numberOfNodesXi = 3
+        self.referenceCoordinates = GridCoordinates(2*numberOfElementsXi+1)
+        self.localNodes = numpy.arange(1,len(self.referenceCoordinates)+1)
+        self.localElements = numpy.arange(1,numberOfElementsXi**3+1)
+        self.pressureNodes = numpy.full(len(self.localNodes),nodalPressure)
+        self.dependentField = DependentField()
+        self.elementCentres = (GridCoordinates(numberOfElementsXi)*(numberOfElementsXi-1)+0.5)/numberOfElementsXi
+
+    def ReferenceCoordinates(self):
+        return self.referenceCoordinates
+
+    # One Gauss point at the centre of each element
+    def GaussPointCoordinates(self):
+        return self.elementCentres[:,numpy.newaxis,:]
+
+# A pressure that the quadratic basis interpolates exactly
+def Pressure(coordinates):
+    return -6.0+coordinates[:,0]+2.0*coordinates[:,1]+3.0*coordinates[:,2]**2
+
+def test_convergence_estimate_of_second_order_values():
+    estimate = refinement.ConvergenceEstimate([1.0,1.5,1.625],2)
+    assert estimate['reductionFactor'] == pytest.approx(4.0)
+    assert estimate['observedOrder'] == pytest.approx(2.0)
+    assert estimate['richardsonEstimate'] == pytest.approx(1.625+0.125/3.0)
+
+def test_convergence_estimate_without_enough_levels_or_convergence():
+    assert all(math.isnan(value) for value in refinement.ConvergenceEstimate([1.0,1.5]).values())
+    estimate = refinement.ConvergenceEstimate([1.0,1.5,2.5],2)
+    assert estimate['reductionFactor'] == pytest.approx(0.5)
+    assert math.isnan(estimate['observedOrder'])
+    assert math.isnan(estimate['richardsonEstimate'])
+    assert refinement.ConvergenceEstimate([1.0,1.5,1.5])['richardsonEstimate'] == 1.5
+    assert math.isnan(refinement.ConvergenceEstimate([1.0,1.5,1.625])['observedOrder'])
+
+def test_interpolate_regular_mesh_is_exact_for_quadratic_values():
+    axis = numpy.linspace(0.0,2.0,5)
+    z,y,x = numpy.meshgrid(axis,axis,axis,indexing='ij')
+    referenceCoordinates = numpy.column_stack([x.ravel(),y.ravel(),z.ravel()])
+    values = referenceCoordinates**2
+    points = numpy.array([[0.3,1.7,0.9],[2.0,0.0,1.25]])
+    numpy.testing.assert_allclose(refinement.InterpolateRegularMesh(referenceCoordinates,values,3,points),points**2)
+
+def test_nodal_solution_recorder_reads_the_pressure_at_every_node():
+    model = UnitCubeModel(1)
+    field_values.SetNodalValues(model.dependentField,None,model.localNodes,
+                                numpy.column_stack([model.referenceCoordinates,Pressure(model.referenceCoordinates)]))
+    recorder = refinement.NodalSolutionRecorder()
+    recorder.Start(model)
+    recorder.Write(model,1.0)
+    assert recorder.solutions[0].shape == (27,4)
+    numpy.testing.assert_array_equal(recorder.solutions[0][:,3],Pressure(model.referenceCoordinates))
+    assert recorder.elementPressures == []
+
+@pytest.mark.parametrize('nodalPressure',[True,False])
+def test_prolongation_sets_every_pressure_dof_of_the_seeded_level(nodalPressure):
+    coarse = UnitCubeModel(1,nodalPressure)
+    coarseValues = numpy.column_stack([coarse.referenceCoordinates*1.1,Pressure(coarse.referenceCoordinates)])
+    field_values.SetNodalValues(coarse.dependentField,None,coarse.localNodes,
+                                coarseValues if nodalPressure else coarseValues[:,:3])
+    field_values.SetElementValues(coarse.dependentField,None,coarse.localElements,4,[-5.0])
+    recorder = refinement.NodalSolutionRecorder()
+    recorder.Start(coarse)
+    recorder.Write(coarse,1.0)
+    model = UnitCubeModel(2,nodalPressure)
+    guess = refinement.ProlongateSolutions(recorder,model)
+    assert guess.times == [1.0]
+    nodeValues = field_values.NodalValues(model.dependentField,None,model.localNodes,3)
+    numpy.testing.assert_allclose(nodeValues,model.referenceCoordinates*1.1)
+    if nodalPressure:
+        assert sorted(model.dependentField.nodeValues) == [(node,component) for node in range(1,126)
+                                                           for component in range(1,5)]
+        numpy.testing.assert_allclose([model.dependentField.nodeValues[(node,4)] for node in range(1,126)],
+                                      Pressure(model.referenceCoordinates))
+    else:
+        assert sorted(model.dependentField.elementValues) == [(element,4) for element in range(1,9)]
+        assert set(model.dependentField.elementValues.values()) == {-5.0}
+
+@pytest.mark.parametrize('strategy',[refinement.H_REFINEMENT,refinement.P_REFINEMENT])
+def test_refinement_levels_keep_the_first_level_and_the_total_nodal_force(strategy):
+    parameters = {'forceType':NODAL_FORCE,'force':-0.3,'numberOfGlobalXElements':1,'uInterpolation':LINEAR_LAGRANGE}
+    levels = refinement.RefinementLevels(parameters,strategy,3)
+    assert len(levels) == 3
+    assert levels[0] == CantileverParameters(parameters)
+    for level in levels:
+        assert level['forceType'] == NODAL_FORCE
+        assert level['force']*refinement.NumberOfEdgeNodes(level) == pytest.approx(-0.6)
+    assert refinement.NumberOfEdgeNodes(levels[2]) == (5 if (strategy == refinement.H_REFINEMENT) else 4)
+
+def test_refinement_levels_keep_a_total_force():
+    levels = refinement.RefinementLevels({'forceType':TOTAL_FORCE,'force':-1.5},refinement.H_REFINEMENT,2)
+    assert [level['force'] for level in levels] == [-1.5,-1.5]
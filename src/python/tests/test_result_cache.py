@@ -0,0 +1,49 @@
+import os
+
+import numpy
+import pytest
+
+import cantilever_parameters
+import result_cache
+
+def test_run_key_includes_defaults():
+    defaults = cantilever_parameters.CantileverParameters()
+    assert result_cache.RunKey({}) == result_cache.RunKey({'c1':defaults['c1']})
+    assert result_cache.RunKey({}) != result_cache.RunKey({'c1':defaults['c1']+1.0})
+    assert result_cache.RunKey({'force':-0.3,'c1':2.0}) == result_cache.RunKey({'c1':2.0,'force':-0.3})
+
+def test_run_key_rejects_unknown_parameters():
+    with pytest.raises(ValueError):
+        result_cache.RunKey({'notAParameter':1.0})
+
+def test_get_returns_stored_outputs_and_arrays(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    assert cache.Get({'force':-0.6}) is None
+    cache.Put({'force':-0.6},{'tipDeflection':-1.5,'converged':True},{'displacement':numpy.ones((4,3))})
+    entry = cache.Get({'force':-0.6})
+    assert entry['outputs'] == {'tipDeflection':-1.5,'converged':True}
+    numpy.testing.assert_array_equal(entry['arrays']['displacement'],numpy.ones((4,3)))
+    assert cache.Get({'force':-0.3}) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    arrays = {'values':numpy.zeros(1000)}
+    cache = result_cache.ResultCache(str(tmp_path))
+    cache.Put({'force':-0.1},{},arrays)
+    entryBytes = cache.Entries()[0][1]
+    cache.maximumBytes = 2*entryBytes
+    cache.Put({'force':-0.2},{},arrays)
+    # Make the first entry the most recently used
+    for force,lastUsed in [(-0.1,3000.0),(-0.2,1000.0)]:
+        os.utime(cache.EntryDirectory(result_cache.RunKey({'force':force})),(lastUsed,lastUsed))
+    cache.Put({'force':-0.3},{},arrays)
+    assert cache.Get({'force':-0.2}) is None
+    assert cache.Get({'force':-0.1}) is not None
+    assert cache.Get({'force':-0.3}) is not None
+    assert sum(size for lastUsed,size,key in cache.Entries()) <= cache.maximumBytes
+    assert os.listdir(cache.temporaryDirectory) == []
+
+def test_cached_solve_does_not_solve_a_hit(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    cache.Put({'force':-0.6},{'tipDeflection':-1.5,'converged':True})
+    outputs = result_cache.CachedSolve({'force':-0.6},cache,echoMonitor=False)
+    assert outputs == {'tipDeflection':-1.5,'converged':True,'cached':True}
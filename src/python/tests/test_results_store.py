@@ -0,0 +1,98 @@
+import json, os
+
+import numpy
+import pytest
+
+import results_store
+
+def WriteSteps(path,numberOfSteps,offset=0.0,resumeSteps=None):
+    store = results_store.OpenResultsStore(path,resumeSteps)
+    store.WriteStatic('nodeNumbers',numpy.arange(1,5))
+    for stepIdx in range(resumeSteps or 0,numberOfSteps):
+        store.Append(float(stepIdx),{'displacement':numpy.full((4,3),offset+stepIdx),
+                                     'pressure':numpy.arange(4.0)+offset+stepIdx})
+    store.Close()
+
+def test_numpy_store_round_trip(tmp_path):
+    path = str(tmp_path/'results')
+    WriteSteps(path,3)
+    times,fields,static = results_store.ReadResults(path)
+    numpy.testing.assert_array_equal(times,[0.0,1.0,2.0])
+    assert fields['displacement'].shape == (3,4,3)
+    numpy.testing.assert_array_equal(fields['displacement'][2],numpy.full((4,3),2.0))
+    numpy.testing.assert_array_equal(fields['pressure'][1],numpy.arange(4.0)+1.0)
+    numpy.testing.assert_array_equal(static['nodeNumbers'],numpy.arange(1,5))
+
+def test_numpy_store_rerun_replaces_earlier_records(tmp_path):
+    path = str(tmp_path/'results')
+    WriteSteps(path,3)
+    WriteSteps(path,2,offset=10.0)
+    times,fields,static = results_store.ReadResults(path)
+    numpy.testing.assert_array_equal(times,[0.0,1.0])
+    numpy.testing.assert_array_equal(fields['displacement'][:,0,0],[10.0,11.0])
+    assert os.path.getsize(os.path.join(path,'pressure.f64')) == 2*4*8
+
+@pytest.mark.parametrize('name',['results','results.h5'])
+def test_resumed_store_drops_the_later_steps_and_appends(tmp_path,name):
+    if name.endswith('.h5'):
+        pytest.importorskip('h5py')
+    path = str(tmp_path/name)
+    WriteSteps(path,5)
+    WriteSteps(path,4,offset=10.0,resumeSteps=2)
+    times,fields,static = results_store.ReadResults(path)
+    numpy.testing.assert_array_equal(times,[0.0,1.0,2.0,3.0])
+    numpy.testing.assert_array_equal(fields['displacement'][:,0,0],[0.0,1.0,12.0,13.0])
+    numpy.testing.assert_array_equal(fields['pressure'][3],numpy.arange(4.0)+13.0)
+    numpy.testing.assert_array_equal(static['nodeNumbers'],numpy.arange(1,5))
+
+def test_resuming_past_the_end_of_a_store_keeps_every_step(tmp_path):
+    path = str(tmp_path/'results')
+    WriteSteps(path,2)
+    store = results_store.OpenResultsStore(path,5)
+    store.Append(2.0,{'displacement':numpy.full((4,3),2.0),'pressure':numpy.arange(4.0)+2.0})
+    store.Close()
+    times,fields,static = results_store.ReadResults(path)
+    numpy.testing.assert_array_equal(times,[0.0,1.0,2.0])
+    assert os.path.getsize(os.path.join(path,'pressure.f64')) == 3*4*8
+
+# A model that exports to files named by the step
+class ExportingModel(object):
+
+    def __init__(self,stepNumber):
+        self.stepNumber = stepNumber
+        self.exported = []
+
+    def Export(self,prefix):
+        self.exported.append(prefix)
+
+def test_restarted_exnode_exporter_carries_on_numbering():
+    model = ExportingModel(6)
+    exporter = results_store.ExnodeExporter('output/Cantilever',stepInterval=2)
+    exporter.Start(model)
+    for stepIdx in range(3):
+        exporter.Write(model,0.1*stepIdx)
+    assert model.exported == ['output/Cantilever_0008']
+
+def test_numpy_store_rejects_shape_change(tmp_path):
+    store = results_store.NumpyResultsStore(str(tmp_path/'results'))
+    store.Append(0.0,{'pressure':numpy.zeros(4)})
+    with pytest.raises(ValueError):
+        store.Append(1.0,{'pressure':numpy.zeros(5)})
+
+def test_interrupted_step_is_not_read(tmp_path):
+    path = str(tmp_path/'results')
+    WriteSteps(path,2)
+    # A record written without its metadata, as left by a run killed during Append
+    with open(os.path.join(path,'pressure.f64'),'ab') as fieldFile:
+        fieldFile.write(numpy.zeros(4).tobytes())
+    times,fields,static = results_store.ReadResults(path)
+    assert len(times) == 2
+    assert fields['pressure'].shape == (2,4)
+
+def test_hdf5_store_round_trip(tmp_path):
+    pytest.importorskip('h5py')
+    path = str(tmp_path/'results.h5')
+    WriteSteps(path,3)
+    times,fields,static = results_store.ReadResults(path)
+    numpy.testing.assert_array_equal(times,[0.0,1.0,2.0])
+    numpy.testing.assert_array_equal(fields['pressure'][2],numpy.arange(4.0)+2.0)
@@ -0,0 +1,97 @@
+import os, time
+
+import solver_service
+
+# A worker that answers each job without iron. A job can ask it to sleep or to exit as if the solver had crashed.
+def StubWorkerLoop(connection,logFileName=None):
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        if (job.get('action') == 'crash'):
+            os._exit(3)
+        if (job.get('action') == 'sleep'):
+            time.sleep(job['seconds'])
+        connection.send({'status':'converged','processId':os.getpid()})
+
+def test_build_key_ignores_updatable_parameters():
+    key = solver_service.BuildKey({'force':-0.3})
+    assert solver_service.BuildKey({'force':-0.5,'c1':3.0}) == key
+    assert solver_service.BuildKey({}) == key
+    assert solver_service.BuildKey({'numberOfGlobalXElements':6}) != key
+
+# A pool with unstarted workers, to pick jobs from its queue without solving them
+def IdlePool(numberOfWorkers,jobs):
+    pool = solver_service.SolverPool.__new__(solver_service.SolverPool)
+    pool.slots = [solver_service.WorkerSlot(slotNumber,10) for slotNumber in range(numberOfWorkers)]
+    pool.pending = [solver_service.PendingJob(job) for job in jobs]
+    return pool
+
+def test_next_job_prefers_a_job_the_worker_model_can_be_updated_for():
+    jobs = [{'parameters':{'numberOfGlobalXElements':6}},{'parameters':{'force':-0.4}},{'parameters':{'force':-0.5}}]
+    pool = IdlePool(2,jobs)
+    slot = pool.slots[0]
+    slot.buildKey = solver_service.BuildKey({})
+    assert pool.NextJob(slot).job is jobs[1]
+    # A match beyond the first numberOfWorkers jobs does not hold back the oldest job
+    pool = IdlePool(2,[jobs[0],jobs[0],jobs[2]])
+    assert pool.NextJob(slot).job is jobs[0]
+    assert len(pool.pending) == 2
+
+def test_next_job_of_a_cold_worker_is_the_oldest():
+    jobs = [{'parameters':{'numberOfGlobalXElements':6}},{'parameters':{}}]
+    pool = IdlePool(2,jobs)
+    assert pool.NextJob(pool.slots[0]).job is jobs[0]
+
+def test_worker_is_replaced_after_a_timeout():
+    slot = solver_service.WorkerSlot(0,10,workerFunction=StubWorkerLoop)
+    try:
+        firstId = slot.Run({'parameters':{}})['processId']
+        result = slot.Run({'parameters':{},'action':'sleep','seconds':30.0},timeout=0.5)
+        assert result['status'] == 'timeout'
+        assert slot.process is None
+        result = slot.Run({'parameters':{}})
+        assert result['status'] == 'converged'
+        assert result['processId'] != firstId
+        assert slot.numberOfProcesses == 2
+    finally:
+        slot.Stop(kill=True)
+
+def test_worker_is_replaced_after_a_crash():
+    slot = solver_service.WorkerSlot(0,10,workerFunction=StubWorkerLoop)
+    try:
+        result = slot.Run({'parameters':{},'action':'crash'})
+        assert result['status'] == 'crashed'
+        assert 'code 3' in result['message']
+        assert slot.process is None
+        assert slot.Run({'parameters':{}})['status'] == 'converged'
+        assert slot.numberOfProcesses == 2
+    finally:
+        slot.Stop(kill=True)
+
+def test_worker_is_recycled_after_maximum_jobs():
+    slot = solver_service.WorkerSlot(0,2,workerFunction=StubWorkerLoop)
+    try:
+        processIds = [slot.Run({'parameters':{}})['processId'] for jobIdx in range(3)]
+        assert processIds[0] == processIds[1]
+        assert processIds[2] != processIds[1]
+        assert slot.numberOfProcesses == 2
+        assert slot.numberOfJobs == 1
+    finally:
+        slot.Stop(kill=True)
+
+def test_pool_keeps_the_build_key_of_solved_jobs_only():
+    pool = solver_service.SolverPool(1,maximumJobs=10,workerFunction=StubWorkerLoop)
+    try:
+        result = pool.Submit({'parameters':{'force':-0.4}})
+        assert (result['status'],result['worker']) == ('converged',0)
+        assert pool.slots[0].buildKey == solver_service.BuildKey({'force':-0.4})
+        assert pool.Status()['workers'][0]['warm']
+        assert pool.Submit({'parameters':{},'action':'crash'})['status'] == 'crashed'
+        assert pool.slots[0].buildKey is None
+        assert pool.Status()['workers'][0] == {'worker':0,'jobs':1,'processes':1,'warm':False}
+    finally:
+        pool.Close()
@@ -0,0 +1,28 @@
+import pytest
+
+import sweep
+
+def test_read_samples_skips_empty_cells(tmp_path):
+    samplesFileName = tmp_path/'samples.csv'
+    samplesFileName.write_text('fibreRate,force\n0.01,-0.3\n,-0.6\n0.02,\n0.03\n')
+    assert sweep.ReadSamples(str(samplesFileName)) == [{'fibreRate':0.01,'force':-0.3},{'force':-0.6},
+                                                       {'fibreRate':0.02},{'fibreRate':0.03}]
+
+def test_read_samples_reports_row_and_column(tmp_path):
+    samplesFileName = tmp_path/'samples.csv'
+    samplesFileName.write_text('fibreRate,force\n0.01,-0.3\n0.02,heavy\n')
+    with pytest.raises(ValueError,match='line 3 column force'):
+        sweep.ReadSamples(str(samplesFileName))
+
+def test_read_samples_reports_extra_cells(tmp_path):
+    samplesFileName = tmp_path/'samples.csv'
+    samplesFileName.write_text('force,c1\n-0.3,2.0,\n-0.3,2.0,5\n')
+    with pytest.raises(ValueError,match='line 3 has more cells than columns'):
+        sweep.ReadSamples(str(samplesFileName))
+
+def test_read_grid_is_cartesian_product(tmp_path):
+    gridFileName = tmp_path/'grid.json'
+    gridFileName.write_text('{"fibreRate": [0.001, 0.01], "force": [-0.3, -0.6], "c1": 2.0}')
+    points = sweep.ReadGrid(str(gridFileName))
+    assert len(points) == 4
+    assert {'fibreRate':0.01,'force':-0.6,'c1':2.0} in points